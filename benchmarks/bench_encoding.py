@@ -0,0 +1,50 @@
+"""Compare the cost of serializing a batch of flags with every encoder
+
+Run it with `poetry run python benchmarks/bench_encoding.py`"""
+
+from __future__ import annotations
+from json import dumps
+from string import ascii_uppercase, digits
+from timeit import repeat
+from collections.abc import Callable
+from pyfarmer import JsonEncoder, CompactEncoder, random_string
+from pyfarmer._encoding import orjson_dumps
+
+FLAGS = 10_000
+REPEAT = 5
+NUMBER = 20
+ALIAS = "service1-exploit.py"
+
+
+def httpx_json(flags: list[tuple[str, str]]) -> bytes:
+    data = [{"flag": flag, "sploit": ALIAS, "team": team} for team, flag in flags]
+    return dumps(data).encode()
+
+
+def bench(name: str, function: Callable[[], bytes]) -> None:
+    size = len(function())
+    best = min(repeat(function, repeat=REPEAT, number=NUMBER)) / NUMBER
+    print(f"{name:<24} {best * 1000:8.2f} ms {size / 1024:10.1f} KiB")
+
+
+def main() -> None:
+    flags = [
+        (
+            f"10.60.{i // 256}.{i % 256}",
+            random_string(31, charset=ascii_uppercase + digits) + "=",
+        )
+        for i in range(FLAGS)
+    ]
+    print(f"{FLAGS} flags, orjson {'installed' if orjson_dumps else 'not installed'}")
+    bench("httpx json= (before)", lambda: httpx_json(flags))
+    for name, encoder in [
+        ("json", JsonEncoder()),
+        ("json + gzip", JsonEncoder(gzip=True)),
+        ("compact", CompactEncoder()),
+        ("compact + gzip", CompactEncoder(gzip=True)),
+    ]:
+        bench(name, lambda: encoder.encode(flags, alias=ALIAS)[0])
+
+
+if __name__ == "__main__":
+    main()
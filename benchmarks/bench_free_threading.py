@@ -0,0 +1,88 @@
+"""Measure ThreadStrategy: how many messages per second reach the event loop
+with a pipe and with a ThreadChannel, and how CPU bound sploits scale with the threads.
+The threads only scale on a free-threaded build of Python 3.13+ with several cores
+
+Run it with `poetry run python benchmarks/bench_free_threading.py`"""
+
+from __future__ import annotations
+from asyncio import create_task, gather, get_running_loop, run
+from collections.abc import Generator
+from os import cpu_count
+from threading import Thread
+from time import perf_counter
+from pyfarmer import ThreadStrategy, FarmingStrategy
+from pyfarmer._pyfarmer import WorkerSettings, process_main
+from pyfarmer._strategies import WriteCommunication, gil_enabled
+
+MESSAGES = 100_000
+FIBONACCI = 28
+THREADS = (1, 2, 4, 8)
+TIMEOUT = 600
+
+
+def fibonacci(n: int) -> int:
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def cpu_sploit(ip: str) -> Generator[str, None, None]:
+    yield str(fibonacci(FIBONACCI))
+
+
+def flood(connection: WriteCommunication) -> None:
+    for i in range(MESSAGES):
+        connection.send(str(i))
+
+
+async def messages_per_second(strategy: FarmingStrategy) -> float:
+    read, write = strategy.create_communication()
+    start = perf_counter()
+    with write as w:
+        sender = Thread(target=flood, args=(w,))
+        sender.start()
+
+        async def receive() -> int:
+            return sum([1 async for _ in read])
+
+        received = create_task(receive())
+        await get_running_loop().run_in_executor(None, sender.join)
+    assert await received == MESSAGES
+    return MESSAGES / (perf_counter() - start)
+
+
+async def attack(strategy: FarmingStrategy) -> None:
+    read, write = strategy.create_communication()
+
+    async def receive() -> None:
+        async for _ in read:
+            pass
+
+    messages = create_task(receive())
+    with write as w:
+        with strategy.create_process(
+            process_main, (cpu_sploit, w, "127.0.0.1", WorkerSettings(flag_filter=None))
+        ) as process:
+            await process(TIMEOUT)
+    await messages
+
+
+async def scaling(strategy: FarmingStrategy, threads: int) -> float:
+    start = perf_counter()
+    await gather(*(attack(strategy) for _ in range(threads)))
+    return perf_counter() - start
+
+
+async def main() -> None:
+    print(f"GIL enabled: {gil_enabled()}, CPUs: {cpu_count()}")
+    for native in (False, True):
+        rate = await messages_per_second(ThreadStrategy(native_channel=native))
+        print(f"{'ThreadChannel' if native else 'pipe':<14} {rate:10.0f} messages/s")
+    strategy = ThreadStrategy()
+    single = await scaling(strategy, 1)
+    print(f"{'threads':>7} {'time':>8} {'speedup':>8}")
+    for threads in THREADS:
+        elapsed = await scaling(strategy, threads)
+        print(f"{threads:>7} {elapsed:7.3f}s {single * threads / elapsed:7.2f}x")
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,64 @@
+"""Compare the default asyncio event loop with uvloop running a sprint
+of a trivial sploit against the mock farm, so that most of the time is spent
+in the scheduler, in the communication with the sploits and in the uploader
+
+Run it with `poetry run python benchmarks/bench_loop.py`"""
+
+from __future__ import annotations
+from asyncio import run
+from logging import disable, WARNING
+from time import perf_counter
+from pyfarmer import async_farm, ThreadStrategy, Mode, Loop, use_event_loop
+from pyfarmer.testing import MockFarm
+
+TARGETS = 2000
+FLAGS = 20
+POOL_SIZE = 16
+REPEAT = 3
+
+
+def sploit(ip: str):
+    for i in range(FLAGS):
+        yield f"{ip}-{i}"
+
+
+async def sprint() -> tuple[float, int]:
+    config = {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 60}
+    async with MockFarm(config) as farm:
+        start = perf_counter()
+        await async_farm(
+            sploit,
+            ThreadStrategy(trace_kill=False),
+            server_url=farm.url,
+            alias="bench",
+            pool_size=POOL_SIZE,
+            timeout=10,
+            mode=Mode.SPRINT,
+            report_interval=3600,
+        )
+        return perf_counter() - start, len(farm.flags)
+
+
+def main() -> None:
+    disable(WARNING)
+    print(f"{TARGETS} targets, {FLAGS} flags per attack, pool size {POOL_SIZE}")
+    for loop in Loop:
+        try:
+            use_event_loop(loop)
+        except ImportError:
+            print(f"{loop.value:<8} not installed")
+            continue
+        times: list[float] = []
+        for _ in range(REPEAT):
+            elapsed, flags = run(sprint())
+            assert flags == TARGETS * FLAGS
+            times.append(elapsed)
+        best = min(times)
+        print(
+            f"{loop.value:<8} {best:6.2f} s {TARGETS / best:8.1f} attacks/s "
+            f"{TARGETS * FLAGS / best:9.1f} flags/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Simulate the scheduler at production scale in virtual time:
+thousands of targets for an hour of slow mode cycles, with sploits taking
+a random time that sometimes exceeds the timeout
+
+Run it with `poetry run python benchmarks/bench_scheduler.py`"""
+
+from __future__ import annotations
+from random import Random
+from time import perf_counter
+from pyfarmer import Mode
+from pyfarmer.testing import simulate, SimulatedAttack
+
+TARGETS = (100, 1000, 5000)
+ATTACK_PERIOD = 120
+TIMEOUT = 10
+CYCLES = 30
+POOL_SIZE = 50
+
+
+def main() -> None:
+    random = Random(0)
+
+    def model(target: str) -> SimulatedAttack:
+        return SimulatedAttack(duration=random.expovariate(1 / 3))
+
+    for targets in TARGETS:
+        start = perf_counter()
+        report = simulate(
+            [f"10.{i // 250}.{i % 250}.1" for i in range(targets)],
+            model,
+            attack_period=ATTACK_PERIOD,
+            timeout=TIMEOUT,
+            cycles=CYCLES,
+            pool_size=POOL_SIZE,
+            mode=Mode.ALL,
+        )
+        print(f"{targets} targets, simulated in {perf_counter() - start:.1f}s")
+        for line in report.summary():
+            print(f"\t{line}")
+
+
+if __name__ == "__main__":
+    main()
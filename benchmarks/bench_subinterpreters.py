@@ -0,0 +1,106 @@
+"""Compare SubinterpreterStrategy and ProcessStrategy: the latency of an attack,
+the first one and the next ones, and the memory used while several attacks are running.
+The memory is the proportional set size of the farmer and its children (Linux only)
+
+Run it with `poetry run python benchmarks/bench_subinterpreters.py` on Python 3.13+"""
+
+from __future__ import annotations
+from asyncio import create_task, gather, run, sleep
+from collections.abc import Callable, Generator
+from os import getpid, listdir
+from time import perf_counter
+from time import sleep as blocking_sleep
+from pyfarmer import FarmingStrategy, ProcessStrategy, SubinterpreterStrategy, Status
+from pyfarmer._pyfarmer import WorkerSettings, process_main
+
+ATTACKS = 20
+CONCURRENT = 10
+TIMEOUT = 30
+HOLD = 2
+
+
+def quick_sploit(ip: str) -> Generator[str, None, None]:
+    yield ip
+
+
+def sleeping_sploit(ip: str) -> Generator[str, None, None]:
+    yield ip
+    blocking_sleep(HOLD)
+
+
+def children(pid: int) -> list[int]:
+    result: list[int] = []
+    for task in listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as file:
+            for child in file.read().split():
+                result += [int(child), *children(int(child))]
+    return result
+
+
+def pss(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def memory() -> float:
+    pid = getpid()
+    return sum(pss(process) for process in [pid, *children(pid)]) / 1024
+
+
+async def attack(
+    strategy: FarmingStrategy, sploit: Callable[[str], Generator[str, None, None]]
+) -> tuple[Status, list[object]]:
+    read, write = strategy.create_communication()
+
+    async def receive() -> list[object]:
+        return [message async for message in read]
+
+    messages = create_task(receive())
+    with write as w:
+        with strategy.create_process(
+            process_main, (sploit, w, "127.0.0.1", WorkerSettings(flag_filter=None))
+        ) as process:
+            status = await process(TIMEOUT)
+    return status, await messages
+
+
+async def measure(strategy: FarmingStrategy) -> tuple[float, float, float, float]:
+    before = memory()
+    start = perf_counter()
+    await attack(strategy, quick_sploit)
+    first = perf_counter() - start
+    start = perf_counter()
+    for _ in range(ATTACKS):
+        await attack(strategy, quick_sploit)
+    warm = (perf_counter() - start) / ATTACKS
+    attacks = gather(*(attack(strategy, sleeping_sploit) for _ in range(CONCURRENT)))
+    await sleep(HOLD / 2)
+    during = memory()
+    await attacks
+    return first, warm, before, during
+
+
+async def main() -> None:
+    strategies: dict[str, Callable[[], FarmingStrategy]] = {
+        "process fork": lambda: ProcessStrategy(start_method="fork"),
+        "process spawn": lambda: ProcessStrategy(start_method="spawn"),
+        "subinterpreter": SubinterpreterStrategy,
+    }
+    print(
+        f"{'strategy':<16} {'first':>9} {'next':>9} {'idle':>10} {f'{CONCURRENT} running':>12}"
+    )
+    for name, factory in strategies.items():
+        strategy = factory()
+        first, warm, before, during = await measure(strategy)
+        if isinstance(strategy, SubinterpreterStrategy):
+            strategy.close()
+        print(
+            f"{name:<16} {first * 1000:7.1f}ms {warm * 1000:7.1f}ms {before:7.1f}MiB {during:9.1f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    run(main())
@@ -0,0 +1,86 @@
+"""Compare the kill methods of ThreadStrategy: the speed of a CPU bound sploit
+and the time needed to stop a thread after its deadline
+
+Run it with `poetry run python benchmarks/bench_threads.py`"""
+
+from __future__ import annotations
+from collections.abc import Callable
+from threading import Thread
+from time import perf_counter, sleep
+from pyfarmer import KillMethod
+from pyfarmer._strategies import (
+    InterruptibleThread,
+    StoppableThread,
+    FakeStoppableThread,
+)
+
+THREADS: dict[KillMethod, type[Thread]] = {
+    KillMethod.NONE: FakeStoppableThread,
+    KillMethod.ASYNC_EXCEPTION: InterruptibleThread,
+    KillMethod.TRACE: StoppableThread,
+}
+KILL_TIMEOUT = 5
+FIBONACCI = 27
+REPEAT = 5
+
+
+def fibonacci(n: int) -> int:
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def calls_loop() -> None:
+    while True:
+        fibonacci(10)
+
+
+def tight_loop() -> None:
+    i = 0
+    while True:
+        i += 1
+
+
+def throughput(thread: type[Thread]) -> float:
+    times: list[float] = []
+    for _ in range(REPEAT):
+        start = perf_counter()
+        worker = thread(target=fibonacci, args=(FIBONACCI,))
+        worker.start()
+        worker.join()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def kill_latency(thread: type[Thread], target: Callable[[], None]) -> float | None:
+    worker = thread(target=target, daemon=True)
+    worker.start()
+    sleep(0.1)
+    start = perf_counter()
+    worker.kill()  # type: ignore
+    worker.join(KILL_TIMEOUT)
+    if worker.is_alive():
+        return None
+    return perf_counter() - start
+
+
+def main() -> None:
+    # The zombies left by the kill tests slow down the other threads,
+    # so all the throughputs are measured first, tracing last since
+    # on some versions it leaves the code instrumented
+    elapsed = {method: throughput(thread) for method, thread in THREADS.items()}
+    print(
+        f"{'method':<16} {'fib(' + str(FIBONACCI) + ')':>10} {'kill calls':>12} {'kill loop':>12}"
+    )
+    for method in THREADS:
+        latencies: list[str] = []
+        for target in (calls_loop, tight_loop):
+            latency = None
+            if method != KillMethod.NONE:
+                latency = kill_latency(THREADS[method], target)
+            latencies.append("never" if latency is None else f"{latency * 1000:.1f} ms")
+        print(
+            f"{method.value:<16} {elapsed[method]:9.3f}s {latencies[0]:>12} {latencies[1]:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,25 @@
 >     farm(main)
 > ```
 
+> Remember the flag ids already stolen from every target, across the attacks
+> and the restarts of the farmer, to only attack the new ones:
+>
+> ```python
+> from httpx import get
+> from pyfarmer import farm, state
+>
+>
+> def main(ip: str):
+>     ids = get(f"http://{ip}:5000/api/products").json()
+>     for flag_id in state().unseen(ids):
+>         yield get(f"http://{ip}:5000/api/products/{flag_id}/download").text
+>         state().mark(flag_id)
+>
+>
+> if __name__ == "__main__":
+>     farm(main)
+> ```
+
 ## Installation
 
 > Install locally with:
@@ -47,6 +66,12 @@ from pyfarmer._pyfarmer import (
     async_farm,
     SploitFunction,
     Mode,
+    Scheduler,
+    Encoding,
+    Extraction,
+    Submission,
+    Loop,
+    use_event_loop,
 )
 from pyfarmer._strategies import (
     ProcessStrategy,
@@ -57,7 +82,36 @@ from pyfarmer._strategies import (
     Status,
     SimpleFarmingStrategy,
     ReadCommunication,
+    KillMethod,
+)
+from pyfarmer._subinterpreters import SubinterpreterStrategy
+from pyfarmer._hybrid import HybridStrategy
+from pyfarmer._flags import FlagFilter
+from pyfarmer._connections import connection, http_client, Prewarmer
+from pyfarmer._ratelimit import TokenBucket, RateLimiter, rate_limit
+from pyfarmer._deadline import deadline, remaining, DeadlineExceeded
+from pyfarmer._state import state, TargetState
+from pyfarmer._reload import ReloadableSploit
+from pyfarmer._retry import RetryPolicy
+from pyfarmer._encoding import FlagEncoder, JsonEncoder, CompactEncoder
+from pyfarmer._submitters import (
+    Submitter,
+    FarmSubmitter,
+    TcpSubmitter,
+    FileSubmitter,
+)
+from pyfarmer._distributed import Coordinator, async_work
+from pyfarmer._daemon import async_daemon
+from pyfarmer._budget import ConcurrencyBudget
+from pyfarmer._shim import FarmShim
+from pyfarmer._reporter import Reporter
+from pyfarmer._scheduling import (
+    SchedulingPolicy,
+    RandomPolicy,
+    BanditPolicy,
+    ExpiryPolicy,
 )
+from pyfarmer._tick import Tick
 from pyfarmer._utils import random_string, print_exception
 
 __all__ = [
@@ -75,4 +129,45 @@ __all__ = [
     "Status",
     "SimpleFarmingStrategy",
     "ReadCommunication",
+    "Reporter",
+    "Scheduler",
+    "SchedulingPolicy",
+    "RandomPolicy",
+    "BanditPolicy",
+    "FlagFilter",
+    "Encoding",
+    "Extraction",
+    "FlagEncoder",
+    "JsonEncoder",
+    "CompactEncoder",
+    "FarmShim",
+    "Loop",
+    "use_event_loop",
+    "KillMethod",
+    "SubinterpreterStrategy",
+    "HybridStrategy",
+    "connection",
+    "http_client",
+    "Prewarmer",
+    "TokenBucket",
+    "RateLimiter",
+    "rate_limit",
+    "deadline",
+    "remaining",
+    "DeadlineExceeded",
+    "ReloadableSploit",
+    "RetryPolicy",
+    "Submission",
+    "Submitter",
+    "FarmSubmitter",
+    "TcpSubmitter",
+    "FileSubmitter",
+    "Coordinator",
+    "async_work",
+    "async_daemon",
+    "ConcurrencyBudget",
+    "ExpiryPolicy",
+    "Tick",
+    "state",
+    "TargetState",
 ]
@@ -0,0 +1,3 @@
+from pyfarmer._daemon import daemon
+
+daemon()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from collections import Counter
+from itertools import product
+from math import ceil
+from re import compile
+from sys import platform
+
+from pyfarmer._strategies import Status
+
+try:
+    from resource import getrusage, RUSAGE_SELF, RUSAGE_CHILDREN
+except ImportError:
+    getrusage = None
+
+RANGE = compile(r"(\d+)-(\d+)")
+PERCENTILES = (50, 90, 99)
+
+
+def parse_targets(spec: str, /) -> list[str]:
+    """Expand a list of targets, every number of an address can be a range,
+    for example 10.60.1-3.1,127.0.0.1
+
+    - spec: The comma separated targets
+
+    - returns: The targets"""
+    targets: list[str] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts: list[list[str]] = []
+        for part in item.split("."):
+            match = RANGE.fullmatch(part)
+            if match is None:
+                parts.append([part])
+            else:
+                start, end = int(match.group(1)), int(match.group(2))
+                parts.append([str(i) for i in range(start, end + 1)])
+        targets += [".".join(address) for address in product(*parts)]
+    return targets
+
+
+def percentile(values: list[float], p: float, /) -> float:
+    """Get a percentile with the nearest rank method
+
+    - values: The sorted values, not empty
+    - p: The percentile between 0 and 100
+
+    - returns: The smallest value greater or equal than p% of the values"""
+    return values[max(ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def peak_rss() -> tuple[float, float] | None:
+    """Get the maximum resident set size of the farmer
+    and of the largest terminated child process
+
+    - returns: The two sizes in MiB, None if not supported by the platform"""
+    if getrusage is None:
+        return None
+    # Linux reports KiB, macOS bytes
+    unit = 1024 * 1024 if platform == "darwin" else 1024
+    return (
+        getrusage(RUSAGE_SELF).ru_maxrss / unit,
+        getrusage(RUSAGE_CHILDREN).ru_maxrss / unit,
+    )
+
+
+class BenchReport:
+    """Results of the runs of a sploit against local targets"""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        """Seconds taken by every run"""
+        self.flags: list[int] = []
+        """Flags sent by every run"""
+        self.stats: Counter[Status] = Counter()
+        """Number of runs by exit status"""
+        self.elapsed = 0.0
+        """Seconds taken by the whole benchmark"""
+
+    def add(self, status: Status, flags: int, latency: float, /) -> None:
+        """Record a run
+
+        - status: The exit status
+        - flags: The number of flags sent
+        - latency: Seconds from the start to the end of the run"""
+        self.stats[status] += 1
+        self.flags.append(flags)
+        self.latencies.append(latency)
+
+    def summary(self) -> list[str]:
+        """Describe the results
+
+        - returns: The lines of the summary"""
+        runs = len(self.latencies)
+        if runs == 0:
+            return ["No runs"]
+        latencies = sorted(self.latencies)
+        lines = [
+            "latency: "
+            + " ".join(f"p{p} {percentile(latencies, p):.3f}s" for p in PERCENTILES)
+            + f" max {latencies[-1]:.3f}s",
+            f"flags per run: mean {sum(self.flags) / runs:.2f} "
+            f"min {min(self.flags)} max {max(self.flags)}",
+            f"OK: {self.stats[Status.OK]}/{runs} "
+            f"ERROR: {self.stats[Status.ERROR]}/{runs} "
+            f"({self.stats[Status.ERROR] / runs:.1%}) "
+            f"TIMEOUT: {self.stats[Status.TIMEOUT]}/{runs} "
+            f"({self.stats[Status.TIMEOUT] / runs:.1%})",
+        ]
+        if self.elapsed > 0:
+            lines.append(f"throughput: {runs / self.elapsed:.2f} runs/s")
+        rss = peak_rss()
+        if rss is not None:
+            lines.append(
+                f"peak RSS: farmer {rss[0]:.1f} MiB, largest sploit process {rss[1]:.1f} MiB"
+            )
+        return lines
@@ -0,0 +1,80 @@
+from __future__ import annotations
+from asyncio import Future, CancelledError, get_running_loop
+from collections import Counter, deque
+
+
+class ConcurrencyBudget:
+    """Limits the attacks running at the same time across several sploits.
+    When the budget is contended the next free slot goes to the waiting sploit
+    running the fewest attacks, so every sploit gets a fair share
+    and the share of an idle sploit is used by the others"""
+
+    def __init__(self, size: int, /):
+        """- size: Maximum number of attacks running at the same time"""
+        assert size > 0
+        self.size = size
+        """Maximum number of attacks running at the same time"""
+        self.running: Counter[str] = Counter()
+        """Number of running attacks by sploit"""
+        self.__waiters: dict[str, deque[Future[None]]] = {}
+
+    def share(self, name: str, /) -> BudgetShare:
+        """Get the part of the budget used by a sploit
+
+        - name: The name of the sploit
+
+        - returns: An async context manager holding a slot while the attack runs"""
+        return BudgetShare(self, name)
+
+    async def acquire(self, name: str, /) -> None:
+        """Wait for a free slot
+
+        - name: The name of the sploit taking the slot"""
+        if not self.__waiters and sum(self.running.values()) < self.size:
+            self.running[name] += 1
+            return
+        future: Future[None] = get_running_loop().create_future()
+        self.__waiters.setdefault(name, deque()).append(future)
+        try:
+            await future
+        except CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was given while being cancelled
+                self.release(name)
+            raise
+
+    def release(self, name: str, /) -> None:
+        """Give back a slot
+
+        - name: The name of the sploit that took the slot"""
+        self.running[name] -= 1
+        if self.running[name] <= 0:
+            del self.running[name]
+        while self.__waiters and sum(self.running.values()) < self.size:
+            fairest = min(self.__waiters, key=lambda waiting: self.running[waiting])
+            waiters = self.__waiters[fairest]
+            future = waiters.popleft()
+            if not waiters:
+                del self.__waiters[fairest]
+            if future.cancelled():
+                continue
+            self.running[fairest] += 1
+            future.set_result(None)
+
+
+class BudgetShare:
+    """The part of a ConcurrencyBudget used by a sploit"""
+
+    def __init__(self, budget: ConcurrencyBudget, name: str, /):
+        """- budget: The shared budget
+        - name: The name of the sploit"""
+        self.budget = budget
+        """The shared budget"""
+        self.name = name
+        """The name of the sploit"""
+
+    async def __aenter__(self) -> None:
+        await self.budget.acquire(self.name)
+
+    async def __aexit__(self, *_: object) -> None:
+        self.budget.release(self.name)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from asyncio import sleep
+from time import time
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Source of the time used to schedule the attacks"""
+
+    def time(self) -> float:
+        """Get the current time
+
+        - returns: The seconds since an arbitrary instant"""
+        ...
+
+    async def sleep(self, seconds: float, /) -> None:
+        """Wait for some time
+
+        - seconds: The seconds to wait"""
+        ...
+
+
+class SystemClock(Clock):
+    """The wall clock of the system, with the sleep of asyncio"""
+
+    def time(self) -> float:
+        return time()
+
+    async def sleep(self, seconds: float, /) -> None:
+        await sleep(seconds)
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+from asyncio import get_running_loop, sleep, wait_for, TimeoutError
+from collections.abc import Iterable, Sequence
+from os import getpid
+from socket import socket, create_connection, SOCK_STREAM, MSG_PEEK
+from threading import Lock
+from typing import Optional, Union, Tuple
+from logging import getLogger
+
+from httpx import Client, HTTPTransport, Limits, create_ssl_context
+from httpcore import ConnectionPool, NetworkStream, SyncBackend
+
+try:
+    # Private, httpcore has no public way to wrap an open socket
+    from httpcore._backends.sync import SyncStream
+except ImportError:
+    SyncStream = None  # type: ignore
+
+LOGGER = getLogger("pyfarmer.connections")
+
+DEFAULT_PREWARM_LEAD = 1.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_LIMITS = Limits(max_connections=10, max_keepalive_connections=10)
+
+SocketOption = Union[
+    Tuple[int, int, int],
+    Tuple[int, int, Union[bytes, bytearray]],
+    Tuple[int, int, None, int],
+]
+
+# Shared by the threads and copied into the forked processes
+_lock = Lock()
+_owner = getpid()
+_warm: dict[tuple[str, int], list[socket]] = {}
+_addresses: dict[str, str] = {}
+_clients: dict[tuple[str, int, str], Client] = {}
+
+
+def resolve(host: str, /) -> str:
+    """Get the address of a host resolved by the farmer before the attack
+
+    - host: The host of the target
+
+    - returns: The resolved address, the host itself if it was not resolved"""
+    return _addresses.get(host, host)
+
+
+def take_connection(host: str, port: int, /) -> socket | None:
+    """Take a connection opened by the farmer before the attack
+
+    - host: The host of the target
+    - port: The port of the service
+
+    - returns: A connected blocking socket, None if there are no open connections"""
+    while True:
+        with _lock:
+            sockets = _warm.get((host, port))
+            if not sockets:
+                return None
+            sock = sockets.pop()
+        if is_open(sock):
+            sock.setblocking(True)
+            return sock
+        sock.close()
+
+
+def is_open(sock: socket, /) -> bool:
+    """Check if the other end has not closed a connection
+
+    - sock: The socket of the connection
+
+    - returns: If the connection is still open"""
+    sock.setblocking(False)
+    try:
+        return sock.recv(1, MSG_PEEK) != b""
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+
+
+def connection(
+    ip: str, port: int, /, *, timeout: float | None = DEFAULT_CONNECT_TIMEOUT
+) -> socket:
+    """Get a TCP connection to a service of the target,
+    already open if the farmer pre-connected to the port with --prewarm.
+    With pwntools use it as remote.fromsocket(connection(ip, port))
+
+    - ip: The ip of the target
+    - port: The port of the service
+    - timeout: Seconds to wait for a new connection, None to wait forever
+
+    - returns: The connected socket"""
+    sock = take_connection(ip, port)
+    if sock is not None:
+        return sock
+    return create_connection((resolve(ip), port), timeout=timeout)
+
+
+def http_client(ip: str, port: int = 80, /, *, scheme: str = "http") -> Client:
+    """Get a keep-alive http client for a target, it uses the connections
+    opened by the farmer with --prewarm and it is reused by the next attacks
+    running in the same process.
+    Don't close it
+
+    - ip: The ip of the target
+    - port: The port of the web service
+    - scheme: http or https
+
+    - returns: A client with the target as its base url"""
+    key = (ip, port, scheme)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Client(
+                base_url=f"{scheme}://{ip}:{port}",
+                # Without the prewarmed connections, still kept alive across requests
+                transport=WarmTransport() if SyncStream is not None else None,
+            )
+            _clients[key] = client
+    return client
+
+
+class WarmBackend(SyncBackend):
+    """Network backend of httpcore using the connections opened by the farmer"""
+
+    def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[SocketOption]] = None,
+    ) -> NetworkStream:
+        sock = take_connection(host, port)
+        if sock is None:
+            return super().connect_tcp(
+                resolve(host), port, timeout, local_address, socket_options
+            )
+        return SyncStream(sock)
+
+
+class WarmTransport(HTTPTransport):
+    """Http transport using the connections opened by the farmer"""
+
+    def __init__(self, *, verify: bool = True, limits: Limits = DEFAULT_LIMITS):
+        """- verify: Verify the certificates of https servers
+        - limits: The limits of the connection pool"""
+        super().__init__(verify=verify, limits=limits)
+        self._pool = ConnectionPool(
+            ssl_context=create_ssl_context(verify=verify),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=WarmBackend(),
+        )
+
+
+def adopt_connections(target: str, /) -> None:
+    """Called at the start of an attack, in a forked process it closes the copies
+    of the connections opened for the other targets
+
+    - target: The attacked target"""
+    global _owner
+    pid = getpid()
+    if pid == _owner:
+        return
+    _owner = pid
+    with _lock:
+        for (host, port), sockets in [*_warm.items()]:
+            if host == target:
+                continue
+            for sock in sockets:
+                sock.close()
+            del _warm[host, port]
+        _clients.clear()
+
+
+class Prewarmer:
+    """Opens the connections to a target just before its attack,
+    the sploit gets them with connection and http_client.
+    The connections reach the sploit when it runs in a thread or in a forked process"""
+
+    def __init__(
+        self,
+        ports: Sequence[int],
+        /,
+        *,
+        lead: float = DEFAULT_PREWARM_LEAD,
+        timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ):
+        """- ports: The ports to connect to
+        - lead: Seconds before the attack when the connections are opened
+        - timeout: Maximum seconds to wait for a connection"""
+        self.ports = [*ports]
+        """The ports to connect to"""
+        self.lead = lead
+        """Seconds before the attack when the connections are opened"""
+        self.__timeout = timeout
+
+    async def prewarm(self, target: str, /, *, delay: float = 0) -> None:
+        """Resolve a target and open a connection to every port
+
+        - target: The host of the target
+        - delay: Seconds to wait before connecting"""
+        if delay > 0:
+            await sleep(delay)
+        loop = get_running_loop()
+        try:
+            family, _, _, _, address = (
+                await wait_for(
+                    loop.getaddrinfo(target, None, type=SOCK_STREAM), self.__timeout
+                )
+            )[0]
+        except (OSError, TimeoutError):
+            LOGGER.info(f"Cannot resolve {target}", exc_info=True)
+            return
+        with _lock:
+            _addresses[target] = address[0]
+        for port in self.ports:
+            sock = socket(family, SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await wait_for(
+                    loop.sock_connect(sock, (address[0], port)), self.__timeout
+                )
+            except (OSError, TimeoutError):
+                LOGGER.info(f"Cannot pre-connect to {target}:{port}", exc_info=True)
+                sock.close()
+                continue
+            with _lock:
+                _warm.setdefault((target, port), []).append(sock)
+
+    def release(self, target: str, /) -> None:
+        """Close the connections to a target not taken by its attack,
+        in a forked process they are still open
+
+        - target: The host of the target"""
+        with _lock:
+            for port in self.ports:
+                for sock in _warm.pop((target, port), []):
+                    sock.close()
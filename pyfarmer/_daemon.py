@@ -0,0 +1,449 @@
+from __future__ import annotations
+from argparse import ArgumentParser
+from asyncio import Task, run
+from collections.abc import AsyncGenerator, AsyncIterable, Mapping, Sequence
+from functools import partial
+from os import stat
+from os.path import basename, splitext
+from logging import basicConfig, INFO, getLogger
+
+from anyio import create_memory_object_stream
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from aiotools import TaskGroup
+from httpx import AsyncClient
+
+from pyfarmer._budget import ConcurrencyBudget
+from pyfarmer._encoding import FlagEncoder, JsonEncoder, CompactEncoder
+from pyfarmer._endpoints import FarmEndpoints
+from pyfarmer._flags import FlagFilter
+from pyfarmer._pyfarmer import (
+    DEFAULT_GRACE,
+    DEFAULT_REFRESH_INTERVAL,
+    FLAG_BUFFER_SIZE,
+    MAX_GRACE_FRACTION,
+    Encoding,
+    Loop,
+    Mode,
+    RealSploitFunction,
+    Schedule,
+    Scheduler,
+    WorkerSettings,
+    compute_timing,
+    fetch_config,
+    main_loop,
+    refresh_config,
+    tag_batches,
+    upload_thread,
+    use_event_loop,
+)
+from pyfarmer._reload import ReloadableSploit, load_sploit
+from pyfarmer._reporter import Reporter, DEFAULT_REPORT_INTERVAL
+from pyfarmer._retry import RetryPolicy
+from pyfarmer._scheduling import BanditPolicy, RandomPolicy, SchedulingPolicy
+from pyfarmer._state import DEFAULT_STATE_DIR, sploit_state_dir
+from pyfarmer._strategies import FarmingStrategy, ProcessStrategy, ThreadStrategy
+from pyfarmer._submitters import Submitter, FarmSubmitter
+from pyfarmer._utils import iterate_queue
+
+LOGGER = getLogger("pyfarmer.daemon")
+
+DEFAULT_BUDGET = 32
+DEFAULT_FUNCTION = "main"
+
+
+def load_sploits(specs: Sequence[str], /) -> dict[str, ReloadableSploit]:
+    """Load the sploits from their files
+
+    - specs: The sploits in the [ALIAS=]PATH[:FUNCTION] format,
+             by default the alias is the name of the file and the function is main
+
+    - returns: The sploits by alias"""
+    sploits: dict[str, ReloadableSploit] = {}
+    for spec in specs:
+        alias, _, location = spec.rpartition("=")
+        path, _, name = location.partition(":")
+        if not alias:
+            alias = splitext(basename(path))[0]
+        if alias in sploits:
+            raise ValueError(f"Two sploits have the alias {alias}")
+        function = load_sploit(path, name or DEFAULT_FUNCTION, stat(path).st_mtime_ns)
+        sploits[alias] = ReloadableSploit(function)
+    return sploits
+
+
+async def merge_batches(
+    batches: AsyncIterable[list[list[tuple[str, str, str]]]], /
+) -> AsyncGenerator[list[tuple[str, str, str]], None]:
+    async for group in batches:
+        yield [flag for batch in group for flag in batch]
+
+
+async def forward_batches(
+    batches: AsyncIterable[list[tuple[str, str, str]]],
+    queue: MemoryObjectSendStream[list[tuple[str, str, str]]],
+    /,
+) -> None:
+    with queue:
+        async for batch in batches:
+            await queue.send(batch)
+
+
+def daemon() -> None:
+    """Run several sploits in the same farmer, started with python -m pyfarmer"""
+    parser = ArgumentParser(
+        prog="python -m pyfarmer",
+        description="Run several sploits on all teams in a loop, "
+        "sharing the attack slots and the submission of the flags",
+    )
+    parser.add_argument(
+        "sploits",
+        metavar="SPLOIT",
+        nargs="+",
+        help="A sploit in the [ALIAS=]PATH[:FUNCTION] format, by default the alias "
+        f"is the name of the file and the function is {DEFAULT_FUNCTION}",
+    )
+    parser.add_argument(
+        "-u",
+        "--server-url",
+        metavar="URL",
+        action="append",
+        required=True,
+        help="Destructive Farm Server URL, "
+        "repeat it to balance the submissions across several farms",
+    )
+    parser.add_argument("--token", metavar="TOKEN", help="Farm authorization token")
+    parser.add_argument(
+        "--budget",
+        metavar="N",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help="Maximal number of concurrent attacks of all the sploits, "
+        "shared fairly between them",
+    )
+    parser.add_argument(
+        "--threads",
+        default=False,
+        action="store_true",
+        help="Run the attacks in threads instead of processes",
+    )
+    parser.add_argument(
+        "--attack-period",
+        metavar="N",
+        type=float,
+        help="Rerun every sploit on all teams each N seconds",
+    )
+    parser.add_argument("--timeout", type=float, help="Manually set the sploit timeout")
+    parser.add_argument(
+        "--grace",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_GRACE,
+        help="Raise DeadlineExceeded in the sploits SECONDS seconds before the timeout",
+    )
+    parser.add_argument(
+        "--refresh",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL,
+        help="Fetch the config of the farm every SECONDS seconds, 0 to never fetch it again",
+    )
+    parser.add_argument(
+        "--retries",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Run a sploit again up to N times after a network error",
+    )
+    parser.add_argument(
+        "--state-dir",
+        metavar="DIR",
+        default=DEFAULT_STATE_DIR,
+        help="Directory where the sploits keep what they remember about every target, "
+        "an empty string to forget it after every attack",
+    )
+    parser.add_argument(
+        "--mode",
+        "-m",
+        choices=[m.value for m in Mode],
+        default=Mode.ALL.value,
+        help="Skip some phases in the scheduler algorithm",
+    )
+    parser.add_argument(
+        "--cycles", type=int, help="Limit the number of cycles of the slow mode"
+    )
+    parser.add_argument(
+        "--scheduler",
+        choices=[s.value for s in Scheduler],
+        default=Scheduler.RANDOM.value,
+        help="How to choose and order the targets of each cycle of every sploit",
+    )
+    parser.add_argument(
+        "--flag-format",
+        metavar="REGEX",
+        help="Drop the yielded values not matching REGEX, "
+        "by default the FLAG_FORMAT of the farm is used",
+    )
+    parser.add_argument(
+        "--extract-flags",
+        default=False,
+        action="store_true",
+        help="Submit every flag found inside the yielded values",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=[e.value for e in Encoding],
+        default=Encoding.JSON.value,
+        help="Format of the flags sent to the farm",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=[loop.value for loop in Loop],
+        default=Loop.ASYNCIO.value,
+        help="Event loop implementation to use",
+    )
+    parser.add_argument(
+        "--report-interval",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_REPORT_INTERVAL,
+        help="Print a summary of the attacks every SECONDS seconds",
+    )
+    parser.add_argument(
+        "--watch",
+        default=False,
+        action="store_true",
+        help="Reload a sploit when its file changes",
+    )
+    parser.add_argument(
+        "--debug",
+        "-d",
+        default=False,
+        action="store_true",
+        help="Add more verbose logs",
+    )
+    args = parser.parse_args()
+    basicConfig(level=INFO if args.debug else None)
+    try:
+        sploits = load_sploits(args.sploits)
+    except Exception as e:
+        parser.error(f"cannot load the sploits: {e}")
+    try:
+        use_event_loop(Loop(args.loop))
+    except ImportError:
+        parser.error("uvloop is not installed, install it with pip install uvloop")
+    encoder = (
+        CompactEncoder if Encoding(args.encoding) == Encoding.COMPACT else JsonEncoder
+    )
+    try:
+        run(
+            async_daemon(
+                sploits,
+                ThreadStrategy() if args.threads else ProcessStrategy(),
+                server_url=args.server_url,
+                token=args.token,
+                budget=args.budget,
+                attack_period=args.attack_period,
+                timeout=args.timeout,
+                mode=Mode(args.mode),
+                cycles=args.cycles,
+                report_interval=args.report_interval,
+                scheduler=Scheduler(args.scheduler),
+                flag_format=args.flag_format,
+                extract_flags=args.extract_flags,
+                encoder=encoder(),
+                grace=args.grace,
+                retry=RetryPolicy(args.retries) if args.retries > 0 else None,
+                watch=args.watch,
+                refresh=args.refresh if args.refresh > 0 else None,
+                state_dir=args.state_dir or None,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+async def async_daemon(
+    sploits: Mapping[str, RealSploitFunction],
+    strategy: FarmingStrategy,
+    /,
+    *,
+    server_url: str | Sequence[str],
+    token: str | None = None,
+    budget: int = DEFAULT_BUDGET,
+    attack_period: float | None = None,
+    timeout: float | None = None,
+    mode: Mode = Mode.ALL,
+    cycles: int | None = None,
+    report_interval: float = DEFAULT_REPORT_INTERVAL,
+    scheduler: Scheduler = Scheduler.RANDOM,
+    flag_format: str | None = None,
+    extract_flags: bool = False,
+    encoder: FlagEncoder | None = None,
+    submitter: Submitter | None = None,
+    grace: float = DEFAULT_GRACE,
+    retry: RetryPolicy | None = None,
+    state_dir: str | None = DEFAULT_STATE_DIR,
+    watch: bool = False,
+    refresh: float | None = DEFAULT_REFRESH_INTERVAL,
+    reporter: Reporter | None = None,
+) -> None:
+    """Run several sploits in the same farmer: they share the config of the farm,
+    a budget of concurrent attacks divided fairly between them
+    and a single submission of the flags
+
+    - sploits: The functions containing the sploits by alias
+    - strategy: The farming strategy to use for all the sploits
+    - server_url: The destructive farm to use, or a list of farms to balance the submissions across
+    - token: The api token to use when connecting to the destructive farm, None to not use any token
+    - budget: The maximum number of attacks running at the same time across all the sploits
+    - attack_period: How often to rerun a sploit against the same ip, None to use the default
+    - timeout: The sploit timeout, None to use the default
+    - mode: Which steps to perform
+    - cycles: Number of cycles of slow mode before exiting, None for infinity
+    - report_interval: Seconds between two summaries of the attacks
+    - scheduler: How every sploit chooses the targets of each cycle
+    - flag_format: Regex of the valid flags, None to use the one of the farm
+    - extract_flags: Submit every flag found inside the yielded values
+    - encoder: How to serialize the flags sent to the farm, None to use the Destructive Farm format
+    - submitter: Where to submit the flags, None to send them to the farm
+    - grace: Seconds before the timeout when the sploits are asked to stop
+    - retry: When to run again a sploit after an error, None to never retry
+    - state_dir: Directory where pyfarmer.state keeps what every sploit remembers
+                 about the targets, None to forget it after every attack
+    - watch: Reload the sploits when their files change, they must be ReloadableSploit
+    - refresh: Seconds between two fetches of the config of the farm, None to never fetch it again
+    - reporter: Where to report the attacks, None to print them every report_interval seconds
+    """
+    assert sploits, "There must be at least a sploit"
+    if encoder is None:
+        encoder = JsonEncoder()
+    if isinstance(server_url, str):
+        server_url = [server_url]
+    farms = FarmEndpoints(
+        [url if "http" in url else f"http://{url}" for url in server_url]
+    )
+    async with AsyncClient() as client:
+        config = await fetch_config(client, farms, token=token)
+        targets = [*config["TEAMS"].values()]
+        # The timing of a sploit running in its fair share of the budget
+        share = max(budget // len(sploits), 1)
+        requested_period, requested_timeout = attack_period, timeout
+        attack_period, timeout = compute_timing(
+            len(targets),
+            share,
+            flag_lifetime=config["FLAG_LIFETIME"],
+            attack_period=attack_period,
+            timeout=timeout,
+        )
+        if flag_format is None:
+            flag_format = config.get("FLAG_FORMAT")
+        settings = WorkerSettings(
+            flag_filter=(
+                FlagFilter(flag_format, extract=extract_flags)
+                if flag_format is not None
+                else None
+            ),
+            grace=min(grace, timeout * MAX_GRACE_FRACTION),
+            retry=retry,
+        )
+        if submitter is None:
+            submitter = FarmSubmitter(client, farms, token=token, encoder=encoder)
+        pool = ConcurrencyBudget(budget)
+        # Shared by the sploits, they attack the same targets with the same timing
+        schedule = Schedule(targets, attack_period=attack_period, timeout=timeout)
+        print("Config:")
+        print("\t#targets:", len(targets))
+        print("\tsploits:", ", ".join(sploits))
+        print("\tbudget:", budget)
+        print("\tflag_lifetime:", attack_period)
+        print("\tsploit_timeout:", timeout)
+        print("\tgrace:", settings.grace)
+        print("\tfarms:", ", ".join(farm.url for farm in farms.endpoints))
+        print("\tflag_format:", flag_format)
+        print("\tsubmitter:", type(submitter).__name__)
+        if state_dir is not None:
+            print("\tstate:", state_dir)
+        send_stream: MemoryObjectSendStream[list[tuple[str, str, str]]]
+        receive_stream: MemoryObjectReceiveStream[list[tuple[str, str, str]]]
+        send_stream, receive_stream = create_memory_object_stream(FLAG_BUFFER_SIZE)
+        if reporter is None:
+            reporter = Reporter(interval=report_interval)
+        try:
+            async with reporter, TaskGroup() as group:
+                group.create_task(
+                    upload_thread(
+                        submitter,
+                        merge_batches(iterate_queue(receive_stream)),
+                        reporter,
+                    )
+                )
+                attacks: list[Task[None]] = []
+                with send_stream:
+                    for alias, function in sploits.items():
+                        flags: MemoryObjectSendStream[tuple[str, str]]
+                        found: MemoryObjectReceiveStream[tuple[str, str]]
+                        flags, found = create_memory_object_stream(FLAG_BUFFER_SIZE)
+                        group.create_task(
+                            forward_batches(
+                                tag_batches(iterate_queue(found), alias),
+                                send_stream.clone(),
+                            )
+                        )
+                        policy: SchedulingPolicy = (
+                            BanditPolicy()
+                            if scheduler == Scheduler.BANDIT
+                            else RandomPolicy()
+                        )
+                        task = group.create_task(
+                            main_loop(
+                                function,
+                                flags,
+                                schedule.targets,
+                                pool_size=budget,
+                                attack_period=attack_period,
+                                timeout=timeout,
+                                strategy=strategy,
+                                mode=mode,
+                                cycles=cycles,
+                                reporter=reporter,
+                                policy=policy,
+                                settings=(
+                                    settings
+                                    if state_dir is None
+                                    else settings._replace(
+                                        state_dir=sploit_state_dir(state_dir, alias)
+                                    )
+                                ),
+                                pool=pool.share(alias),
+                                schedule=schedule,
+                            )
+                        )
+                        attacks.append(task)
+                        if watch and isinstance(function, ReloadableSploit):
+                            watcher = group.create_task(function.watch(reporter))
+                            task.add_done_callback(
+                                lambda _, watcher=watcher: watcher.cancel()
+                            )
+                if refresh is not None:
+                    refresher = group.create_task(
+                        refresh_config(
+                            partial(fetch_config, client, farms, token=token),
+                            partial(
+                                schedule.apply_config,
+                                pool_size=share,
+                                attack_period=requested_period,
+                                timeout=requested_timeout,
+                            ),
+                            reporter,
+                            interval=refresh,
+                        )
+                    )
+
+                    def stop_refresher(_: Task[None]) -> None:
+                        if all(task.done() for task in attacks):
+                            refresher.cancel()
+
+                    for task in attacks:
+                        task.add_done_callback(stop_refresher)
+        finally:
+            await submitter.aclose()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from threading import local
+from time import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised inside a sploit when its time is over,
+    it can catch it to yield the flags it has found during a short grace period.
+    It is not an OSError, so the http and socket libraries don't turn it
+    into their own timeout errors"""
+
+
+class _Deadline(local):
+    value: float | None = None
+
+
+_deadline = _Deadline()
+
+
+def set_deadline(value: float | None, /) -> None:
+    """Set the deadline of the attack running in the current thread
+
+    - value: The time.time() of the deadline, None for no deadline"""
+    _deadline.value = value
+
+
+def deadline() -> float | None:
+    """Get when the running attack will be asked to stop,
+    with DeadlineExceeded or SIGTERM
+
+    - returns: The time.time() of the deadline, None outside of an attack"""
+    return _deadline.value
+
+
+def remaining() -> float | None:
+    """Get how much time the running attack has left, use it to size the timeouts
+
+    - returns: The seconds before the deadline, 0 if it is passed,
+               None outside of an attack"""
+    if _deadline.value is None:
+        return None
+    return max(_deadline.value - time(), 0)
@@ -0,0 +1,458 @@
+from __future__ import annotations
+from asyncio import (
+    AbstractServer,
+    IncompleteReadError,
+    StreamReader,
+    StreamWriter,
+    TimeoutError,
+    open_connection,
+    sleep,
+    start_server,
+    wait_for,
+)
+from collections.abc import Sequence
+from hashlib import blake2b
+from hmac import compare_digest
+from json import dumps, loads
+from math import log
+from os import getpid
+from socket import gethostname
+from typing import Any
+from logging import getLogger
+
+from anyio import create_memory_object_stream
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from aiotools import TaskGroup
+
+from pyfarmer._flags import FlagFilter
+from pyfarmer._pyfarmer import (
+    DEFAULT_GRACE,
+    DEFAULT_POOL_SIZE,
+    FLAG_BUFFER_SIZE,
+    MAX_GRACE_FRACTION,
+    Config,
+    Mode,
+    RealSploitFunction,
+    Schedule,
+    WorkerSettings,
+    compute_timing,
+    main_loop,
+    update_targets,
+)
+from pyfarmer._ratelimit import RateLimiter
+from pyfarmer._reporter import Reporter, DEFAULT_REPORT_INTERVAL
+from pyfarmer._retry import RetryPolicy
+from pyfarmer._scheduling import SchedulingPolicy, RandomPolicy
+from pyfarmer._strategies import FarmingStrategy
+from pyfarmer._utils import iterate_queue
+
+LOGGER = getLogger("pyfarmer.distributed")
+
+# Flags remembered by the coordinator to drop the ones sent twice
+MAX_SEEN_FLAGS = 100_000
+# Longest line of the protocol, a batch of flags of a worker
+MAX_LINE_SIZE = 16 * 1024 * 1024
+# Largest pool size of a worker, so that a single one can't take all the targets
+MAX_CAPACITY = 1024
+# Seconds between two messages of a worker that has no flags to send
+HEARTBEAT_INTERVAL = 5.0
+# Seconds without messages after which a worker is considered dead,
+# a host losing its power or its network never closes the connection
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL
+HELLO = "hello"
+ASSIGN = "assign"
+FLAGS = "flags"
+HEARTBEAT = "heartbeat"
+
+
+def parse_address(address: str, /) -> tuple[str, int]:
+    """Split an address in the HOST:PORT format
+
+    - address: The address
+
+    - returns: The host and the port"""
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address {address!r}, expected HOST:PORT")
+    return host.strip("[]"), int(port)
+
+
+def send_message(writer: StreamWriter, message: dict[str, Any], /) -> None:
+    writer.write(dumps(message).encode() + b"\n")
+
+
+async def receive_message(reader: StreamReader, /) -> dict[str, Any] | None:
+    line = await reader.readline()
+    if not line:
+        return None
+    return loads(line)
+
+
+def rendezvous_score(node: str, capacity: int, target: str, /) -> float:
+    """Weight of a node for a target, every target goes to the node with the highest.
+    Adding or removing a node only moves the targets it gains or loses
+
+    - node: The name of the node
+    - capacity: The pool size of the node
+    - target: The target
+
+    - returns: The score"""
+    digest = blake2b(f"{node}/{target}".encode(), digest_size=8).digest()
+    uniform = (int.from_bytes(digest, "big") + 1) / (2**64 + 1)
+    return -capacity / log(uniform)
+
+
+def shard(targets: Sequence[str], nodes: dict[str, int], /) -> dict[str, list[str]]:
+    """Split the targets across the nodes proportionally to their capacity
+
+    - targets: The targets
+    - nodes: The pool size of every node by name
+
+    - returns: The targets of every node by name"""
+    shards: dict[str, list[str]] = {name: [] for name in nodes}
+    if not nodes:
+        return shards
+    for target in targets:
+        owner = max(nodes, key=lambda name: rendezvous_score(name, nodes[name], target))
+        shards[owner].append(target)
+    return shards
+
+
+class Node:
+    """A worker connected to the coordinator"""
+
+    def __init__(self, name: str, capacity: int, writer: StreamWriter, /):
+        self.name = name
+        """The unique name of the worker"""
+        self.capacity = capacity
+        """The pool size of the worker"""
+        self.writer = writer
+        self.targets: list[str] = []
+        """The targets assigned to the worker"""
+        self.assignment: dict[str, Any] | None = None
+        """The last assignment sent to the worker, None before the first one"""
+
+
+class Coordinator:
+    """Shards the targets across the worker nodes connected to it,
+    rebalancing them when a node joins or dies, and collects their flags
+    to submit each one once"""
+
+    def __init__(
+        self,
+        targets: Sequence[str],
+        queue: MemoryObjectSendStream[tuple[str, str]],
+        /,
+        *,
+        secret: str,
+        flag_lifetime: float,
+        attack_period: float | None = None,
+        timeout: float | None = None,
+        flag_format: str | None = None,
+        extract_flags: bool = False,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        reporter: Reporter,
+    ):
+        """- targets: The targets to attack
+        - queue: Where to send the flags to submit
+        - secret: The secret shared with the workers, the others are rejected
+        - flag_lifetime: Seconds a flag is valid
+        - attack_period: How often to attack every target, None to compute it for every node
+        - timeout: The sploit timeout, None to compute it for every node
+        - flag_format: Regex of the valid flags, sent to the workers and checked
+                       on the flags they send, None to accept everything
+        - extract_flags: Let the workers submit every flag found inside the yielded values
+        - heartbeat_timeout: Seconds without messages after which a worker is dropped
+        - reporter: Where to count the flags"""
+        self.targets = [*targets]
+        """The targets to attack"""
+        self.nodes: dict[str, Node] = {}
+        """The connected workers by name"""
+        self.__queue = queue
+        self.__secret = secret.encode()
+        self.__flag_lifetime = flag_lifetime
+        self.__attack_period = attack_period
+        self.__timeout = timeout
+        self.__flag_format = flag_format
+        self.__extract_flags = extract_flags
+        self.__heartbeat_timeout = heartbeat_timeout
+        # The workers send the flags already extracted, each one must be a whole flag
+        self.__flag_filter = (
+            FlagFilter(flag_format) if flag_format is not None else None
+        )
+        self.__reporter = reporter
+        self.__seen: dict[str, None] = {}
+
+    async def serve(self, host: str, port: int, /) -> AbstractServer:
+        """Start accepting the workers
+
+        - host: The address to listen on
+        - port: The port to listen on, 0 to choose a free one
+
+        - returns: The started server"""
+        return await start_server(self.handle, host, port, limit=MAX_LINE_SIZE)
+
+    async def run(self, address: str, /) -> None:
+        """Accept the workers until cancelled, then close the queue of the flags
+
+        - address: The address to listen on in the HOST:PORT format"""
+        with self.__queue:
+            server = await self.serve(*parse_address(address))
+            self.__reporter.print(f"Waiting for the workers on {address}")
+            async with server:
+                await server.serve_forever()
+
+    def rebalance(self) -> None:
+        """Shard again the targets across the nodes, sending the new assignment
+        to the nodes whose targets or timing have changed"""
+        shards = shard(
+            self.targets,
+            {name: node.capacity for name, node in self.nodes.items()},
+        )
+        for name, targets in shards.items():
+            node = self.nodes[name]
+            attack_period, timeout = compute_timing(
+                len(targets),
+                node.capacity,
+                flag_lifetime=self.__flag_lifetime,
+                attack_period=self.__attack_period,
+                timeout=self.__timeout,
+            )
+            assignment = {
+                "type": ASSIGN,
+                "targets": targets,
+                "attack_period": attack_period,
+                "timeout": timeout,
+                "flag_format": self.__flag_format,
+                "extract_flags": self.__extract_flags,
+            }
+            if assignment == node.assignment:
+                continue
+            node.targets = targets
+            node.assignment = assignment
+            send_message(node.writer, assignment)
+
+    def apply_config(self, config: Config, /) -> list[str]:
+        """Update the targets and the flag lifetime to a new config of the farm,
+        sending the new assignments to the workers
+
+        - config: The new config
+
+        - returns: A description of every change"""
+        changes: list[str] = []
+        added, removed = update_targets(self.targets, [*config["TEAMS"].values()])
+        if added:
+            changes.append(f"Added {len(added)} targets: {', '.join(added)}")
+        if removed:
+            changes.append(f"Removed {len(removed)} targets: {', '.join(removed)}")
+        if config["FLAG_LIFETIME"] != self.__flag_lifetime:
+            self.__flag_lifetime = config["FLAG_LIFETIME"]
+            changes.append(f"Flag lifetime {self.__flag_lifetime}s")
+        if changes:
+            self.rebalance()
+        return changes
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter, /) -> None:
+        """Serve a worker until it disconnects
+
+        - reader: The stream from the worker
+        - writer: The stream to the worker"""
+        node: Node | None = None
+        try:
+            hello = await wait_for(receive_message(reader), self.__heartbeat_timeout)
+            if hello is None or hello.get("type") != HELLO:
+                return
+            # As bytes, the strings can only be compared when they are ascii
+            secret = str(hello.get("secret", "")).encode()
+            if not compare_digest(secret, self.__secret):
+                LOGGER.warning(
+                    f"Rejected a worker from {writer.get_extra_info('peername')} "
+                    "with a wrong secret"
+                )
+                return
+            name = str(hello["name"])
+            while name in self.nodes:
+                name += "'"
+            capacity = min(max(int(hello["capacity"]), 1), MAX_CAPACITY)
+            node = Node(name, capacity, writer)
+            self.nodes[name] = node
+            self.__reporter.print(f"Worker {name} joined")
+            self.rebalance()
+            while (
+                message := await wait_for(
+                    receive_message(reader), self.__heartbeat_timeout
+                )
+            ) is not None:
+                if message.get("type") == FLAGS:
+                    await self.__collect(message["flags"])
+        except TimeoutError:
+            # Before the OSError, the builtin TimeoutError is one since 3.11
+            LOGGER.warning(
+                f"Dropping the worker from {writer.get_extra_info('peername')}, "
+                f"silent for {self.__heartbeat_timeout}s"
+            )
+        except (OSError, IncompleteReadError, ValueError, KeyError):
+            LOGGER.warning("Error communicating with a worker", exc_info=True)
+        finally:
+            if node is not None:
+                del self.nodes[node.name]
+                self.__reporter.print(f"Worker {node.name} left")
+                self.rebalance()
+            writer.close()
+
+    async def __collect(self, flags: list[list[str]], /) -> None:
+        duplicates = 0
+        rejected = 0
+        for target, flag in flags:
+            if (
+                not isinstance(flag, str)
+                or target not in self.targets
+                or (self.__flag_filter is not None and not self.__flag_filter(flag))
+            ):
+                rejected += 1
+                continue
+            if flag in self.__seen:
+                duplicates += 1
+                continue
+            self.__seen[flag] = None
+            if len(self.__seen) > MAX_SEEN_FLAGS:
+                del self.__seen[next(iter(self.__seen))]
+            self.__reporter.count("flags")
+            await self.__queue.send((target, flag))
+        if duplicates:
+            self.__reporter.count("duplicates", duplicates)
+        if rejected:
+            LOGGER.warning(f"Dropped {rejected} invalid flags sent by a worker")
+            self.__reporter.count("rejected", rejected)
+
+
+async def async_work(
+    function: RealSploitFunction,
+    strategy: FarmingStrategy,
+    /,
+    *,
+    coordinator: str,
+    secret: str,
+    name: str | None = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    mode: Mode = Mode.ALL,
+    cycles: int | None = None,
+    report_interval: float = DEFAULT_REPORT_INTERVAL,
+    policy: SchedulingPolicy | None = None,
+    limiter: RateLimiter | None = None,
+    grace: float = DEFAULT_GRACE,
+    retry: RetryPolicy | None = None,
+    state_dir: str | None = None,
+    heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    reporter: Reporter | None = None,
+) -> None:
+    """Run as a worker node of a coordinator, attacking the targets it assigns
+    and sending it the flags. It stops when the coordinator disconnects
+
+    - function: The function containing the sploit to run
+    - strategy: The farming strategy to use
+    - coordinator: The address of the coordinator in the HOST:PORT format
+    - secret: The secret shared with the coordinator
+    - name: The name of the worker, None to use the hostname and the pid
+    - pool_size: The maximum number of parallel sploit to run
+    - mode: Which steps to perform
+    - cycles: Number of cycles of slow mode before exiting, None for infinity
+    - report_interval: Seconds between two summaries of the attacks
+    - policy: How to choose the targets of each cycle, None to attack all of them in a random order
+    - limiter: How to pace the launch of the attacks, None to not limit them
+    - grace: Seconds before the timeout when the sploit is asked to stop
+    - retry: When to run again the sploit after an error, None to never retry
+    - state_dir: Directory of the states of the targets of the sploit,
+                 None to forget them after every attack
+    - heartbeat_interval: Seconds between two messages sent to the coordinator
+                          to show that the worker is alive, even without flags
+    - reporter: Where to report the attacks, None to print them every report_interval seconds
+    """
+    host, port = parse_address(coordinator)
+    reader, writer = await open_connection(host, port, limit=MAX_LINE_SIZE)
+    try:
+        send_message(
+            writer,
+            {
+                "type": HELLO,
+                "name": name if name is not None else f"{gethostname()}-{getpid()}",
+                "capacity": pool_size,
+                "secret": secret,
+            },
+        )
+        assignment = await receive_message(reader)
+        if assignment is None:
+            raise ConnectionResetError(
+                "The coordinator closed the connection, check the secret"
+            )
+        # Updated with the new assignments, every cycle uses the latest
+        schedule = Schedule(
+            assignment["targets"],
+            attack_period=assignment["attack_period"],
+            timeout=assignment["timeout"],
+        )
+        flag_format: str | None = assignment["flag_format"]
+        settings = WorkerSettings(
+            flag_filter=(
+                FlagFilter(flag_format, extract=assignment["extract_flags"])
+                if flag_format is not None
+                else None
+            ),
+            grace=min(grace, schedule.timeout * MAX_GRACE_FRACTION),
+            retry=retry,
+            state_dir=state_dir,
+        )
+        send_stream: MemoryObjectSendStream[tuple[str, str]]
+        receive_stream: MemoryObjectReceiveStream[tuple[str, str]]
+        send_stream, receive_stream = create_memory_object_stream(FLAG_BUFFER_SIZE)
+
+        async def forward():
+            async for flags in iterate_queue(receive_stream):
+                send_message(writer, {"type": FLAGS, "flags": flags})
+                await writer.drain()
+
+        async def heartbeat():
+            while True:
+                await sleep(heartbeat_interval)
+                # Not drained, forward() may be draining at the same time
+                send_message(writer, {"type": HEARTBEAT})
+
+        async def listen():
+            while (message := await receive_message(reader)) is not None:
+                if message.get("type") == ASSIGN:
+                    schedule.targets[:] = message["targets"]
+                    schedule.attack_period = message["attack_period"]
+                    schedule.timeout = message["timeout"]
+                    reporter.print(f"Assigned {len(schedule.targets)} targets")
+            reporter.print("The coordinator closed the connection")
+            attacks.cancel()
+
+        if reporter is None:
+            reporter = Reporter(interval=report_interval)
+        reporter.print(f"Assigned {len(schedule.targets)} targets")
+        async with reporter, TaskGroup() as group:
+            group.create_task(forward())
+            attacks = group.create_task(
+                main_loop(
+                    function,
+                    send_stream,
+                    schedule.targets,
+                    pool_size=pool_size,
+                    attack_period=schedule.attack_period,
+                    timeout=schedule.timeout,
+                    strategy=strategy,
+                    mode=mode,
+                    cycles=cycles,
+                    reporter=reporter,
+                    policy=policy if policy is not None else RandomPolicy(),
+                    settings=settings,
+                    limiter=limiter,
+                    schedule=schedule,
+                )
+            )
+            listener = group.create_task(listen())
+            heartbeater = group.create_task(heartbeat())
+            attacks.add_done_callback(lambda _: listener.cancel())
+            attacks.add_done_callback(lambda _: heartbeater.cancel())
+    finally:
+        writer.close()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from collections.abc import Sequence
+from gzip import compress
+from json import dumps
+from typing import Protocol
+
+try:
+    from orjson import dumps as orjson_dumps
+except ImportError:
+    orjson_dumps = None
+
+GZIP_LEVEL = 1
+
+
+class FlagEncoder(Protocol):
+    """Serializes the flags sent to the farm"""
+
+    def encode(
+        self, flags: Sequence[tuple[str, str]], /, *, alias: str
+    ) -> tuple[bytes, dict[str, str]]:
+        """Build the body of a post_flags request
+
+        - flags: The (team, flag) pairs to send
+        - alias: The sploit alias
+
+        - returns: The body and its headers"""
+        ...
+
+
+def json_dumps(data: object, /) -> bytes:
+    """Serialize an object to compact json, using orjson if it is installed
+
+    - data: The object to serialize
+
+    - returns: The utf-8 encoded json"""
+    if orjson_dumps is not None:
+        return orjson_dumps(data)
+    return dumps(data, separators=(",", ":")).encode()
+
+
+class JsonEncoder(FlagEncoder):
+    """The post_flags format of Destructive Farm,
+    a list of {"flag", "sploit", "team"} objects"""
+
+    def __init__(self, *, gzip: bool = False):
+        """- gzip: Compress the body, the farm must support the gzip Content-Encoding"""
+        self.__gzip = gzip
+
+    def _payload(self, flags: Sequence[tuple[str, str]], alias: str) -> object:
+        return [{"flag": flag, "sploit": alias, "team": team} for team, flag in flags]
+
+    def encode(
+        self, flags: Sequence[tuple[str, str]], /, *, alias: str
+    ) -> tuple[bytes, dict[str, str]]:
+        body = json_dumps(self._payload(flags, alias))
+        headers = {"Content-Type": "application/json"}
+        if self.__gzip:
+            body = compress(body, GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+
+class CompactEncoder(JsonEncoder):
+    """A {"sploit": alias, "flags": [[team, flag], ...]} object
+    that doesn't repeat the alias for every flag.
+    The farm must understand it, see FarmShim"""
+
+    def _payload(self, flags: Sequence[tuple[str, str]], alias: str) -> object:
+        return {"sploit": alias, "flags": flags}
@@ -0,0 +1,132 @@
+from __future__ import annotations
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import asynccontextmanager
+from time import monotonic
+from logging import getLogger
+
+from httpx import HTTPError
+
+LOGGER = getLogger("pyfarmer.endpoints")
+
+DEFAULT_MAX_FAILURES = 3
+DEFAULT_COOLDOWN = 30.0
+
+
+class FarmEndpoint:
+    """State of a single farm server"""
+
+    def __init__(self, url: str, /):
+        """- url: The url of the server"""
+        self.url = url
+        """The url of the server"""
+        self.outstanding = 0
+        """Number of requests waiting for a response"""
+        self.failures = 0
+        """Number of consecutive failed requests"""
+        self.unhealthy_until = 0.0
+        """Monotonic time until the server is not used if others are available"""
+
+    def is_healthy(self, now: float, /) -> bool:
+        """Check if the server can be used
+
+        - now: The current monotonic time
+
+        - returns: If the server is healthy"""
+        return now >= self.unhealthy_until
+
+    def __repr__(self) -> str:
+        return f"FarmEndpoint({self.url!r})"
+
+
+class FarmEndpoints:
+    """Balances the requests across several farm servers,
+    choosing the one with the least outstanding requests"""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        /,
+        *,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        cooldown: float = DEFAULT_COOLDOWN,
+    ):
+        """- urls: The urls of the servers
+        - max_failures: Consecutive failures after which a server is marked as unhealthy
+        - cooldown: Seconds before an unhealthy server is tried again"""
+        assert len(urls) > 0
+        self.endpoints = [FarmEndpoint(url) for url in urls]
+        """The state of the servers"""
+        self.__max_failures = max_failures
+        self.__cooldown = cooldown
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def ordered(self) -> list[FarmEndpoint]:
+        """Get the servers, the healthy ones first in the given order
+
+        - returns: The servers"""
+        now = monotonic()
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                not endpoint.is_healthy(now),
+                endpoint.unhealthy_until,
+            ),
+        )
+
+    def choose(self) -> FarmEndpoint:
+        """Choose the server for the next request
+
+        - returns: The healthy server with the least outstanding requests,
+                   if none is healthy the first one to recover"""
+        now = monotonic()
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.is_healthy(now)]
+        if not healthy:
+            return min(self.endpoints, key=lambda endpoint: endpoint.unhealthy_until)
+        return min(
+            healthy, key=lambda endpoint: (endpoint.outstanding, endpoint.failures)
+        )
+
+    def success(self, endpoint: FarmEndpoint, /) -> None:
+        """Record a successful request
+
+        - endpoint: The server that answered"""
+        if endpoint.failures >= self.__max_failures:
+            LOGGER.warning(f"Farm {endpoint.url} is healthy again")
+        endpoint.failures = 0
+        endpoint.unhealthy_until = 0.0
+
+    def failure(self, endpoint: FarmEndpoint, /) -> None:
+        """Record a failed request
+
+        - endpoint: The server that failed"""
+        endpoint.failures += 1
+        if endpoint.failures >= self.__max_failures:
+            LOGGER.warning(
+                f"Farm {endpoint.url} failed {endpoint.failures} times in a row, "
+                f"marking it as unhealthy for {self.__cooldown} seconds"
+            )
+            endpoint.unhealthy_until = monotonic() + self.__cooldown
+
+    @asynccontextmanager
+    async def request(
+        self, endpoint: FarmEndpoint | None = None, /
+    ) -> AsyncGenerator[str, None]:
+        """Track a request to a server, an HTTPError raised inside marks a failure
+
+        - endpoint: The server to use, None to choose one
+
+        - returns: An async context manager of the url of the server"""
+        if endpoint is None:
+            endpoint = self.choose()
+        endpoint.outstanding += 1
+        try:
+            yield endpoint.url
+        except HTTPError:
+            self.failure(endpoint)
+            raise
+        else:
+            self.success(endpoint)
+        finally:
+            endpoint.outstanding -= 1
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from collections.abc import Iterable
+from re import compile, Pattern
+
+
+class FlagFilter:
+    """Validates the values yielded by a sploit against the flag format of the farm"""
+
+    def __init__(self, flag_format: str | Pattern[str], /, *, extract: bool = False):
+        """- flag_format: The regex matching a single flag
+        - extract: Search all the flags inside the value instead of requiring
+                   the whole value to be a flag"""
+        self.pattern = compile(flag_format)
+        """The compiled flag format"""
+        self.extract = extract
+        """If all the flags are searched inside the values"""
+
+    def __call__(self, value: str, /) -> list[str]:
+        """Get the valid flags contained in a value
+
+        - value: A string yielded by a sploit
+
+        - returns: The valid flags, empty if the value must be dropped"""
+        if self.extract:
+            return [match.group() for match in self.pattern.finditer(value)]
+        value = value.strip()
+        if self.pattern.fullmatch(value) is None:
+            return []
+        return [value]
+
+    def filter_batch(
+        self, values: Iterable[tuple[str, str]], /
+    ) -> tuple[list[tuple[str, str]], int]:
+        """Get the valid flags contained in a batch of values, without duplicates
+
+        - values: The targets and the values yielded by their sploits
+
+        - returns: The targets with their flags in order of arrival,
+                   and the number of dropped values"""
+        flags: dict[tuple[str, str], None] = {}
+        rejected = 0
+        for target, value in values:
+            found = self(value)
+            if not found:
+                rejected += 1
+            for flag in found:
+                flags[target, flag] = None
+        return [*flags], rejected
+
+    def __repr__(self) -> str:
+        return f"FlagFilter({self.pattern.pattern!r}, extract={self.extract})"
@@ -0,0 +1,376 @@
+from __future__ import annotations
+from asyncio import get_running_loop
+from collections.abc import Callable, AsyncGenerator, AsyncIterable, Awaitable
+from contextlib import AbstractContextManager
+from itertools import count
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from pickle import dumps, loads
+from threading import Event, Lock, Thread, Timer
+from typing import Any, Literal, Union
+from logging import getLogger
+from pyfarmer._strategies import (
+    FarmingStrategy,
+    WriteCommunication,
+    InterruptibleThread,
+    ThreadChannel,
+    Message,
+    Status,
+    stoppable_process,
+)
+
+LOGGER = getLogger("pyfarmer.hybrid")
+
+DEFAULT_PROCESSES = 4
+DEFAULT_THREADS = 8
+# Seconds a thread has to die after SystemExit before its whole process is killed
+KILL_TIMEOUT = 1.0
+RUN = "run"
+TERMINATE = "terminate"
+KILL = "kill"
+
+# A message of an attack, or its exit code when it is completed
+Result = Union[Message, int]
+
+# The pipe to the farmer of the worker process
+_results: Connection | None = None
+_results_lock = Lock()
+
+
+class WorkerWriter(WriteCommunication):
+    """Sends the messages of an attack from a worker process to the farmer"""
+
+    def __init__(self, attack: int, /):
+        """- attack: The id of the attack"""
+        self.__attack = attack
+
+    def send(self, data: Message, /) -> None:
+        send_result(self.__attack, data)
+
+
+def send_result(attack: int, result: Result, /) -> None:
+    assert _results is not None
+    with _results_lock:
+        _results.send((attack, result))
+
+
+class HybridWriter(WriteCommunication):
+    """Write part of the channel of an attack, sent to a worker process
+    it becomes a WorkerWriter. Closing it sends the end of the messages"""
+
+    def __init__(self, channels: dict[int, ThreadChannel], attack: int, /):
+        """- channels: The channels of the attacks by id, shared by the workers
+        - attack: The id of the attack"""
+        self.attack = attack
+        """The id of the attack"""
+        self.__channels = channels
+        self.__channel = ThreadChannel(get_running_loop())
+        channels[attack] = self.__channel
+
+    def receive(self) -> AsyncGenerator[Message, None]:
+        """Receive the messages of the attack until the channel is closed
+
+        - returns: An async generator of the messages"""
+        return self.__channel.receive()
+
+    def send(self, data: Message, /) -> None:
+        self.__channel.send(data)
+
+    def __enter__(self) -> HybridWriter:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.__channels.pop(self.attack, None)
+        self.__channel.send(None)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return WorkerWriter, (self.attack,)
+
+
+class HybridWorker:
+    """A worker process running the attacks in its threads"""
+
+    def __init__(self, context: Any, channels: dict[int, ThreadChannel]):
+        """- context: The multiprocessing context to start the process with
+        - channels: The channels of the attacks by id, shared by the workers"""
+        self.attacks: dict[int, HybridAttack] = {}
+        """The attacks running in the process by id"""
+        self.__channels = channels
+        self.__lock = Lock()
+        commands, self.__commands = context.Pipe(False)
+        results, worker_results = context.Pipe(False)
+        self.process = context.Process(
+            target=worker_main, args=(commands, worker_results), daemon=True
+        )
+        """The worker process"""
+        self.process.start()
+        commands.close()
+        worker_results.close()
+        self.__reader = Thread(target=self.__read, args=(results,), daemon=True)
+        self.__reader.start()
+
+    def __read(self, results: Connection, /) -> None:
+        with results:
+            try:
+                while True:
+                    attack, result = results.recv()
+                    if isinstance(result, int):
+                        with self.__lock:
+                            running = self.attacks.pop(attack, None)
+                        if running is not None:
+                            running.finish(result)
+                        continue
+                    channel = self.__channels.get(attack)
+                    if channel is not None:
+                        channel.send(result)
+            except (EOFError, OSError):
+                pass
+        self.process.join()
+        with self.__lock:
+            attacks, self.attacks = self.attacks, {}
+        for running in attacks.values():
+            running.finish(self.process.exitcode or 1)
+
+    @property
+    def alive(self) -> bool:
+        """If the process can run new attacks"""
+        return self.__reader.is_alive()
+
+    def send(self, *command: object) -> bool:
+        """Send a command to the process
+
+        - command: The command and its arguments
+
+        - returns: If the command has been sent"""
+        with self.__lock:
+            try:
+                self.__commands.send(command)
+                return True
+            except OSError:
+                return False
+
+    def run(self, attack: HybridAttack, payload: bytes, /) -> None:
+        """Start an attack in a new thread of the process
+
+        - attack: The attack
+        - payload: The pickled function and arguments"""
+        with self.__lock:
+            self.attacks[attack.id] = attack
+        if not self.send(RUN, attack.id, payload):
+            with self.__lock:
+                self.attacks.pop(attack.id, None)
+            attack.finish(1)
+
+    def kill(self) -> None:
+        """Kill the process and all its attacks"""
+        self.process.kill()
+
+    def close(self) -> None:
+        """Stop the process when its running attacks are completed"""
+        with self.__lock:
+            self.__commands.close()
+
+
+class HybridAttack:
+    """An attack run by a thread of a worker process, with the interface of a Process"""
+
+    def __init__(
+        self,
+        strategy: HybridStrategy,
+        attack: int,
+        function: Callable[..., None],
+        args: tuple[object, ...],
+        /,
+    ):
+        """- strategy: The strategy owning the workers
+        - attack: The id of the attack
+        - function: The function to run, it must be importable
+        - args: The arguments of the function, they must be picklable"""
+        self.id = attack
+        """The id of the attack"""
+        self.exitcode: int | None = None
+        self.__strategy = strategy
+        self.__function = function
+        self.__args = args
+        self.__worker: HybridWorker | None = None
+        self.__done = Event()
+
+    def start(self) -> None:
+        try:
+            payload = dumps((self.__function, self.__args))
+        except Exception:
+            LOGGER.error(
+                "Cannot send the sploit to a worker process, "
+                "it must be a function defined at module level",
+                exc_info=True,
+            )
+            self.finish(1)
+            return
+        self.__worker = self.__strategy.assign(self)
+        self.__worker.run(self, payload)
+
+    def finish(self, exitcode: int, /) -> None:
+        """Called when the attack is completed
+
+        - exitcode: The exit code of the attack"""
+        self.exitcode = exitcode
+        self.__done.set()
+
+    def join(self, timeout: float, /) -> None:
+        self.__done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return self.__worker is not None and not self.__done.is_set()
+
+    def terminate(self) -> None:
+        if self.is_alive():
+            assert self.__worker is not None
+            self.__worker.send(TERMINATE, self.id)
+
+    def kill(self) -> None:
+        if not self.is_alive():
+            return
+        assert self.__worker is not None
+        self.__worker.send(KILL, self.id)
+        timer = Timer(KILL_TIMEOUT, self.__kill_worker)
+        timer.daemon = True
+        timer.start()
+
+    def __kill_worker(self) -> None:
+        if not self.is_alive():
+            return
+        assert self.__worker is not None
+        LOGGER.warning(
+            f"An attack cannot be stopped, killing its worker process "
+            f"with {len(self.__worker.attacks)} attacks"
+        )
+        self.__worker.kill()
+
+
+class HybridStrategy(FarmingStrategy):
+    """Strategy to use a few worker processes, each one running several attacks
+    in its threads. The attacks of a process share its memory like with threads,
+    but a crash or an attack that cannot be stopped only kills that process.
+    The sploit must be a function defined at module level.
+    Use a pool size of processes * threads"""
+
+    def __init__(
+        self,
+        *,
+        processes: int = DEFAULT_PROCESSES,
+        threads: int = DEFAULT_THREADS,
+        start_method: Literal["spawn", "fork", "forkserver"] = "spawn",
+    ):
+        """- processes: Maximum number of worker processes
+        - threads: Number of attacks run by a worker process before starting another one
+        - start_method: The Process start method to use, the workers live long
+                        so by default they are spawned instead of inheriting
+                        the sockets of the farmer"""
+        assert processes > 0 and threads > 0
+        self.processes = processes
+        """Maximum number of worker processes"""
+        self.threads = threads
+        """Number of attacks run by a worker process before starting another one"""
+        self.__context = get_context(start_method)
+        self.__workers: list[HybridWorker] = []
+        self.__channels: dict[int, ThreadChannel] = {}
+        self.__ids = count()
+        self.__lock = Lock()
+
+    def create_communication(
+        self,
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
+        writer = HybridWriter(self.__channels, next(self.__ids))
+        return writer.receive(), writer
+
+    def create_process(
+        self, function: Callable[..., None], args: tuple[object, ...], /
+    ) -> AbstractContextManager[Callable[[float, float], Awaitable[Status]]]:
+        writers = [arg for arg in args if isinstance(arg, HybridWriter)]
+        assert len(writers) == 1, "The attack must receive its HybridWriter"
+        return stoppable_process(HybridAttack(self, writers[0].attack, function, args))
+
+    def assign(self, attack: HybridAttack, /) -> HybridWorker:
+        """Choose the worker process of an attack, starting a new one
+        when every process is full
+
+        - attack: The attack
+
+        - returns: The worker process"""
+        with self.__lock:
+            self.__workers = [worker for worker in self.__workers if worker.alive]
+            free = [
+                worker
+                for worker in self.__workers
+                if len(worker.attacks) < self.threads
+            ]
+            if free:
+                return min(free, key=lambda worker: len(worker.attacks))
+            if len(self.__workers) < self.processes:
+                worker = HybridWorker(self.__context, self.__channels)
+                self.__workers.append(worker)
+                return worker
+            return min(self.__workers, key=lambda worker: len(worker.attacks))
+
+    def close(self) -> None:
+        """Stop the worker processes, killing them if their attacks
+        don't complete within a second"""
+        with self.__lock:
+            workers, self.__workers = self.__workers, []
+        for worker in workers:
+            worker.close()
+        for worker in workers:
+            worker.process.join(KILL_TIMEOUT)
+            if worker.process.is_alive():
+                worker.kill()
+                worker.process.join()
+
+
+def worker_main(commands: Connection, results: Connection, /) -> None:
+    """Run the attacks sent by the farmer, each one in its own thread
+
+    - commands: The pipe receiving the commands of the farmer
+    - results: The pipe sending the messages and the exit codes of the attacks"""
+    global _results
+    _results = results
+    threads: dict[int, InterruptibleThread] = {}
+    with commands:
+        while True:
+            try:
+                command, attack, *args = commands.recv()
+            except EOFError:
+                break
+            for finished in [
+                i for i, thread in threads.items() if not thread.is_alive()
+            ]:
+                del threads[finished]
+            if command == RUN:
+                thread = InterruptibleThread(
+                    target=run_attack, args=(attack, *args), daemon=True
+                )
+                threads[attack] = thread
+                thread.start()
+                continue
+            thread = threads.get(attack)
+            if thread is None:
+                continue
+            if command == TERMINATE:
+                thread.terminate()
+            elif command == KILL:
+                thread.kill()
+    for thread in threads.values():
+        thread.join()
+
+
+def run_attack(attack: int, payload: bytes, /) -> None:
+    exitcode = 0
+    try:
+        function, args = loads(payload)
+        function(*args)
+    except SystemExit as e:
+        exitcode = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        LOGGER.error("Attack terminated with an error", exc_info=True)
+        exitcode = 1
+    finally:
+        send_result(attack, exitcode)
@@ -1,21 +1,39 @@
 from __future__ import annotations
 
 from argparse import ArgumentParser
-from asyncio import run, sleep, Task, Semaphore, CancelledError
+from asyncio import (
+    run,
+    Task,
+    Semaphore,
+    CancelledError,
+    DefaultEventLoopPolicy,
+    set_event_loop_policy,
+    wait,
+)
 from collections import Counter
-from collections.abc import Callable, Generator, AsyncIterable
+from collections.abc import (
+    Callable,
+    Generator,
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Sequence,
+)
 from os.path import basename
-from random import shuffle
+from re import error as re_error
+from signal import signal, SIGTERM
+from threading import current_thread, main_thread
+from types import FrameType
 from sys import argv
-from time import time
-from typing import TypedDict, cast
+from time import time, perf_counter, sleep as blocking_sleep
+from typing import Any, TypedDict, NamedTuple, cast
 from urllib.parse import urljoin
-from contextlib import AbstractContextManager
-from functools import partial
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
 from math import ceil
+from functools import partial
 
 from httpx import AsyncClient, HTTPError
-from typing_extensions import TypeAlias
+from typing_extensions import TypeAlias, NotRequired
 from anyio import create_memory_object_stream
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 from logging import basicConfig, INFO, getLogger
@@ -25,8 +43,42 @@ from pyfarmer._strategies import (
     ProcessStrategy,
     WriteCommunication,
     Status,
+    Message,
+)
+from pyfarmer._flags import FlagFilter
+from pyfarmer._clock import Clock, SYSTEM_CLOCK
+from pyfarmer._tick import Tick, DEFAULT_TICK_OFFSET
+from pyfarmer._deadline import DeadlineExceeded, set_deadline, remaining
+from pyfarmer._state import (
+    DEFAULT_STATE_DIR,
+    set_state,
+    close_state,
+    state_path,
+    sploit_state_dir,
 )
-from pyfarmer._utils import iterate_queue
+from pyfarmer._retry import RetryPolicy, DEFAULT_BACKOFF
+from pyfarmer._bench import BenchReport, parse_targets
+from pyfarmer._connections import Prewarmer, adopt_connections
+from pyfarmer._reload import ReloadableSploit
+from pyfarmer._ratelimit import RateLimiter, DEFAULT_BURST, DEFAULT_SUBNET_PREFIX
+from pyfarmer._endpoints import FarmEndpoints
+from pyfarmer._encoding import FlagEncoder, JsonEncoder, CompactEncoder
+from pyfarmer._submitters import (
+    Submitter,
+    FarmSubmitter,
+    TcpSubmitter,
+    FileSubmitter,
+    DEFAULT_ACCEPTED,
+)
+from pyfarmer._reporter import Reporter, DEFAULT_REPORT_INTERVAL
+from pyfarmer._scheduling import (
+    SchedulingPolicy,
+    RandomPolicy,
+    BanditPolicy,
+    ExpiryPolicy,
+    DEFAULT_EXPLORATION,
+)
+from pyfarmer._utils import iterate_queue, run_in_background
 from enum import Enum
 from aiotools import TaskGroup
 
@@ -38,6 +90,126 @@ SploitFunction: TypeAlias = "Callable[[str], Generator[str, None, None]]"
 class Config(TypedDict):
     TEAMS: dict[str, str]
     FLAG_LIFETIME: int
+    FLAG_FORMAT: NotRequired[str]
+    TICK_LENGTH: NotRequired[float]
+    TICK_START: NotRequired[float]
+
+
+class WorkerSettings(NamedTuple):
+    """Options sent to every sploit process"""
+
+    flag_filter: FlagFilter | None = None
+    """Filter applied to the yielded values before sending them, None to send everything"""
+    grace: float = 0.0
+    """Seconds the sploit has to stop after being asked, before being killed"""
+    deadline: float | None = None
+    """The time.time() when the sploit is asked to stop, None for no deadline"""
+    retry: RetryPolicy | None = None
+    """When to run again the sploit after an error, None to never retry"""
+    state_dir: str | None = None
+    """Directory of the states of the targets, None to keep them only during an attack"""
+
+
+class Schedule:
+    """Targets and timing of the attacks that can change while the farmer runs,
+    the slow mode uses the changes from its next cycle"""
+
+    def __init__(self, targets: list[str], /, *, attack_period: float, timeout: float):
+        """- targets: The targets to attack, changed in place
+        - attack_period: How often to attack every target
+        - timeout: The sploit timeout"""
+        self.targets = targets
+        """The targets to attack, changed in place"""
+        self.attack_period = attack_period
+        """How often to attack every target"""
+        self.timeout = timeout
+        """The sploit timeout"""
+
+    def apply_config(
+        self,
+        config: Config,
+        /,
+        *,
+        pool_size: int,
+        attack_period: float | None = None,
+        timeout: float | None = None,
+    ) -> list[str]:
+        """Update the targets and the timing to a new config of the farm,
+        the targets still in the config keep their order and the new ones are appended
+
+        - config: The new config
+        - pool_size: The number of parallel attacks
+        - attack_period: The attack period to use, None to compute it
+        - timeout: The sploit timeout to use, None to compute it
+
+        - returns: A description of every change"""
+        changes: list[str] = []
+        added, removed = update_targets(self.targets, [*config["TEAMS"].values()])
+        if added:
+            changes.append(f"Added {len(added)} targets: {', '.join(added)}")
+        if removed:
+            changes.append(f"Removed {len(removed)} targets: {', '.join(removed)}")
+        timing = compute_timing(
+            len(self.targets),
+            pool_size,
+            flag_lifetime=config["FLAG_LIFETIME"],
+            attack_period=attack_period,
+            timeout=timeout,
+        )
+        if timing != (self.attack_period, self.timeout):
+            self.attack_period, self.timeout = timing
+            changes.append(
+                f"Attack period {self.attack_period:.1f}s, timeout {self.timeout:.1f}s"
+            )
+        return changes
+
+
+class Scheduler(Enum):
+    """Policies to use to choose the targets of each cycle"""
+
+    RANDOM = "random"
+    """Attack every target each cycle in a random order"""
+    BANDIT = "bandit"
+    """Attack more often the targets that give more flags"""
+
+
+class Encoding(Enum):
+    """Formats to use to send the flags to the farm"""
+
+    JSON = "json"
+    """The standard format of Destructive Farm"""
+    COMPACT = "compact"
+    """A smaller format that doesn't repeat the alias, the farm must use the FarmShim"""
+
+
+class Extraction(Enum):
+    """Where to match the yielded values against the flag format"""
+
+    WORKER = "worker"
+    """In every sploit process, before sending the flags to the farmer"""
+    FARMER = "farmer"
+    """In the farmer, on the batches of values waiting to be uploaded,
+    dropping the duplicates of each batch"""
+
+
+class Submission(Enum):
+    """Where to submit the flags"""
+
+    FARM = "farm"
+    """To the Destructive Farm, that submits them to the checksystem"""
+    TCP = "tcp"
+    """Directly to the checksystem with the line based TCP protocol"""
+    FILE = "file"
+    """Append them to a local file, a JSON object per line"""
+
+
+class Loop(Enum):
+    """Event loop implementations"""
+
+    ASYNCIO = "asyncio"
+    """The default event loop of asyncio"""
+    UVLOOP = "uvloop"
+    """The libuv based event loop of uvloop, it must be installed"""
 
 
 class Mode(Enum):
@@ -52,8 +224,14 @@ class Mode(Enum):
 
 
 DEFAULT_POOL_SIZE = 8
+DEFAULT_BENCH_TIMEOUT = 30.0
+DEFAULT_GRACE = 1.0
+DEFAULT_REFRESH_INTERVAL = 60.0
+MAX_GRACE_FRACTION = 0.2
 DEFAULT_VERBOSE_ATTACKS = 1
 FLAG_BUFFER_SIZE = 1024
+# Smaller batches are filtered on the event loop, larger ones in a thread
+INLINE_EXTRACTION_SIZE = 64 * 1024
 MAX_FLAGS_PER_PROCESS = 250
 LOGGER = getLogger("pyfarmer")
 
@@ -74,9 +252,39 @@ def farm(function: SploitFunction, /, *, strategy: FarmingStrategy = ProcessStra
         "ip", metavar="IP", nargs="?", help="IP address to test the sploit on"
     )
     group.add_argument(
-        "-u", "--server-url", metavar="URL", help="Destructive Farm Server URL"
+        "-u",
+        "--server-url",
+        metavar="URL",
+        action="append",
+        help="Destructive Farm Server URL, "
+        "repeat it to balance the submissions across several farms",
+    )
+    group.add_argument(
+        "--bench",
+        metavar="TARGETS",
+        help="Benchmark the sploit against local targets without submitting the flags, "
+        "a comma separated list where every number of an address can be a range, "
+        "for example 10.60.1-3.1",
+    )
+    group.add_argument(
+        "--coordinator",
+        metavar="HOST:PORT",
+        help="Run as a worker node of the coordinator at HOST:PORT, "
+        "attacking the targets it assigns",
     )
     parser.add_argument("-a", "--alias", metavar="ALIAS", help="Sploit alias")
+    parser.add_argument(
+        "--listen",
+        metavar="HOST:PORT",
+        help="Run as the coordinator of several worker nodes, sharding the targets "
+        "across them and submitting their flags, without attacking",
+    )
+    parser.add_argument(
+        "--secret",
+        metavar="SECRET",
+        help="Secret shared by the coordinator and its worker nodes, "
+        "required by --listen and --coordinator",
+    )
     parser.add_argument("--token", metavar="TOKEN", help="Farm authorization token")
     parser.add_argument(
         "--pool-size",
@@ -113,25 +321,288 @@ def farm(function: SploitFunction, /, *, strategy: FarmingStrategy = ProcessStra
         "--cycles", type=int, help="Limit the number of cycles of the slow mode"
     )
     parser.add_argument("--timeout", type=float, help="Manually set the sploit timeout")
+    parser.add_argument(
+        "--grace",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_GRACE,
+        help="Raise DeadlineExceeded in the sploit SECONDS seconds before the timeout, "
+        "so that it can yield the flags it has found before being killed. "
+        f"At most {MAX_GRACE_FRACTION:.0%} of the timeout, 0 to kill it right away",
+    )
+    parser.add_argument(
+        "--refresh",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL,
+        help="Fetch the config of the farm every SECONDS seconds, adding and removing "
+        "the targets and adapting the timing from the next cycle, 0 to never fetch it again",
+    )
+    parser.add_argument(
+        "--tick-length",
+        metavar="SECONDS",
+        type=float,
+        help="Length of a round of the game, every cycle of slow mode attacks "
+        "each target once right after the flags of a round are placed, "
+        "by default the TICK_LENGTH of the farm config if present",
+    )
+    parser.add_argument(
+        "--tick-start",
+        metavar="TIMESTAMP",
+        type=float,
+        help="Unix time of the start of any round, by default the TICK_START "
+        "of the farm config or the start of the farmer",
+    )
+    parser.add_argument(
+        "--tick-offset",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_TICK_OFFSET,
+        help="Seconds after the start of a round when its flags are surely placed",
+    )
+    parser.add_argument(
+        "--state-dir",
+        metavar="DIR",
+        default=DEFAULT_STATE_DIR,
+        help="Directory where the sploit keeps what it remembers about every target "
+        "with pyfarmer.state, across the attacks and the restarts, "
+        "an empty string to forget it after every attack",
+    )
+    parser.add_argument(
+        "--retries",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Run the sploit again up to N times after a network error, "
+        "if there is still time before its deadline",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_BACKOFF,
+        help="Wait about SECONDS seconds before the first retry, doubling at every retry",
+    )
+    parser.add_argument(
+        "--runs",
+        metavar="N",
+        type=int,
+        help="Number of runs of the benchmark, by default one for each target",
+    )
+    parser.add_argument(
+        "--report-interval",
+        metavar="SECONDS",
+        type=float,
+        default=DEFAULT_REPORT_INTERVAL,
+        help="Print a summary of the attacks every SECONDS seconds",
+    )
+    parser.add_argument(
+        "--scheduler",
+        choices=[s.value for s in Scheduler],
+        default=Scheduler.RANDOM.value,
+        help="How to choose and order the targets of each cycle",
+    )
+    parser.add_argument(
+        "--exploration",
+        metavar="P",
+        type=float,
+        default=DEFAULT_EXPLORATION,
+        help="Minimum probability of attacking a target giving no flags "
+        "in a cycle when using the bandit scheduler",
+    )
+    parser.add_argument(
+        "--flag-format",
+        metavar="REGEX",
+        help="Drop the yielded values not matching REGEX, "
+        "by default the FLAG_FORMAT of the farm is used",
+    )
+    parser.add_argument(
+        "--extract-flags",
+        default=False,
+        action="store_true",
+        help="Submit every flag found inside the yielded values "
+        "instead of requiring each value to be a flag",
+    )
+    parser.add_argument(
+        "--extraction",
+        choices=[e.value for e in Extraction],
+        default=Extraction.WORKER.value,
+        help="Where to match the yielded values against the flag format, "
+        "farmer lets the sploits send whole response bodies",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=[loop.value for loop in Loop],
+        default=Loop.ASYNCIO.value,
+        help="Event loop implementation to use",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=[e.value for e in Encoding],
+        default=Encoding.JSON.value,
+        help="Format of the flags sent to the farm",
+    )
+    parser.add_argument(
+        "--rate",
+        metavar="N",
+        type=float,
+        help="Launch at most N attacks per second",
+    )
+    parser.add_argument(
+        "--target-rate",
+        metavar="N",
+        type=float,
+        help="Launch at most N attacks per second against the same target",
+    )
+    parser.add_argument(
+        "--subnet-rate",
+        metavar="N",
+        type=float,
+        help="Launch at most N attacks per second against the same subnet",
+    )
+    parser.add_argument(
+        "--subnet-prefix",
+        metavar="BITS",
+        type=int,
+        default=DEFAULT_SUBNET_PREFIX,
+        help="Length of the network prefix of the subnets limited by --subnet-rate",
+    )
+    parser.add_argument(
+        "--burst",
+        metavar="N",
+        type=float,
+        default=DEFAULT_BURST,
+        help="Attacks that can be launched at once by the rate limits",
+    )
+    parser.add_argument(
+        "--prewarm",
+        metavar="PORT",
+        type=int,
+        action="append",
+        default=[],
+        help="Open a connection to PORT of every target just before its attack "
+        "in slow mode, the sploit gets it with pyfarmer.connection or pyfarmer.http_client. "
+        "Repeat it for several ports",
+    )
+    parser.add_argument(
+        "--watch",
+        default=False,
+        action="store_true",
+        help="Reload the sploit when its file changes without stopping the farmer, "
+        "the running attacks finish with the old code",
+    )
+    parser.add_argument(
+        "--submitter",
+        choices=[s.value for s in Submission],
+        default=Submission.FARM.value,
+        help="Where to submit the flags, the farm is still used for the config",
+    )
+    parser.add_argument(
+        "--submit-target",
+        metavar="TARGET",
+        help="HOST:PORT of the checksystem for the tcp submitter, "
+        "path of the file for the file submitter",
+    )
+    parser.add_argument(
+        "--team-token",
+        metavar="TOKEN",
+        help="Team token sent to the checksystem by the tcp submitter",
+    )
+    parser.add_argument(
+        "--accepted-regex",
+        metavar="REGEX",
+        default=DEFAULT_ACCEPTED,
+        help="Regex searched in the answers of the checksystem to the accepted flags "
+        "by the tcp submitter, the echoed flag is removed from the answers first",
+    )
+    parser.add_argument(
+        "--gzip",
+        default=False,
+        action="store_true",
+        help="Compress the flags sent to the farm, the farm must use the FarmShim",
+    )
     args = vars(parser.parse_args())
+    if args["listen"] is not None and args["server_url"] is None:
+        parser.error("--listen requires the farm --server-url")
+    if args["secret"] is None and (
+        args["listen"] is not None or args["coordinator"] is not None
+    ):
+        parser.error("--listen and --coordinator require a --secret")
     args["mode"] = Mode(args["mode"])
+    if args["refresh"] <= 0:
+        args["refresh"] = None
+    if not args["state_dir"]:
+        args["state_dir"] = None
+    args["extraction"] = Extraction(args["extraction"])
+    retries, backoff = args.pop("retries"), args.pop("retry_backoff")
+    if retries > 0:
+        args["retry"] = RetryPolicy(retries, backoff=backoff)
+    encoder = (
+        CompactEncoder
+        if Encoding(args.pop("encoding")) == Encoding.COMPACT
+        else JsonEncoder
+    )
+    args["encoder"] = encoder(gzip=args.pop("gzip"))
+    submission = Submission(args.pop("submitter"))
+    target, team_token = args.pop("submit_target"), args.pop("team_token")
+    accepted = args.pop("accepted_regex")
+    if submission != Submission.FARM and target is None:
+        parser.error(f"the {submission.value} submitter requires --submit-target")
+    if submission == Submission.TCP:
+        host, _, port = target.rpartition(":")
+        if not host or not port.isdigit():
+            parser.error("--submit-target must be HOST:PORT for the tcp submitter")
+        try:
+            args["submitter"] = TcpSubmitter(
+                host, int(port), token=team_token, accepted=accepted
+            )
+        except re_error as e:
+            parser.error(f"--accepted-regex is not a valid regex: {e}")
+    elif submission == Submission.FILE:
+        args["submitter"] = FileSubmitter(target)
+    rates = {
+        name: args.pop(name)
+        for name in ("rate", "target_rate", "subnet_rate", "subnet_prefix", "burst")
+    }
+    if any(rates[name] is not None for name in ("rate", "target_rate", "subnet_rate")):
+        args["limiter"] = RateLimiter(**rates)
+    if Scheduler(args.pop("scheduler")) == Scheduler.BANDIT:
+        args["policy"] = BanditPolicy(exploration=args["exploration"])
+    del args["exploration"]
     if args["debug"]:
         basicConfig(level=INFO)
     else:
         basicConfig()
     del args["debug"]
+    try:
+        use_event_loop(Loop(args.pop("loop")))
+    except ImportError:
+        parser.error("uvloop is not installed, install it with pip install uvloop")
     try:
         run(main(function, strategy, **args))
     except KeyboardInterrupt:
         pass
 
 
+def use_event_loop(loop: Loop, /) -> None:
+    """Choose the implementation of the event loops created from now on,
+    call it before asyncio.run to use uvloop together with async_farm
+
+    - loop: The event loop implementation"""
+    if loop == Loop.UVLOOP:
+        from uvloop import EventLoopPolicy
+
+        set_event_loop_policy(EventLoopPolicy())
+    else:
+        set_event_loop_policy(DefaultEventLoopPolicy())
+
+
 async def async_farm(
     function: SploitFunction,
     strategy: FarmingStrategy,
     /,
     *,
-    server_url: str,
+    server_url: str | Sequence[str],
     alias: str,
     token: str | None = None,
     pool_size: int = DEFAULT_POOL_SIZE,
@@ -139,19 +610,63 @@ async def async_farm(
     attack_period: float | None = None,
     mode: Mode = Mode.ALL,
     cycles: int | None = None,
+    report_interval: float = DEFAULT_REPORT_INTERVAL,
+    policy: SchedulingPolicy | None = None,
+    flag_format: str | None = None,
+    extract_flags: bool = False,
+    encoder: FlagEncoder | None = None,
+    prewarm: Sequence[int] = (),
+    limiter: RateLimiter | None = None,
+    grace: float = DEFAULT_GRACE,
+    watch: bool = False,
+    extraction: Extraction = Extraction.WORKER,
+    retry: RetryPolicy | None = None,
+    submitter: Submitter | None = None,
+    listen: str | None = None,
+    secret: str | None = None,
+    refresh: float | None = DEFAULT_REFRESH_INTERVAL,
+    tick_length: float | None = None,
+    tick_start: float | None = None,
+    tick_offset: float = DEFAULT_TICK_OFFSET,
+    state_dir: str | None = DEFAULT_STATE_DIR,
 ):
-    """Start the pyfarmer using an external event loop
+    """Start the pyfarmer using an external event loop,
+    see use_event_loop to run it on uvloop
 
     - function: The function containing the sploit to run
     - strategy: The farming strategy to use
-    - server_url: The destructive farm use to use
+    - server_url: The destructive farm to use, or a list of farms to balance the submissions across
     - alias: The sploit alias name
     - token: The api token to use when connecting to the destructive farm, None to not use any token
     - pool_size: The maximum number of parallel sploit to run
     - attack_period: How often to rerun an attack against the same ip, None to use the default
     - timeout: The sploit timeout, None to use the default
     - mode: Which steps to perform
-    - cycles: Number of cycles of slow mode before exiting, None for infinity"""
+    - cycles: Number of cycles of slow mode before exiting, None for infinity
+    - report_interval: Seconds between two summaries of the attacks
+    - policy: How to choose the targets of each cycle, None to attack all of them in a random order
+    - flag_format: Regex of the valid flags, None to use the one of the farm
+    - extract_flags: Submit every flag found inside the yielded values
+    - encoder: How to serialize the flags sent to the farm, None to use the Destructive Farm format
+    - prewarm: Ports of the targets to connect to just before each attack in slow mode
+    - limiter: How to pace the launch of the attacks, None to not limit them
+    - grace: Seconds before the timeout when the sploit is asked to stop
+    - watch: Reload the sploit when its file changes
+    - extraction: Where to match the yielded values against the flag format
+    - retry: When to run again the sploit after an error, None to never retry
+    - submitter: Where to submit the flags, None to send them to the farm
+    - listen: Run as the coordinator of the worker nodes connecting to this HOST:PORT address
+    - secret: The secret the worker nodes must send to the coordinator, required with listen
+    - refresh: Seconds between two fetches of the config of the farm to follow
+               the changes of the teams and of the flag lifetime, None to never fetch it again
+    - tick_length: Seconds of a round of the game, every cycle of slow mode is aligned
+                   to a round, None to use the TICK_LENGTH of the farm or to not align them
+    - tick_start: The time.time() of the start of a round,
+                  None to use the TICK_START of the farm or the start of the farmer
+    - tick_offset: Seconds after the start of a round when its flags are placed
+    - state_dir: Directory where pyfarmer.state keeps what the sploit remembers
+                 about every target, None to forget it after every attack
+    """
     await main(
         function,
         strategy,
@@ -164,6 +679,25 @@ async def async_farm(
         timeout=timeout,
         mode=mode,
         cycles=cycles,
+        report_interval=report_interval,
+        policy=policy,
+        flag_format=flag_format,
+        extract_flags=extract_flags,
+        encoder=encoder,
+        prewarm=prewarm,
+        limiter=limiter,
+        grace=grace,
+        watch=watch,
+        extraction=extraction,
+        retry=retry,
+        submitter=submitter,
+        listen=listen,
+        secret=secret,
+        refresh=refresh,
+        tick_length=tick_length,
+        tick_start=tick_start,
+        tick_offset=tick_offset,
+        state_dir=state_dir,
     )
 
 
@@ -173,7 +707,7 @@ async def main(
     /,
     *,
     ip: str | None,
-    server_url: str | None,
+    server_url: str | Sequence[str] | None,
     alias: str | None,
     token: str | None,
     pool_size: int,
@@ -181,60 +715,382 @@ async def main(
     timeout: float | None,
     mode: Mode,
     cycles: int | None = None,
+    report_interval: float = DEFAULT_REPORT_INTERVAL,
+    policy: SchedulingPolicy | None = None,
+    flag_format: str | None = None,
+    extract_flags: bool = False,
+    encoder: FlagEncoder | None = None,
+    bench: str | None = None,
+    runs: int | None = None,
+    prewarm: Sequence[int] = (),
+    limiter: RateLimiter | None = None,
+    grace: float = DEFAULT_GRACE,
+    watch: bool = False,
+    extraction: Extraction = Extraction.WORKER,
+    retry: RetryPolicy | None = None,
+    submitter: Submitter | None = None,
+    listen: str | None = None,
+    coordinator: str | None = None,
+    secret: str | None = None,
+    refresh: float | None = DEFAULT_REFRESH_INTERVAL,
+    tick_length: float | None = None,
+    tick_start: float | None = None,
+    tick_offset: float = DEFAULT_TICK_OFFSET,
+    state_dir: str | None = DEFAULT_STATE_DIR,
 ):
-    if server_url is not None:
-        if "http" not in server_url:
-            server_url = f"http://{server_url}"
+    if (coordinator is not None or listen is not None) and secret is None:
+        raise ValueError("The coordinator and its workers require a shared secret")
+    if coordinator is not None:
+        assert secret is not None
+        # Imported here since the distributed mode is built on this module
+        from pyfarmer._distributed import async_work
+
+        await async_work(
+            function,
+            strategy,
+            coordinator=coordinator,
+            secret=secret,
+            state_dir=(
+                None
+                if state_dir is None
+                else sploit_state_dir(
+                    state_dir, alias if alias is not None else basename(argv[0])
+                )
+            ),
+            pool_size=pool_size,
+            mode=mode,
+            cycles=cycles,
+            report_interval=report_interval,
+            policy=policy,
+            limiter=limiter,
+            grace=grace,
+            retry=retry,
+        )
+    elif server_url is not None:
+        sploit = ReloadableSploit(function) if watch else None
+        if policy is None:
+            policy = RandomPolicy()
+        if encoder is None:
+            encoder = JsonEncoder()
+        if isinstance(server_url, str):
+            server_url = [server_url]
+        farms = FarmEndpoints(
+            [url if "http" in url else f"http://{url}" for url in server_url]
+        )
         if alias is None:
             alias = basename(argv[0])
         send_stream: MemoryObjectSendStream[tuple[str, str]]
         receive_stream: MemoryObjectReceiveStream[tuple[str, str]]
         send_stream, receive_stream = create_memory_object_stream(FLAG_BUFFER_SIZE)
         async with AsyncClient() as client:
-            config = await get_config(client, server_url=server_url, token=token)
+            config = await fetch_config(client, farms, token=token)
             targets = [*config["TEAMS"].values()]
-            shuffle(targets)
-            slots = ceil(len(targets) / pool_size)
-            if attack_period is None:
-                attack_period = config["FLAG_LIFETIME"]
-                optimal_timeout = attack_period / (slots + 1)
-                attack_period -= optimal_timeout
-            if timeout is None:
-                timeout = attack_period / slots
+            if tick_length is None:
+                tick_length = config.get("TICK_LENGTH")
+            tick: Tick | None = None
+            if tick_length is not None:
+                if tick_start is None:
+                    tick_start = config.get("TICK_START")
+                if tick_start is None:
+                    LOGGER.warning(
+                        "The start of the rounds is unknown, "
+                        "aligning them to the start of the farmer"
+                    )
+                    tick_start = time()
+                tick = Tick(tick_length, tick_start, tick_offset)
+                policy = ExpiryPolicy(policy)
+                if attack_period is None:
+                    attack_period = tick_length - tick_offset
+            # Used again when the config changes, and by the coordinator for every worker
+            requested_period, requested_timeout = attack_period, timeout
+            attack_period, timeout = compute_timing(
+                len(targets),
+                pool_size,
+                flag_lifetime=config["FLAG_LIFETIME"],
+                attack_period=attack_period,
+                timeout=timeout,
+            )
+            if flag_format is None:
+                flag_format = config.get("FLAG_FORMAT")
+            flag_filter = (
+                FlagFilter(flag_format, extract=extract_flags)
+                if flag_format is not None
+                else None
+            )
+            settings = WorkerSettings(
+                flag_filter=flag_filter if extraction == Extraction.WORKER else None,
+                grace=min(grace, timeout * MAX_GRACE_FRACTION),
+                retry=retry,
+                state_dir=(
+                    None if state_dir is None else sploit_state_dir(state_dir, alias)
+                ),
+            )
             print("Config:")
             print("\t#targets:", len(targets))
             print("\tflag_lifetime:", attack_period)
             print("\tsploit_timeout:", timeout)
+            print("\tgrace:", settings.grace)
+            print("\tretries:", 0 if retry is None else retry.retries)
             print("\talias:", alias)
             print("\tpool_size:", pool_size)
+            print("\tfarms:", ", ".join(farm.url for farm in farms.endpoints))
+            print("\tflag_format:", flag_format)
+            print("\textraction:", extraction.value)
+            if submitter is None:
+                submitter = FarmSubmitter(client, farms, token=token, encoder=encoder)
+            print("\tsubmitter:", type(submitter).__name__)
+            if listen is not None:
+                print("\tlisten:", listen)
+            if refresh is not None:
+                print("\trefresh:", refresh)
+            if tick is not None:
+                print("\ttick:", f"{tick.length}s, offset {tick.offset}s")
+            if settings.state_dir is not None:
+                print("\tstate:", settings.state_dir)
+            if prewarm:
+                print("\tprewarm:", ", ".join(str(port) for port in prewarm))
+            if sploit is not None:
+                print("\twatch:", sploit.path)
             print("Starting first sprint")
-            async with TaskGroup() as group:
-                group.create_task(
-                    upload_thread(
-                        client,
-                        iterate_queue(receive_stream),
-                        server_url=server_url,
-                        alias=alias,
-                        token=token,
+            reporter = Reporter(interval=report_interval)
+            try:
+                async with reporter, TaskGroup() as group:
+                    batches: AsyncIterable[list[tuple[str, str]]] = iterate_queue(
+                        receive_stream
                     )
-                )
-                group.create_task(
-                    main_loop(
-                        function,
-                        send_stream,
-                        targets,
-                        pool_size=pool_size,
-                        attack_period=attack_period,
-                        timeout=timeout,
-                        strategy=strategy,
-                        mode=mode,
-                        cycles=cycles,
+                    if extraction == Extraction.FARMER and flag_filter is not None:
+                        batches = extraction_stage(batches, flag_filter, reporter)
+                    group.create_task(
+                        upload_thread(submitter, tag_batches(batches, alias), reporter)
                     )
-                )
+                    apply_config: Callable[[Config], list[str]]
+                    if listen is not None:
+                        from pyfarmer._distributed import Coordinator
+
+                        assert secret is not None
+                        coordinator = Coordinator(
+                            targets,
+                            send_stream,
+                            secret=secret,
+                            flag_lifetime=config["FLAG_LIFETIME"],
+                            attack_period=requested_period,
+                            timeout=requested_timeout,
+                            flag_format=(
+                                flag_format if extraction == Extraction.WORKER else None
+                            ),
+                            extract_flags=extract_flags,
+                            reporter=reporter,
+                        )
+                        attacks = group.create_task(coordinator.run(listen))
+                        apply_config = coordinator.apply_config
+                    else:
+                        schedule = Schedule(
+                            targets, attack_period=attack_period, timeout=timeout
+                        )
+                        attacks = group.create_task(
+                            main_loop(
+                                function if sploit is None else sploit,
+                                send_stream,
+                                schedule.targets,
+                                pool_size=pool_size,
+                                attack_period=attack_period,
+                                timeout=timeout,
+                                strategy=strategy,
+                                mode=mode,
+                                cycles=cycles,
+                                reporter=reporter,
+                                policy=policy,
+                                settings=settings,
+                                prewarmer=Prewarmer(prewarm) if prewarm else None,
+                                limiter=limiter,
+                                schedule=schedule,
+                                tick=tick,
+                            )
+                        )
+                        apply_config = partial(
+                            schedule.apply_config,
+                            pool_size=pool_size,
+                            attack_period=requested_period,
+                            timeout=requested_timeout,
+                        )
+                        if sploit is not None:
+                            watcher = group.create_task(sploit.watch(reporter))
+                            attacks.add_done_callback(lambda _: watcher.cancel())
+                    if refresh is not None:
+                        refresher = group.create_task(
+                            refresh_config(
+                                partial(fetch_config, client, farms, token=token),
+                                apply_config,
+                                reporter,
+                                interval=refresh,
+                            )
+                        )
+                        attacks.add_done_callback(lambda _: refresher.cancel())
+            finally:
+                await submitter.aclose()
+    elif bench is not None:
+        targets = parse_targets(bench)
+        if runs is None:
+            runs = len(targets)
+        if timeout is None:
+            timeout = DEFAULT_BENCH_TIMEOUT
+        settings = WorkerSettings(
+            flag_filter=(
+                FlagFilter(flag_format, extract=extract_flags)
+                if flag_format is not None
+                else None
+            ),
+            grace=min(grace, timeout * MAX_GRACE_FRACTION),
+            retry=retry,
+        )
+        print("Benchmark:")
+        print("\t#targets:", len(targets))
+        print("\truns:", runs)
+        print("\tsploit_timeout:", timeout)
+        print("\tgrace:", settings.grace)
+        print("\tpool_size:", pool_size)
+        reporter = Reporter(interval=report_interval)
+        async with reporter:
+            report = await run_bench(
+                function,
+                [targets[i % len(targets)] for i in range(runs)],
+                timeout=timeout,
+                pool_size=pool_size,
+                strategy=strategy,
+                reporter=reporter,
+                settings=settings,
+                limiter=limiter,
+            )
+            reporter.print("Benchmark completed")
+            for line in report.summary():
+                reporter.print(f"\t{line}")
     else:
         assert ip is not None
-        for flag in check_sploit(function(ip)):
-            print(flag)
+        flag_filter = (
+            FlagFilter(flag_format, extract=extract_flags)
+            if flag_format is not None
+            else None
+        )
+        set_state(None)
+        try:
+            for value in check_sploit(function(ip)):
+                for flag in [value] if flag_filter is None else flag_filter(value):
+                    print(flag)
+        finally:
+            close_state()
+
+
+def compute_timing(
+    targets: int,
+    pool_size: int,
+    /,
+    *,
+    flag_lifetime: float,
+    attack_period: float | None = None,
+    timeout: float | None = None,
+) -> tuple[float, float]:
+    """Choose how often to attack every target and the sploit timeout,
+    leaving the time of a timeout to submit the flags before they expire
+
+    - targets: The number of targets
+    - pool_size: The number of parallel attacks
+    - flag_lifetime: Seconds a flag is valid
+    - attack_period: The attack period to use, None to compute it
+    - timeout: The sploit timeout to use, None to compute it
+
+    - returns: The attack period and the sploit timeout"""
+    slots = max(ceil(targets / pool_size), 1)
+    if attack_period is None:
+        attack_period = flag_lifetime - flag_lifetime / (slots + 1)
+    if timeout is None:
+        timeout = attack_period / slots
+    return attack_period, timeout
+
+
+def update_targets(
+    targets: list[str], teams: Sequence[str], /
+) -> tuple[list[str], list[str]]:
+    """Change in place the targets to the given teams, keeping the order
+    of the targets that remain and appending the new ones
+
+    - targets: The current targets
+    - teams: The new targets
+
+    - returns: The added and the removed targets"""
+    current = set(targets)
+    remaining = set(teams)
+    added = [team for team in dict.fromkeys(teams) if team not in current]
+    removed = [target for target in targets if target not in remaining]
+    if added or removed:
+        targets[:] = [target for target in targets if target in remaining] + added
+    return added, removed
+
+
+async def refresh_config(
+    fetch: Callable[[], Awaitable[Config]],
+    apply: Callable[[Config], list[str]],
+    reporter: Reporter,
+    /,
+    *,
+    interval: float,
+    clock: Clock = SYSTEM_CLOCK,
+) -> None:
+    """Fetch the config of the farm periodically and apply it, it never returns
+
+    - fetch: Gets the config of the farm
+    - apply: Applies the config returning a description of the changes
+    - reporter: Where to print the changes
+    - interval: Seconds between two refreshes
+    - clock: The clock to wait with"""
+    while True:
+        await clock.sleep(interval)
+        try:
+            config = check_config(await fetch())
+        except (HTTPError, ValueError, KeyError):
+            # A farm restarting or misconfigured mid-game, the previous config is kept
+            LOGGER.warning("Cannot refresh the config of the farm", exc_info=True)
+            continue
+        for change in apply(config):
+            reporter.print(change)
+
+
+def check_config(config: Any, /) -> Config:
+    """Check that a config of the farm has the fields used while running,
+    before applying any of it
+
+    - config: The response of the farm
+
+    - returns: The config
+    - raises ValueError: If the config or one of its fields has the wrong type
+    - raises KeyError: If a required field is missing"""
+    if not isinstance(config, dict):
+        raise ValueError(f"The config of the farm is not an object: {config!r}")
+    teams, lifetime = config["TEAMS"], config["FLAG_LIFETIME"]
+    if not isinstance(teams, dict) or not all(
+        isinstance(ip, str) for ip in teams.values()
+    ):
+        raise ValueError(f"The TEAMS of the farm are not a mapping to ips: {teams!r}")
+    if isinstance(lifetime, bool) or not isinstance(lifetime, (int, float)):
+        raise ValueError(f"The FLAG_LIFETIME of the farm is not a number: {lifetime!r}")
+    return cast(Config, config)
+
+
+async def fetch_config(
+    client: AsyncClient, farms: FarmEndpoints, /, *, token: str | None
+) -> Config:
+    endpoints = farms.ordered()
+    for i, endpoint in enumerate(endpoints):
+        try:
+            async with farms.request(endpoint) as server_url:
+                return await get_config(client, server_url=server_url, token=token)
+        except HTTPError:
+            if i == len(endpoints) - 1:
+                raise
+            LOGGER.warning(
+                f"Cannot get the config from {endpoint.url}, trying the next farm",
+                exc_info=True,
+            )
+    assert False
 
 
 async def get_config(
@@ -252,48 +1108,73 @@ async def get_config(
     return response.json()
 
 
+async def extraction_stage(
+    batches: AsyncIterable[list[tuple[str, str]]],
+    flag_filter: FlagFilter,
+    reporter: Reporter,
+) -> AsyncGenerator[list[tuple[str, str]], None]:
+    async for batch in batches:
+        if sum(len(value) for _, value in batch) < INLINE_EXTRACTION_SIZE:
+            flags, rejected = flag_filter.filter_batch(batch)
+        else:
+            flags, rejected = await run_in_background(
+                flag_filter.filter_batch, (batch,)
+            )
+        if rejected:
+            LOGGER.info(f"Dropped {rejected} values not matching the flag format")
+            reporter.count("rejected", rejected)
+        if flags:
+            yield flags
+
+
+async def tag_batches(
+    batches: AsyncIterable[list[tuple[str, str]]], alias: str, /
+) -> AsyncGenerator[list[tuple[str, str, str]], None]:
+    async for batch in batches:
+        yield [(alias, target, flag) for target, flag in batch]
+
+
 async def upload_thread(
-    client: AsyncClient,
-    receive_stream: AsyncIterable[list[tuple[str, str]]],
+    submitter: Submitter,
+    receive_stream: AsyncIterable[list[tuple[str, str, str]]],
+    reporter: Reporter,
     /,
-    *,
-    server_url: str,
-    alias: str,
-    token: str | None,
 ):
-    to_submit: list[tuple[str, str]] = []
-    async for flags in receive_stream:
-        to_submit += flags
+    to_submit: list[tuple[str, str, str]] = []
+    semaphore = Semaphore(submitter.concurrency)
+
+    async def submit(alias: str, flags: list[tuple[str, str]]):
         try:
-            await post_flags(
-                client, to_submit, server_url=server_url, alias=alias, token=token
-            )
-            to_submit = []
-        except HTTPError:
+            results = await submitter.submit(flags, alias=alias)
+        except (HTTPError, OSError):
             LOGGER.error("Error submitting flags", exc_info=True)
+            to_submit.extend((alias, target, flag) for target, flag in flags)
+        else:
+            for verdict, value in results.items():
+                reporter.count(verdict, value)
+        finally:
+            semaphore.release()
 
+    def take_by_alias() -> dict[str, list[tuple[str, str]]]:
+        nonlocal to_submit
+        by_alias: dict[str, list[tuple[str, str]]] = {}
+        for alias, target, flag in to_submit:
+            by_alias.setdefault(alias, []).append((target, flag))
+        to_submit = []
+        return by_alias
 
-async def post_flags(
-    client: AsyncClient,
-    flags: list[tuple[str, str]],
-    /,
-    *,
-    server_url: str,
-    alias: str,
-    token: str | None,
-):
-    LOGGER.info(f"Submitting {len(flags)} flags")
-    data = [{"flag": flag, "sploit": alias, "team": team} for team, flag in flags]
-    response = await client.post(
-        urljoin(server_url, "/api/post_flags"),
-        json=data,
-        headers={"X-Token": token} if token is not None else None,
-    )
-    if response.status_code != 200:
-        LOGGER.error(
-            f"Farm post_flags responded with non 200 status code: {response.status_code} {response.text}"
-        )
-    response.raise_for_status()
+    async with TaskGroup() as group:
+        async for flags in receive_stream:
+            to_submit += flags
+            for alias, pairs in take_by_alias().items():
+                await semaphore.acquire()
+                group.create_task(submit(alias, pairs))
+    for _ in range(submitter.concurrency):
+        if not to_submit:
+            break
+        for alias, pairs in take_by_alias().items():
+            await semaphore.acquire()
+            await submit(alias, pairs)
 
 
 async def main_loop(
@@ -307,36 +1188,66 @@ async def main_loop(
     timeout: float,
     strategy: FarmingStrategy,
     mode: Mode,
+    reporter: Reporter,
+    policy: SchedulingPolicy,
+    settings: WorkerSettings,
     cycles: int | None = None,
+    prewarmer: Prewarmer | None = None,
+    limiter: RateLimiter | None = None,
+    clock: Clock = SYSTEM_CLOCK,
+    pool: AbstractAsyncContextManager[Any] | None = None,
+    schedule: Schedule | None = None,
+    tick: Tick | None = None,
 ):
     with queue:
         if mode != Mode.SLOW:
             await run_all(
                 function,
                 queue,
-                targets,
+                policy.plan(targets),
                 timeout=timeout,
                 pool_size=pool_size,
                 strategy=strategy,
+                reporter=reporter,
+                policy=policy,
+                settings=settings,
+                limiter=limiter,
+                pool=pool,
             )
         if mode == Mode.ALL:
-            print("Entering slow mode")
+            reporter.print("Entering slow mode")
         if mode != Mode.SPRINT:
-            LOGGER.info(f"Average sleep time: {attack_period / len(targets)}")
+            LOGGER.info(f"Average sleep time: {attack_period / max(len(targets), 1)}")
             counter = 0
-            start_time = time()
+            target_time = clock.time()
+            launch: float | None = None
             while True:
-                target_time = start_time + attack_period * (counter + 1)
                 if cycles is not None and counter >= cycles:
                     break
-                print("Starting cycle", counter + 1)
+                if schedule is not None:
+                    attack_period, timeout = schedule.attack_period, schedule.timeout
+                if tick is None:
+                    target_time += attack_period
+                else:
+                    # Every cycle is a round, launched after its flags are placed
+                    launch = tick.next_launch(clock.time(), timeout, previous=launch)
+                    await clock.sleep(max(launch - clock.time(), 0))
+                    target_time = tick.window(launch, timeout)
+                reporter.print("Starting cycle", counter + 1)
                 await slow_mode(
                     function,
                     queue,
-                    targets,
+                    policy.plan(targets),
                     timeout=timeout,
                     strategy=strategy,
                     target_time=target_time,
+                    reporter=reporter,
+                    policy=policy,
+                    settings=settings,
+                    prewarmer=prewarmer,
+                    limiter=limiter,
+                    clock=clock,
+                    pool=pool,
                 )
                 counter += 1
 
@@ -350,19 +1261,35 @@ async def slow_mode(
     timeout: float,
     strategy: FarmingStrategy,
     target_time: float,
+    reporter: Reporter,
+    policy: SchedulingPolicy,
+    settings: WorkerSettings,
+    prewarmer: Prewarmer | None = None,
+    limiter: RateLimiter | None = None,
+    clock: Clock = SYSTEM_CLOCK,
+    pool: AbstractAsyncContextManager[Any] | None = None,
 ) -> None:
-    LOGGER.info(f"Time allocated for slow mode cycle: {target_time-time()}")
+    LOGGER.info(f"Time allocated for slow mode cycle: {target_time-clock.time()}")
     counter: Counter[Status] = Counter()
+    if not targets:
+        # Nothing to attack, wait for the next cycle that may have targets
+        await clock.sleep(max(target_time - clock.time(), 0))
     async with TaskGroup() as group:
+        if prewarmer is not None and targets:
+            # In the background like the next ones, an unreachable target
+            # delays the cycle by the lead at most
+            await wait(
+                {group.create_task(prewarmer.prewarm(targets[0]))},
+                timeout=prewarmer.lead,
+            )
         for i, target in enumerate(targets):
-            print(f"Starting attack {i+1}/{len(targets)}")
+            if limiter is not None:
+                await limiter.acquire(target)
+            LOGGER.info(f"Starting attack {i+1}/{len(targets)}")
 
-            def callback(i: int, task: Task[tuple[Status, int]]):
+            def callback(task: Task[tuple[Status, int]]):
                 try:
-                    status, count = task.result()
-                    print(
-                        f"Attack {i+1}/{len(targets)} result: {status.name}, submitted {count} flags"
-                    )
+                    status, _ = task.result()
                     counter[status] += 1
                 except CancelledError:
                     pass
@@ -372,22 +1299,53 @@ async def slow_mode(
                     )
 
             task = group.create_task(
-                run_attack(function, queue, target, timeout=timeout, strategy=strategy)
+                report_attack(
+                    function,
+                    queue,
+                    target,
+                    timeout=timeout,
+                    strategy=strategy,
+                    reporter=reporter,
+                    policy=policy,
+                    settings=settings,
+                )
+                if pool is None
+                else schedule_attack(
+                    function,
+                    queue,
+                    pool,
+                    target,
+                    timeout=timeout,
+                    strategy=strategy,
+                    reporter=reporter,
+                    policy=policy,
+                    settings=settings,
+                )
             )
-            task.add_done_callback(partial(callback, i))
-            sleep_time = (target_time - time()) / (len(targets) - i)
+            task.add_done_callback(callback)
+            sleep_time = (target_time - clock.time()) / (len(targets) - i)
+            if prewarmer is not None:
+                task.add_done_callback(
+                    lambda _, target=target: prewarmer.release(target)
+                )
+                if i + 1 < len(targets):
+                    group.create_task(
+                        prewarmer.prewarm(
+                            targets[i + 1], delay=max(sleep_time - prewarmer.lead, 0)
+                        )
+                    )
             LOGGER.info(f"Entering sleep for {sleep_time} seconds")
-            await sleep(sleep_time)
-    print("Slow mode cycle completed")
-    print_stats(counter)
+            await clock.sleep(sleep_time)
+    reporter.print("Slow mode cycle completed")
+    print_stats(counter, reporter)
 
 
-def print_stats(stats: Counter[Status]):
+def print_stats(stats: Counter[Status], reporter: Reporter):
     total = sum(stats.values())
-    print("Stats:")
-    print(f"\tOK: {stats[Status.OK]}/{total}")
-    print(f"\tERROR: {stats[Status.ERROR]}/{total}")
-    print(f"\tTIMEOUT: {stats[Status.TIMEOUT]}/{total}")
+    reporter.print("Stats:")
+    reporter.print(f"\tOK: {stats[Status.OK]}/{total}")
+    reporter.print(f"\tERROR: {stats[Status.ERROR]}/{total}")
+    reporter.print(f"\tTIMEOUT: {stats[Status.TIMEOUT]}/{total}")
 
 
 async def run_all(
@@ -399,23 +1357,25 @@ async def run_all(
     timeout: float,
     pool_size: int,
     strategy: FarmingStrategy,
+    reporter: Reporter,
+    policy: SchedulingPolicy,
+    settings: WorkerSettings,
+    limiter: RateLimiter | None = None,
+    pool: AbstractAsyncContextManager[Any] | None = None,
 ) -> None:
-    def print_remaining(task: Task[tuple[Status, int]]):
+    def count_remaining(task: Task[tuple[Status, int]]):
         try:
-            status, count = task.result()
+            status, _ = task.result()
             stats[status] += 1
             done = sum(stats.values())
-            print(
-                f"Submitted {count} flags, remaining targets in the sprint:",
-                len(targets) - done,
-            )
+            LOGGER.info(f"Remaining targets in the sprint: {len(targets) - done}")
         except CancelledError:
             pass
         except:
-            LOGGER.warning("Exception in print_remaining callback", exc_info=True)
+            LOGGER.warning("Exception in count_remaining callback", exc_info=True)
 
     stats: Counter[Status] = Counter()
-    semaphore = Semaphore(pool_size)
+    semaphore = Semaphore(pool_size) if pool is None else pool
     async with TaskGroup() as group:
         for target in targets:
             task = group.create_task(
@@ -426,29 +1386,129 @@ async def run_all(
                     target,
                     timeout=timeout,
                     strategy=strategy,
+                    reporter=reporter,
+                    policy=policy,
+                    settings=settings,
+                    limiter=limiter,
                 )
             )
-            task.add_done_callback(print_remaining)
-    print(f"Sprint completed")
-    print_stats(stats)
+            task.add_done_callback(count_remaining)
+    reporter.print(f"Sprint completed")
+    print_stats(stats, reporter)
+
+
+async def run_bench(
+    function: RealSploitFunction,
+    targets: list[str],
+    /,
+    *,
+    timeout: float,
+    pool_size: int,
+    strategy: FarmingStrategy,
+    reporter: Reporter,
+    settings: WorkerSettings,
+    limiter: RateLimiter | None = None,
+) -> BenchReport:
+    async def measure(target: str):
+        if limiter is not None:
+            await limiter.acquire(target)
+        async with semaphore:
+            start = perf_counter()
+            status, count = await report_attack(
+                function,
+                send_stream,
+                target,
+                timeout=timeout,
+                strategy=strategy,
+                reporter=reporter,
+                policy=policy,
+                settings=settings,
+            )
+            report.add(status, count, perf_counter() - start)
+
+    async def discard(stream: MemoryObjectReceiveStream[tuple[str, str]]):
+        with stream:
+            async for target, flag in stream:
+                LOGGER.info(f"Flag from {target}: {flag}")
+
+    report = BenchReport()
+    policy = RandomPolicy()
+    semaphore = Semaphore(pool_size)
+    send_stream: MemoryObjectSendStream[tuple[str, str]]
+    receive_stream: MemoryObjectReceiveStream[tuple[str, str]]
+    send_stream, receive_stream = create_memory_object_stream(FLAG_BUFFER_SIZE)
+    start = perf_counter()
+    async with TaskGroup() as group:
+        group.create_task(discard(receive_stream))
+        with send_stream:
+            async with TaskGroup() as attacks:
+                for target in targets:
+                    attacks.create_task(measure(target))
+    report.elapsed = perf_counter() - start
+    return report
 
 
 async def schedule_attack(
     function: RealSploitFunction,
     queue: MemoryObjectSendStream[tuple[str, str]],
-    semaphore: Semaphore,
+    semaphore: AbstractAsyncContextManager[Any],
     target: str,
     /,
     *,
     timeout: float,
     strategy: FarmingStrategy,
+    reporter: Reporter,
+    policy: SchedulingPolicy,
+    settings: WorkerSettings,
+    limiter: RateLimiter | None = None,
 ):
+    # Wait for the rate limit without holding a slot of the pool
+    if limiter is not None:
+        await limiter.acquire(target)
     async with semaphore:
-        return await run_attack(
-            function, queue, target, timeout=timeout, strategy=strategy
+        return await report_attack(
+            function,
+            queue,
+            target,
+            timeout=timeout,
+            strategy=strategy,
+            reporter=reporter,
+            policy=policy,
+            settings=settings,
         )
 
 
+async def report_attack(
+    function: RealSploitFunction,
+    queue: MemoryObjectSendStream[tuple[str, str]],
+    target: str,
+    /,
+    *,
+    timeout: float,
+    strategy: FarmingStrategy,
+    reporter: Reporter,
+    policy: SchedulingPolicy,
+    settings: WorkerSettings,
+) -> tuple[Status, int]:
+    reporter.attack_started(target)
+    try:
+        status, count = await run_attack(
+            function,
+            queue,
+            target,
+            timeout=timeout,
+            strategy=strategy,
+            reporter=reporter,
+            settings=settings,
+        )
+    except Exception:
+        reporter.attack_completed(target, Status.ERROR, 0)
+        raise
+    reporter.attack_completed(target, status, count)
+    policy.update(target, status, count)
+    return status, count
+
+
 async def run_attack(
     function: RealSploitFunction,
     queue: MemoryObjectSendStream[tuple[str, str]],
@@ -457,24 +1517,39 @@ async def run_attack(
     *,
     timeout: float,
     strategy: FarmingStrategy,
+    reporter: Reporter,
+    settings: WorkerSettings,
 ) -> tuple[Status, int]:
     read, write = strategy.create_communication()
     async with TaskGroup() as group:
         status = group.create_task(
-            attack_process(function, write, target, timeout=timeout, strategy=strategy)
+            attack_process(
+                function,
+                write,
+                target,
+                timeout=timeout,
+                strategy=strategy,
+                settings=settings,
+            )
+        )
+        count = group.create_task(
+            read_connection(read, queue.clone(), target, reporter)
         )
-        count = group.create_task(read_connection(read, queue.clone(), target))
     return await status, await count
 
 
 async def read_connection(
-    connection: AsyncIterable[str],
+    connection: AsyncIterable[Message],
     queue: MemoryObjectSendStream[tuple[str, str]],
     target: str,
+    reporter: Reporter,
 ) -> int:
     with queue:
         counter = 0
         async for data in connection:
+            if isinstance(data, tuple):
+                reporter.count(*data)
+                continue
             assert isinstance(data, str)
             await queue.send((target, data))
             counter += 1
@@ -489,31 +1564,90 @@ async def attack_process(
     *,
     timeout: float,
     strategy: FarmingStrategy,
+    settings: WorkerSettings,
 ) -> Status:
+    grace = min(settings.grace, timeout)
+    settings = settings._replace(deadline=time() + timeout - grace)
     with write as w:
-        base_process = strategy.create_process(process_main, (function, w, target))
+        base_process = strategy.create_process(
+            process_main, (function, w, target, settings)
+        )
         with base_process as process:
-            return await process(timeout)
+            return await process(timeout - grace, grace)
 
 
 def process_main(
     function: RealSploitFunction,
     connection: WriteCommunication,
     target: str,
+    settings: WorkerSettings,
 ) -> None:
+    sent = 0
+    rejected = 0
+    retries = 0
+    adopt_connections(target)
+    set_deadline(settings.deadline)
+    set_state(
+        None if settings.state_dir is None else state_path(settings.state_dir, target)
+    )
+    handler = None
+    if current_thread() is main_thread():
+        handler = signal(SIGTERM, raise_deadline_exceeded)
     try:
-        for i, flag in enumerate(check_sploit(function(target))):
-            if i >= MAX_FLAGS_PER_PROCESS:
-                LOGGER.error("Attack sent too many flags")
-                exit(1)
-            connection.send(flag)
+        while True:
+            try:
+                for value in check_sploit(function(target)):
+                    if settings.flag_filter is None:
+                        flags = [value]
+                    else:
+                        flags = settings.flag_filter(value)
+                        if not flags:
+                            LOGGER.info(
+                                f"Dropped value not matching the flag format: {value!r}"
+                            )
+                            rejected += 1
+                    for flag in flags:
+                        if sent >= MAX_FLAGS_PER_PROCESS:
+                            LOGGER.error("Attack sent too many flags")
+                            exit(1)
+                        connection.send(flag)
+                        sent += 1
+                break
+            except Exception as e:
+                if settings.retry is None or not settings.retry.should_retry(
+                    e, retries
+                ):
+                    raise
+                delay = settings.retry.delay(retries)
+                left = remaining()
+                if left is not None and delay >= left:
+                    raise
+                LOGGER.info(f"Retrying the attack in {delay:.2f}s after {e!r}")
+                blocking_sleep(delay)
+                retries += 1
     except KeyboardInterrupt:
         pass
     except SystemExit as e:
         exit(e.code)
+    except DeadlineExceeded:
+        LOGGER.info("Attack stopped at its deadline")
+        exit(1)
     except:
         LOGGER.error("Subprocess terminated with an error", exc_info=True)
         exit(1)
+    finally:
+        if handler is not None:
+            signal(SIGTERM, handler)
+        set_deadline(None)
+        close_state()
+        if rejected:
+            connection.send(("rejected", rejected))
+        if retries:
+            connection.send(("retries", retries))
+
+
+def raise_deadline_exceeded(_: int, __: FrameType | None, /) -> None:
+    raise DeadlineExceeded()
 
 
 def check_sploit(iterator: object) -> Generator[str, None, None]:
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from asyncio import sleep
+from collections.abc import Callable
+from ipaddress import ip_network
+from threading import Lock
+from time import monotonic, sleep as blocking_sleep
+
+DEFAULT_BURST = 1.0
+DEFAULT_SUBNET_PREFIX = 24
+
+
+class TokenBucket:
+    """Allows rate events per second on average and up to burst events at once,
+    the waiting callers are served in order"""
+
+    def __init__(
+        self,
+        rate: float,
+        /,
+        *,
+        burst: float = DEFAULT_BURST,
+        clock: Callable[[], float] = monotonic,
+    ):
+        """- rate: Tokens added every second
+        - burst: Maximum number of tokens, at least 1
+        - clock: The monotonic clock to use"""
+        assert rate > 0 and burst >= 1
+        self.rate = rate
+        """Tokens added every second"""
+        self.burst = burst
+        """Maximum number of tokens"""
+        self.__clock = clock
+        self.__tokens = burst
+        self.__updated = clock()
+        self.__lock = Lock()
+
+    def reserve(self) -> float:
+        """Take a token, going in debt if there are none
+
+        - returns: Seconds to wait before using the token"""
+        with self.__lock:
+            now = self.__clock()
+            self.__tokens = min(
+                self.__tokens + (now - self.__updated) * self.rate, self.burst
+            )
+            self.__updated = now
+            self.__tokens -= 1
+            return max(-self.__tokens / self.rate, 0)
+
+    async def acquire(self) -> None:
+        """Wait for a token without blocking the event loop"""
+        delay = self.reserve()
+        if delay > 0:
+            await sleep(delay)
+
+    def wait(self) -> None:
+        """Block the current thread until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            blocking_sleep(delay)
+
+
+class RateLimiter:
+    """Paces the launch of the attacks with a global token bucket
+    and one for every target and subnet"""
+
+    def __init__(
+        self,
+        *,
+        rate: float | None = None,
+        target_rate: float | None = None,
+        subnet_rate: float | None = None,
+        subnet_prefix: int = DEFAULT_SUBNET_PREFIX,
+        burst: float = DEFAULT_BURST,
+    ):
+        """- rate: Maximum attacks per second, None for no limit
+        - target_rate: Maximum attacks per second against the same target, None for no limit
+        - subnet_rate: Maximum attacks per second against the same subnet, None for no limit
+        - subnet_prefix: Length of the network prefix of a subnet
+        - burst: Attacks that can be launched at once by every bucket"""
+        self.__global = TokenBucket(rate, burst=burst) if rate is not None else None
+        self.__target_rate = target_rate
+        self.__subnet_rate = subnet_rate
+        self.__subnet_prefix = subnet_prefix
+        self.__burst = burst
+        self.__buckets: dict[str, TokenBucket] = {}
+
+    def __bucket(self, key: str, rate: float) -> TokenBucket:
+        bucket = self.__buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst=self.__burst)
+            self.__buckets[key] = bucket
+        return bucket
+
+    def subnet(self, target: str, /) -> str | None:
+        """Get the subnet of a target
+
+        - target: The ip of the target
+
+        - returns: The subnet, None if the target is not an ip"""
+        try:
+            return str(ip_network(f"{target}/{self.__subnet_prefix}", strict=False))
+        except ValueError:
+            return None
+
+    def buckets(self, target: str, /) -> list[TokenBucket]:
+        """Get the buckets limiting an attack
+
+        - target: The attacked target
+
+        - returns: The buckets to take a token from"""
+        buckets: list[TokenBucket] = []
+        if self.__global is not None:
+            buckets.append(self.__global)
+        if self.__subnet_rate is not None:
+            subnet = self.subnet(target)
+            if subnet is not None:
+                buckets.append(self.__bucket(f"subnet {subnet}", self.__subnet_rate))
+        if self.__target_rate is not None:
+            buckets.append(self.__bucket(f"target {target}", self.__target_rate))
+        return buckets
+
+    async def acquire(self, target: str, /) -> None:
+        """Wait until an attack against a target can be launched
+
+        - target: The target to attack"""
+        delay = max([bucket.reserve() for bucket in self.buckets(target)], default=0)
+        if delay > 0:
+            await sleep(delay)
+
+
+_buckets: dict[str, TokenBucket] = {}
+_lock = Lock()
+
+
+def rate_limit(
+    rate: float, /, *, burst: float = DEFAULT_BURST, key: str = "default"
+) -> None:
+    """Wait before sending a request so that there are at most rate requests per second.
+    The limit is shared by the attacks running in the same process,
+    with ProcessStrategy every attack has its own
+
+    - rate: Maximum requests per second
+    - burst: Requests that can be sent at once
+    - key: Name of the limit, to limit different services separately"""
+    with _lock:
+        bucket = _buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            bucket = TokenBucket(rate, burst=burst)
+            _buckets[key] = bucket
+    bucket.wait()
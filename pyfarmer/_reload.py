@@ -0,0 +1,120 @@
+from __future__ import annotations
+from asyncio import sleep
+from collections.abc import Callable
+from inspect import getsourcefile
+from os import stat
+from threading import Lock
+from types import ModuleType
+from logging import getLogger
+
+from pyfarmer._reporter import Reporter
+from pyfarmer._utils import run_in_background
+
+LOGGER = getLogger("pyfarmer.reload")
+
+DEFAULT_WATCH_INTERVAL = 1.0
+MODULE_NAME = "__sploit__"
+
+# Sploits already loaded by this process, by path, name and modification time
+_lock = Lock()
+_loaded: dict[tuple[str, str, int], Callable[[str], object]] = {}
+
+
+def load_sploit(path: str, name: str, mtime: int, /) -> Callable[[str], object]:
+    """Execute a sploit file as a new module and take the sploit from it,
+    the code under if __name__ == "__main__" is not run
+
+    - path: The path of the file
+    - name: The name of the sploit function inside the file
+    - mtime: The modification time of the file in nanoseconds, used to cache the module
+
+    - returns: The sploit function"""
+    key = (path, name, mtime)
+    with _lock:
+        function = _loaded.get(key)
+    if function is not None:
+        return function
+    with open(path, "rb") as file:
+        code = compile(file.read(), path, "exec")
+    module = ModuleType(MODULE_NAME)
+    module.__file__ = path
+    exec(code, module.__dict__)
+    function = getattr(module, name)
+    if not callable(function):
+        raise TypeError(f"{name} in {path} is not a function")
+    with _lock:
+        _loaded[key] = function
+    return function
+
+
+class ReloadableSploit:
+    """A sploit that is loaded again from its file when the file changes.
+    The attacks already running keep the old code,
+    the attacks started after the reload use the new one"""
+
+    def __init__(self, function: Callable[[str], object], /):
+        """- function: The sploit, a function defined at the top level of its file"""
+        path = getsourcefile(function)
+        name = function.__qualname__
+        if path is None or "." in name:
+            raise ValueError(
+                f"{name} is not defined at the top level of a file, it cannot be reloaded"
+            )
+        self.path = path
+        """The path of the file of the sploit"""
+        self.name = name
+        """The name of the sploit function"""
+        self.function = function
+        """The current version of the sploit"""
+        self.__mtime = stat(path).st_mtime_ns
+        self.__checked = self.__mtime
+
+    def __call__(self, ip: str, /) -> object:
+        return self.function(ip)
+
+    def __reduce__(self):
+        # Pickled by the spawned processes and the sub-interpreters
+        return load_sploit, (self.path, self.name, self.__mtime)
+
+    def changed(self) -> bool:
+        """Check if the file has been modified since the last load
+
+        - returns: If the file has been modified"""
+        try:
+            return stat(self.path).st_mtime_ns != self.__checked
+        except OSError:
+            return False
+
+    def reload(self) -> bool:
+        """Load the sploit again from its file, keeping the old one on errors
+
+        - returns: If the sploit has been reloaded"""
+        try:
+            mtime = stat(self.path).st_mtime_ns
+        except OSError:
+            # Saved by renaming it, retried at the next check
+            LOGGER.info(f"Cannot read {self.path}, retrying later", exc_info=True)
+            return False
+        self.__checked = mtime
+        try:
+            function = load_sploit(self.path, self.name, mtime)
+        except Exception:
+            LOGGER.error(
+                f"Cannot reload {self.path}, still using the old sploit", exc_info=True
+            )
+            return False
+        self.function = function
+        self.__mtime = mtime
+        return True
+
+    async def watch(
+        self, reporter: Reporter, /, *, interval: float = DEFAULT_WATCH_INTERVAL
+    ) -> None:
+        """Reload the sploit every time its file changes, it never returns
+
+        - reporter: Where to print the reloads
+        - interval: Seconds between two checks of the file"""
+        while True:
+            await sleep(interval)
+            if self.changed() and await run_in_background(self.reload, ()):
+                reporter.print(f"Reloaded the sploit from {self.path}")
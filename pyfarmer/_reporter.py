@@ -0,0 +1,143 @@
+from __future__ import annotations
+from asyncio import Task, CancelledError, sleep, get_running_loop
+from collections import Counter
+import sys
+from time import time
+from typing import TextIO
+from logging import getLogger
+
+from pyfarmer._strategies import Status
+
+LOGGER = getLogger("pyfarmer.reporter")
+
+DEFAULT_REPORT_INTERVAL = 5.0
+
+
+class Reporter:
+    """Aggregates the results of the attacks and periodically prints a summary
+    instead of writing a line for every attack"""
+
+    def __init__(
+        self,
+        *,
+        interval: float = DEFAULT_REPORT_INTERVAL,
+        stream: TextIO | None = None,
+        live: bool | None = None,
+    ):
+        """- interval: Seconds between two summaries
+        - stream: Where to write the summaries, None for stdout
+        - live: Redraw a single line instead of appending new ones,
+                None to enable it only when the stream is a tty"""
+        self.__interval = interval
+        self.__stream = stream if stream is not None else sys.stdout
+        self.__live = self.__stream.isatty() if live is None else live
+        self.__line_drawn = False
+        self.__task: Task[None] | None = None
+        self.__last_summary = ""
+        self.__last_state: object = None
+        self.__start_time = time()
+        self.running = 0
+        """Number of attacks currently running"""
+        self.stats: Counter[Status] = Counter()
+        """Exit status of the completed attacks"""
+        self.counters: Counter[str] = Counter()
+        """Other aggregated counters, like the number of flags"""
+
+    def attack_started(self, target: str, /) -> None:
+        """Record the start of an attack
+
+        - target: The attacked ip"""
+        self.running += 1
+        LOGGER.info(f"Starting attack against {target}")
+
+    def attack_completed(self, target: str, status: Status, flags: int, /) -> None:
+        """Record the result of an attack
+
+        - target: The attacked ip
+        - status: The exit status of the sploit
+        - flags: The number of flags sent by the sploit"""
+        self.running -= 1
+        self.stats[status] += 1
+        self.counters["flags"] += flags
+        LOGGER.info(
+            f"Attack against {target} result: {status.name}, submitted {flags} flags"
+        )
+
+    def count(self, name: str, value: int = 1, /) -> None:
+        """Increment a named counter
+
+        - name: The name of the counter
+        - value: The amount to add"""
+        self.counters[name] += value
+
+    def summary(self) -> str:
+        """Build a compact single line summary of the counters
+
+        - returns: The summary"""
+        elapsed = max(time() - self.__start_time, 1e-9)
+        parts = [f"running: {self.running}"]
+        parts.append(
+            " ".join(f"{status.name}: {self.stats[status]}" for status in Status)
+        )
+        parts += [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        parts.append(f"{self.counters['flags'] / elapsed * 60:.1f} flags/min")
+        return " | ".join(parts)
+
+    def print(self, *values: object) -> None:
+        """Print a message without breaking the live summary line
+
+        - values: The objects to print"""
+        redraw = self.__line_drawn
+        self.__clear_line()
+        print(*values, file=self.__stream)
+        if redraw:
+            self.__draw(self.__last_summary)
+
+    def report(self) -> None:
+        """Write the summary immediately"""
+        summary = self.summary()
+        state = (
+            self.running,
+            sorted(self.stats.items()),
+            sorted(self.counters.items()),
+        )
+        if self.__live:
+            self.__clear_line()
+            self.__draw(summary)
+        elif state != self.__last_state:
+            print(summary, file=self.__stream)
+        self.__last_summary = summary
+        self.__last_state = state
+
+    def __draw(self, summary: str) -> None:
+        self.__stream.write(f"\r{summary}")
+        self.__stream.flush()
+        self.__line_drawn = True
+
+    def __clear_line(self) -> None:
+        if self.__line_drawn:
+            self.__stream.write("\r\x1b[K")
+            self.__line_drawn = False
+
+    async def __run(self) -> None:
+        while True:
+            await sleep(self.__interval)
+            self.report()
+
+    async def __aenter__(self) -> Reporter:
+        self.__task = get_running_loop().create_task(self.__run())
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        assert self.__task is not None
+        self.__task.cancel()
+        try:
+            await self.__task
+        except CancelledError:
+            pass
+        self.__task = None
+        self.report()
+        if self.__line_drawn:
+            self.__stream.write("\n")
+            self.__stream.flush()
+            self.__line_drawn = False
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from random import uniform
+
+from httpx import TransportError
+
+DEFAULT_RETRY_EXCEPTIONS: tuple[type[BaseException], ...] = (
+    OSError,
+    EOFError,
+    TransportError,
+)
+DEFAULT_BACKOFF = 0.2
+DEFAULT_BACKOFF_FACTOR = 2.0
+DEFAULT_MAX_BACKOFF = 5.0
+
+
+class RetryPolicy:
+    """Runs again a failed sploit inside its time slot, for the transient errors
+    like a connection reset. The flags yielded before the error are kept"""
+
+    def __init__(
+        self,
+        retries: int,
+        /,
+        *,
+        exceptions: tuple[type[BaseException], ...] = DEFAULT_RETRY_EXCEPTIONS,
+        backoff: float = DEFAULT_BACKOFF,
+        factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+    ):
+        """- retries: Maximum number of runs after the first one
+        - exceptions: The errors worth a retry, by default the network errors
+        - backoff: Seconds to wait before the first retry
+        - factor: How much the wait grows at every retry
+        - max_backoff: Maximum seconds to wait before a retry"""
+        assert retries >= 0 and backoff >= 0 and factor >= 1
+        self.retries = retries
+        """Maximum number of runs after the first one"""
+        self.exceptions = exceptions
+        """The errors worth a retry"""
+        self.backoff = backoff
+        """Seconds to wait before the first retry"""
+        self.factor = factor
+        """How much the wait grows at every retry"""
+        self.max_backoff = max_backoff
+        """Maximum seconds to wait before a retry"""
+
+    def should_retry(self, exception: BaseException, attempt: int, /) -> bool:
+        """Check if a sploit must be run again after an error
+
+        - exception: The error raised by the sploit
+        - attempt: The number of retries already done
+
+        - returns: If the sploit must be run again"""
+        return attempt < self.retries and isinstance(exception, self.exceptions)
+
+    def delay(self, attempt: int, /) -> float:
+        """Get how long to wait before a retry, with a random jitter
+        so that the retries against a recovering service are spread
+
+        - attempt: The number of retries already done
+
+        - returns: The seconds to wait"""
+        delay = min(self.backoff * self.factor**attempt, self.max_backoff)
+        return uniform(delay / 2, delay)
+
+    def __repr__(self) -> str:
+        return f"RetryPolicy({self.retries}, backoff={self.backoff})"
@@ -0,0 +1,135 @@
+from __future__ import annotations
+from math import log, sqrt
+from random import Random
+from typing import Protocol
+
+from pyfarmer._strategies import Status
+
+DEFAULT_EXPLORATION = 0.1
+DEFAULT_CONFIDENCE = 1.0
+DEFAULT_DECAY = 0.3
+
+
+class SchedulingPolicy(Protocol):
+    """Decides which targets are attacked in a cycle and in which order"""
+
+    def plan(self, targets: list[str], /) -> list[str]:
+        """Choose the attacks of the next cycle
+
+        - targets: All the available targets
+
+        - returns: The targets to attack in order of launch"""
+        ...
+
+    def update(self, target: str, status: Status, flags: int, /) -> None:
+        """Learn from the result of an attack
+
+        - target: The attacked ip
+        - status: The exit status of the sploit
+        - flags: The number of flags sent by the sploit"""
+        ...
+
+
+class RandomPolicy(SchedulingPolicy):
+    """Attack every target each cycle, in a random order chosen once"""
+
+    def __init__(self, *, random: Random | None = None):
+        """- random: The random generator to use, None for a new one"""
+        self.__random = random if random is not None else Random()
+        self.__order: dict[str, float] = {}
+
+    def plan(self, targets: list[str], /) -> list[str]:
+        for target in targets:
+            if target not in self.__order:
+                self.__order[target] = self.__random.random()
+        return sorted(targets, key=self.__order.__getitem__)
+
+    def update(self, target: str, status: Status, flags: int, /) -> None:
+        pass
+
+
+class ExpiryPolicy(SchedulingPolicy):
+    """Reorders the attacks chosen by another policy, attacking first the targets
+    that gave flags the longest time ago: their oldest flags are the closest to expiring
+    """
+
+    def __init__(self, policy: SchedulingPolicy, /):
+        """- policy: The policy choosing the targets of every cycle"""
+        self.policy = policy
+        """The policy choosing the targets of every cycle"""
+        self.__cycle = 0
+        self.__last_flags: dict[str, int] = {}
+
+    def plan(self, targets: list[str], /) -> list[str]:
+        self.__cycle += 1
+        return sorted(
+            self.policy.plan(targets),
+            key=lambda target: self.__last_flags.get(target, 0),
+        )
+
+    def update(self, target: str, status: Status, flags: int, /) -> None:
+        self.policy.update(target, status, flags)
+        if flags > 0:
+            self.__last_flags[target] = self.__cycle
+
+
+class BanditPolicy(SchedulingPolicy):
+    """Multi-armed bandit that learns the flags per attack of every target.
+    Targets are ordered by their upper confidence bound and the ones giving
+    fewer flags are attacked less often, down to the exploration floor"""
+
+    def __init__(
+        self,
+        *,
+        exploration: float = DEFAULT_EXPLORATION,
+        confidence: float = DEFAULT_CONFIDENCE,
+        decay: float = DEFAULT_DECAY,
+        random: Random | None = None,
+    ):
+        """- exploration: Minimum probability of attacking a target in a cycle
+        - confidence: Weight of the exploration bonus of the upper confidence bound
+        - decay: Weight of the latest attack in the moving average of the flags,
+                 higher values forget faster when a team gets patched
+        - random: The random generator to use, None for a new one"""
+        assert 0 < exploration <= 1
+        assert 0 < decay <= 1
+        self.__exploration = exploration
+        self.__confidence = confidence
+        self.__decay = decay
+        self.__random = random if random is not None else Random()
+        self.__attacks: dict[str, int] = {}
+        self.__yields: dict[str, float] = {}
+
+    def score(self, target: str, /) -> float:
+        """Upper confidence bound of the flags per attack of a target
+
+        - target: The ip of the target
+
+        - returns: The score, infinity if the target was never attacked"""
+        attacks = self.__attacks.get(target, 0)
+        if attacks == 0:
+            return float("inf")
+        total = sum(self.__attacks.values())
+        best = max(self.__yields.values())
+        bonus = self.__confidence * max(best, 1) * sqrt(log(total) / attacks)
+        return self.__yields[target] + bonus
+
+    def plan(self, targets: list[str], /) -> list[str]:
+        scores = {target: self.score(target) for target in targets}
+        known = [score for score in scores.values() if score != float("inf")]
+        best = max(known, default=0)
+        result: list[str] = []
+        for target in targets:
+            score = scores[target]
+            probability = 1.0 if best <= 0 else min(score / best, 1.0)
+            if self.__random.random() < max(probability, self.__exploration):
+                result.append(target)
+        self.__random.shuffle(result)
+        result.sort(key=scores.__getitem__, reverse=True)
+        return result
+
+    def update(self, target: str, status: Status, flags: int, /) -> None:
+        attacks = self.__attacks.get(target, 0)
+        previous = self.__yields.get(target, flags)
+        self.__attacks[target] = attacks + 1
+        self.__yields[target] = previous + self.__decay * (flags - previous)
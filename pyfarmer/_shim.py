@@ -0,0 +1,46 @@
+from __future__ import annotations
+from collections.abc import Callable, Iterable
+from gzip import decompress
+from io import BytesIO
+from json import dumps, loads
+from typing import Any
+
+
+class FarmShim:
+    """WSGI middleware that makes Destructive Farm accept the gzip and compact
+    post_flags bodies sent by the CompactEncoder and by the gzip option.
+    To install it add to destructivefarm/server/__init__.py:
+
+    ```python
+    from pyfarmer import FarmShim
+
+    app.wsgi_app = FarmShim(app.wsgi_app)
+    ```
+    """
+
+    def __init__(self, app: Callable[..., Iterable[bytes]], /):
+        """- app: The wsgi application of the farm"""
+        self.__app = app
+
+    def __call__(
+        self, environ: dict[str, Any], start_response: Callable[..., Any]
+    ) -> Iterable[bytes]:
+        if (
+            environ.get("PATH_INFO") == "/api/post_flags"
+            and environ.get("REQUEST_METHOD") == "POST"
+        ):
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            body: bytes = environ["wsgi.input"].read(length)
+            if environ.pop("HTTP_CONTENT_ENCODING", None) == "gzip":
+                body = decompress(body)
+            data = loads(body)
+            if isinstance(data, dict):
+                body = dumps(
+                    [
+                        {"flag": flag, "sploit": data["sploit"], "team": team}
+                        for team, flag in data["flags"]
+                    ]
+                ).encode()
+            environ["wsgi.input"] = BytesIO(body)
+            environ["CONTENT_LENGTH"] = str(len(body))
+        return self.__app(environ, start_response)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+from collections.abc import Iterable, Iterator, MutableMapping
+from json import dump, load
+from os import makedirs, replace
+from os.path import dirname, join
+from tempfile import NamedTemporaryFile
+from threading import local
+from typing import Any
+from urllib.parse import quote
+from logging import getLogger
+
+LOGGER = getLogger("pyfarmer.state")
+
+DEFAULT_STATE_DIR = "pyfarmer_state"
+# Key of the items marked as processed when the sploit doesn't choose one
+DEFAULT_SEEN_KEY = "seen"
+# Items remembered for every key, the oldest are forgotten first
+MAX_SEEN_ITEMS = 4096
+
+
+class TargetState(MutableMapping):
+    """What a sploit remembers about a target between its attacks,
+    like the last id it has seen or the flag ids it has already processed.
+    It is a dict of JSON values, loaded when it is first used
+    and saved at the end of the attack"""
+
+    def __init__(self, path: str | None, /):
+        """- path: The JSON file of the state, None to keep it only in memory"""
+        self.path = path
+        """The JSON file of the state, None to keep it only in memory"""
+        self.__data: dict[str, Any] | None = None
+        self.__changed = False
+
+    @property
+    def __values(self) -> dict[str, Any]:
+        if self.__data is None:
+            self.__data = {}
+            if self.path is not None:
+                try:
+                    with open(self.path) as file:
+                        self.__data = load(file)
+                except FileNotFoundError:
+                    pass
+                except ValueError:
+                    LOGGER.warning(f"Ignoring the corrupted state {self.path}")
+        return self.__data
+
+    def __getitem__(self, key: str, /) -> Any:
+        return self.__values[key]
+
+    def __setitem__(self, key: str, value: Any, /) -> None:
+        self.__values[key] = value
+        self.__changed = True
+
+    def __delitem__(self, key: str, /) -> None:
+        del self.__values[key]
+        self.__changed = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__values)
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def unseen(
+        self, items: Iterable[str], /, *, key: str = DEFAULT_SEEN_KEY
+    ) -> list[str]:
+        """Filter the items not marked as seen yet, use it to skip
+        the flag ids already stolen in the previous attacks
+
+        - items: The items, like the flag ids of the target
+        - key: Where the seen items are kept, to have several sets of them
+
+        - returns: The new items in their order"""
+        seen = set(self.get(key, ()))
+        return [item for item in items if item not in seen]
+
+    def mark(self, item: str, /, *, key: str = DEFAULT_SEEN_KEY) -> None:
+        """Mark an item as seen, call it after yielding its flag
+        so that the item is processed again if the attack stops before
+
+        - item: The item, like a flag id
+        - key: Where the seen items are kept, to have several sets of them"""
+        seen: list[str] = self.get(key, [])
+        if item in seen:
+            return
+        seen.append(item)
+        self[key] = seen[-MAX_SEEN_ITEMS:]
+
+    def save(self) -> None:
+        """Write the state if it has changed, it is done at the end of every attack,
+        call it to keep the progress of a long attack that can be killed"""
+        if not self.__changed or self.path is None:
+            return
+        directory = dirname(self.path)
+        makedirs(directory, exist_ok=True)
+        # Replaced atomically so that a killed attack never leaves half a state
+        with NamedTemporaryFile("w", dir=directory, delete=False) as file:
+            dump(self.__data, file)
+        replace(file.name, self.path)
+        self.__changed = False
+
+
+class _State(local):
+    value: TargetState | None = None
+
+
+_state = _State()
+
+
+def sploit_state_dir(directory: str, alias: str, /) -> str:
+    """Get the directory of the states of a sploit
+
+    - directory: The directory of the states of all the sploits
+    - alias: The alias of the sploit
+
+    - returns: The path of the directory"""
+    return join(directory, quote(alias, safe=""))
+
+
+def state_path(directory: str, target: str, /) -> str:
+    """Get the file of the state of a target
+
+    - directory: The directory of the states of the sploit
+    - target: The target
+
+    - returns: The path of the JSON file"""
+    return join(directory, f"{quote(target, safe='')}.json")
+
+
+def set_state(path: str | None, /) -> None:
+    """Start using the state of a target in the attack running in the current thread
+
+    - path: The JSON file of the state, None to keep it only in memory"""
+    _state.value = TargetState(path)
+
+
+def close_state() -> None:
+    """Save the state of the attack running in the current thread and stop using it"""
+    value, _state.value = _state.value, None
+    if value is None:
+        return
+    try:
+        value.save()
+    except OSError:
+        LOGGER.error("Cannot save the state of the attack", exc_info=True)
+
+
+def state() -> TargetState:
+    """Get what the running attack remembers about its target,
+    it is kept across the attacks and the restarts of the farmer
+
+    - returns: The state of the target of the attack"""
+    if _state.value is None:
+        raise RuntimeError("The state can only be used inside an attack")
+    return _state.value
@@ -1,16 +1,20 @@
 from __future__ import annotations
 from collections.abc import Callable, AsyncIterable, AsyncGenerator, Awaitable
 from contextlib import AbstractContextManager, contextmanager
-from typing_extensions import TypeVarTuple, TypeVar, Unpack
+from typing_extensions import TypeVarTuple, TypeVar, Unpack, TypeAlias
 from typing import Literal, Protocol, Any
 from multiprocessing import Pipe, get_context
-from threading import Thread
+from asyncio import AbstractEventLoop, Event as AsyncEvent, get_running_loop
+from collections import deque
+from threading import Thread, Timer, Lock, get_ident
 from sys import settrace
-from types import FrameType
+from types import FrameType, CodeType
 from abc import ABC, abstractmethod
 from contextlib import AbstractContextManager
-from enum import IntEnum, auto
+from ctypes import pythonapi, py_object, c_ulong
+from enum import Enum, IntEnum, auto
 from pyfarmer._utils import run_in_background
+from pyfarmer._deadline import DeadlineExceeded
 from logging import getLogger
 
 LOGGER = getLogger("pyfarmer.strategies")
@@ -18,13 +22,20 @@ LOGGER = getLogger("pyfarmer.strategies")
 TT = TypeVarTuple("TT")
 T = TypeVar("T")
 
+KILL_RETRY_INTERVAL = 0.1
+KILL_ATTEMPTS = 10
+MONITORING_TOOL_ID = 4
+
+Message: TypeAlias = "str | tuple[str, int]"
+"""Data sent by a sploit process, either a flag or the increment of a named counter"""
+
 
 class FarmingStrategy(Protocol):
     """The strategy to use to run the sploit"""
 
     def create_communication(
         self,
-    ) -> tuple[AsyncIterable[str], AbstractContextManager[WriteCommunication]]:
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
         """Open a communication channel
 
         - returns: A tuple containing the readable part as an async iterable
@@ -35,15 +46,16 @@ class FarmingStrategy(Protocol):
 
     def create_process(
         self, function: Callable[[Unpack[TT]], None], args: tuple[Unpack[TT]], /
-    ) -> AbstractContextManager[Callable[[float], Awaitable[Status]]]:
+    ) -> AbstractContextManager[Callable[[float, float], Awaitable[Status]]]:
         """Prepare the environment to run the sploit into
 
         - function: The function to run
         - args: The arguments of the function
 
         - returns: An abstract context manager of an async function that waits
-                   for the function to terminate for an amount passed as an input
-                   and returns the exit status of the function
+                   for the function to terminate for an amount passed as an input,
+                   then asks it to stop and waits for the grace period passed
+                   as the second input, and returns the exit status of the function
         """
         ...
 
@@ -51,10 +63,10 @@ class FarmingStrategy(Protocol):
 class WriteCommunication(Protocol):
     """Abstraction of the write part of a Connection object"""
 
-    def send(self, data: str, /) -> Any:
-        """Send a string to the other end of the communication
+    def send(self, data: Message, /) -> Any:
+        """Send a message to the other end of the communication
 
-        - data: The string to send"""
+        - data: The message to send"""
         ...
 
 
@@ -76,13 +88,13 @@ class ReadCommunication(Protocol):
 
 async def iterate_connection(
     connection: AbstractContextManager[ReadCommunication],
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[Message, None]:
     with connection as conn:
         try:
             while True:
                 await run_in_background(conn.poll, (None,))
                 data: object = conn.recv()
-                assert isinstance(data, str)
+                assert isinstance(data, (str, tuple))
                 yield data
         except EOFError:
             pass
@@ -105,6 +117,10 @@ class Process(Protocol):
         """Kill the process"""
         ...
 
+    def terminate(self) -> Any:
+        """Ask the process to stop, raising DeadlineExceeded in the sploit"""
+        ...
+
     def is_alive(self) -> bool:
         """Check if the process is alive"""
         ...
@@ -130,9 +146,12 @@ class Status(IntEnum):
 
 @contextmanager
 def stoppable_process(process: Process):
-    async def join(timeout: float) -> Status:
+    async def join(timeout: float, grace: float = 0) -> Status:
         await run_in_background(process.join, (timeout,))
         if process.is_alive():
+            if grace > 0:
+                process.terminate()
+                await run_in_background(process.join, (grace,))
             return Status.TIMEOUT
         assert process.exitcode is not None
         if process.exitcode != 0:
@@ -165,13 +184,13 @@ class SimpleFarmingStrategy(FarmingStrategy, ABC):
 
     def create_communication(
         self,
-    ) -> tuple[AsyncIterable[str], AbstractContextManager[WriteCommunication]]:
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
         read, write = self._create_communication()
         return iterate_connection(read), write
 
     def create_process(
         self, function: Callable[..., None], args: tuple[object, ...]
-    ) -> AbstractContextManager[Callable[[float], Any]]:
+    ) -> AbstractContextManager[Callable[[float, float], Awaitable[Status]]]:
         return stoppable_process(self._create_process(function, args))
 
     @abstractmethod
@@ -210,14 +229,48 @@ class ProcessStrategy(SimpleFarmingStrategy):
         return self.__context.Process(target=function, args=args)
 
 
+class KillMethod(Enum):
+    """How to stop a thread running a sploit"""
+
+    ASYNC_EXCEPTION = "async_exception"
+    """Raise SystemExit inside the thread, escalating to tracing if it is ignored"""
+    TRACE = "trace"
+    """Trace every call of the thread, slows down the sploit"""
+    NONE = "none"
+    """Never stop the thread"""
+
+
 class ThreadStrategy(SimpleFarmingStrategy):
     """Strategy to use threads
-    Warning: There is no safe way to kill a thread so a non terminating sploit will run forever
+    Warning: There is no safe way to kill a thread so a non terminating sploit might run forever
     """
 
-    def __init__(self, *, trace_kill: bool = True):
-        """- trace_kill: Try kill the thread using debugger features, doesn't always work"""
-        self.__trace_kill = trace_kill
+    def __init__(
+        self,
+        *,
+        trace_kill: bool = True,
+        kill_method: KillMethod | None = None,
+        native_channel: bool | None = None,
+    ):
+        """- trace_kill: Try to kill the threads, the same as KillMethod.NONE when False
+        - kill_method: How to stop the threads, None to use KillMethod.ASYNC_EXCEPTION
+                       unless trace_kill is False
+        - native_channel: Send the flags with a ThreadChannel instead of a pipe,
+                          None to use it only on free-threaded Python"""
+        if kill_method is None:
+            kill_method = KillMethod.ASYNC_EXCEPTION if trace_kill else KillMethod.NONE
+        if native_channel is None:
+            native_channel = not gil_enabled()
+        self.__kill_method = kill_method
+        self.__native_channel = native_channel
+
+    def create_communication(
+        self,
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
+        if not self.__native_channel:
+            return super().create_communication()
+        channel = ThreadChannel(get_running_loop())
+        return channel.receive(), channel
 
     def _create_communication(
         self,
@@ -229,16 +282,79 @@ class ThreadStrategy(SimpleFarmingStrategy):
 
     def _create_process(
         self, function: Callable[..., None], args: tuple[object, ...]
-    ) -> StoppableThread | FakeStoppableThread:
-        method = StoppableThread if self.__trace_kill else FakeStoppableThread
+    ) -> Thread:
+        method = {
+            KillMethod.ASYNC_EXCEPTION: InterruptibleThread,
+            KillMethod.TRACE: StoppableThread,
+            KillMethod.NONE: FakeStoppableThread,
+        }[self.__kill_method]
         return method(target=function, args=args)
 
 
+def gil_enabled() -> bool:
+    """Check if the GIL is enabled, it can be disabled on free-threaded Python 3.13+
+
+    - returns: If only a thread at a time can run Python code"""
+    try:
+        from sys import _is_gil_enabled  # type: ignore
+    except ImportError:
+        return True
+    return _is_gil_enabled()
+
+
+class ThreadChannel(WriteCommunication):
+    """Sends the messages of a thread to the event loop without a pipe
+    and without a thread waiting for them.
+    The messages are appended to a deque and the loop is woken up once per batch.
+    Closing it sends the end of the messages"""
+
+    def __init__(self, loop: AbstractEventLoop, /):
+        """- loop: The event loop receiving the messages"""
+        self.__loop = loop
+        self.__messages: deque[Message | None] = deque()
+        self.__lock = Lock()
+        self.__scheduled = False
+        self.__ready = AsyncEvent()
+
+    def send(self, data: Message | None, /) -> None:
+        with self.__lock:
+            self.__messages.append(data)
+            if self.__scheduled:
+                return
+            self.__scheduled = True
+        self.__loop.call_soon_threadsafe(self.__ready.set)
+
+    async def receive(self) -> AsyncGenerator[Message, None]:
+        """Receive the messages until the channel is closed
+
+        - returns: An async generator of the messages"""
+        while True:
+            await self.__ready.wait()
+            self.__ready.clear()
+            with self.__lock:
+                batch = list(self.__messages)
+                self.__messages.clear()
+                self.__scheduled = False
+            for message in batch:
+                if message is None:
+                    return
+                yield message
+
+    def __enter__(self) -> ThreadChannel:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.send(None)
+
+
 class FakeStoppableThread(Thread):
     @property
     def exitcode(self) -> int:
         return 0
 
+    def terminate(self):
+        pass
+
     def kill(self):
         if self.is_alive():
             LOGGER.warning("Cannot kill a running thread, a new zombie is born")
@@ -248,6 +364,7 @@ class StoppableThread(Thread):
     def start(self) -> None:
         self.exitcode = 0
         self.__stop = False
+        self.__terminate = False
         return super().start()
 
     def run(self) -> None:
@@ -261,6 +378,12 @@ class StoppableThread(Thread):
     def __trace(self, _: FrameType, __: str, ___: object, /) -> None:
         if self.__stop:
             raise SystemExit()
+        if self.__terminate:
+            self.__terminate = False
+            raise DeadlineExceeded()
+
+    def terminate(self):
+        self.__terminate = True
 
     def kill(self):
         if self.is_alive():
@@ -268,3 +391,131 @@ class StoppableThread(Thread):
                 "Trying to kill a running thread, a new zombie might be born"
             )
         self.__stop = True
+
+
+def raise_in_thread(ident: int, exception: type[BaseException], /) -> bool:
+    """Raise an exception in a thread as soon as it executes Python code
+
+    - ident: The identifier of the thread
+    - exception: The exception class to raise
+
+    - returns: If the thread was found"""
+    found: int = pythonapi.PyThreadState_SetAsyncExc(
+        c_ulong(ident), py_object(exception)
+    )
+    if found > 1:
+        pythonapi.PyThreadState_SetAsyncExc(c_ulong(ident), None)
+        raise SystemError("PyThreadState_SetAsyncExc modified more than one thread")
+    return found == 1
+
+
+class _ThreadMonitor:
+    """Raises SystemExit at every line executed by the monitored threads,
+    it has no cost when no thread is monitored"""
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__threads: set[int] = set()
+
+    def __callback(self, code: CodeType, _: int, /) -> None:
+        if get_ident() in self.__threads and code.co_filename != __file__:
+            raise SystemExit()
+
+    def add(self, ident: int, /) -> bool:
+        """Start stopping a thread
+
+        - ident: The identifier of the thread
+
+        - returns: False if monitoring is not available"""
+        try:
+            from sys import monitoring
+        except ImportError:
+            return False
+        with self.__lock:
+            if not self.__threads:
+                try:
+                    monitoring.use_tool_id(MONITORING_TOOL_ID, "pyfarmer")
+                except ValueError:
+                    return False
+                events = monitoring.events.LINE | monitoring.events.PY_START
+                for event in (monitoring.events.LINE, monitoring.events.PY_START):
+                    monitoring.register_callback(
+                        MONITORING_TOOL_ID, event, self.__callback
+                    )
+                monitoring.set_events(MONITORING_TOOL_ID, events)
+            self.__threads.add(ident)
+        return True
+
+    def remove(self, ident: int, /) -> None:
+        """Stop monitoring a thread
+
+        - ident: The identifier of the thread"""
+        with self.__lock:
+            if ident not in self.__threads:
+                return
+            self.__threads.remove(ident)
+            if not self.__threads:
+                from sys import monitoring
+
+                monitoring.set_events(MONITORING_TOOL_ID, 0)
+                monitoring.free_tool_id(MONITORING_TOOL_ID)
+
+
+THREAD_MONITOR = _ThreadMonitor()
+
+
+class InterruptibleThread(Thread):
+    """Thread killed by raising SystemExit inside it, it runs at full speed until then.
+    If the exception is ignored it is raised again and, when sys.monitoring
+    is available, at every line executed by the thread"""
+
+    def start(self) -> None:
+        self.exitcode = 0
+        self.__attempts = 0
+        self.__finished = False
+        self.__lock = Lock()
+        return super().start()
+
+    def run(self) -> None:
+        try:
+            return super().run()
+        except SystemExit as e:
+            self.exitcode = (
+                e.code if isinstance(e.code, int) else int(e.code is not None)
+            )
+        except:
+            self.exitcode = 1
+            raise
+        finally:
+            with self.__lock:
+                self.__finished = True
+                if self.__attempts > KILL_ATTEMPTS:
+                    THREAD_MONITOR.remove(get_ident())
+
+    def terminate(self):
+        with self.__lock:
+            if not self.__finished and self.ident is not None:
+                raise_in_thread(self.ident, DeadlineExceeded)
+
+    def kill(self):
+        self.__interrupt()
+
+    def __interrupt(self) -> None:
+        with self.__lock:
+            if self.__finished or self.ident is None:
+                return
+            if self.__attempts < KILL_ATTEMPTS:
+                raise_in_thread(self.ident, SystemExit)
+            else:
+                self.__attempts += 1
+                if THREAD_MONITOR.add(self.ident):
+                    LOGGER.warning(
+                        "The thread ignored SystemExit, tracing it to stop it"
+                    )
+                else:
+                    LOGGER.warning("Cannot kill a running thread, a new zombie is born")
+                return
+            self.__attempts += 1
+        timer = Timer(KILL_RETRY_INTERVAL, self.__interrupt)
+        timer.daemon = True
+        timer.start()
@@ -0,0 +1,373 @@
+from __future__ import annotations
+from atexit import register, unregister
+from collections.abc import Callable, AsyncIterable, Awaitable
+from contextlib import AbstractContextManager
+from multiprocessing.spawn import get_preparation_data, prepare
+from threading import Event, Thread, Lock
+from time import monotonic
+from typing import Any
+from sys import path, version_info
+from logging import getLogger
+from pyfarmer._strategies import (
+    FarmingStrategy,
+    ProcessStrategy,
+    SimpleFarmingStrategy,
+    ReadCommunication,
+    WriteCommunication,
+    InterruptibleThread,
+    Message,
+    Status,
+    raise_in_thread,
+    KILL_ATTEMPTS,
+    KILL_RETRY_INTERVAL,
+)
+
+try:
+    from concurrent.interpreters import (  # type: ignore
+        Interpreter,
+        Queue,
+        QueueEmpty,
+        ExecutionFailed,
+        create as create_interpreter,
+        create_queue,
+    )
+except ImportError:
+    try:
+        # The same API as a private module on Python 3.13
+        from test.support.interpreters import (  # type: ignore
+            Interpreter,
+            ExecutionFailed,
+            create as create_interpreter,
+        )
+        from test.support.interpreters.queues import (  # type: ignore
+            Queue,
+            QueueEmpty,
+            create as create_queue,
+        )
+    except ImportError:
+        create_interpreter = None
+
+LOGGER = getLogger("pyfarmer.subinterpreters")
+
+POLL_INTERVAL = 0.01
+# Seconds to import the sploit in a new sub-interpreter, not counted in its timeout
+PREPARE_TIMEOUT = 30.0
+# Seconds a killed sub-interpreter has to stop, after them it is a zombie
+KILL_TIMEOUT = KILL_ATTEMPTS * KILL_RETRY_INTERVAL
+# Seconds the exit of the farmer waits for the zombies, a sub-interpreter
+# still running when Python shuts down hangs it forever
+EXIT_TIMEOUT = 10.0
+KILL = "kill"
+TERMINATE = "terminate"
+PROCESS_NAME = "pyfarmer-subinterpreter"
+# Imported without binding any name, the __main__ of a sub-interpreter is the sploit
+PREPARE_CODE = "import sys\nsys.path[:] = {path!r}\n__import__({module!r}, fromlist=['_']).prepare_interpreter({queue})"
+LOAD_CODE = "__import__({module!r}, fromlist=['_']).load_attack({queue})"
+RUN_CODE = "__import__({module!r}, fromlist=['_']).interpreter_main({queue})"
+
+# The function and the arguments of the attack loaded in the sub-interpreter
+_attack: tuple[Callable[..., None], tuple[object, ...]] | None = None
+
+
+def subinterpreters_available() -> bool:
+    """Check if the running Python supports sub-interpreters with their own GIL
+    and cross-interpreter queues, Python 3.13+
+
+    - returns: If SubinterpreterStrategy can use sub-interpreters"""
+    return create_interpreter is not None
+
+
+class QueueWriter(WriteCommunication):
+    """Write part of a cross-interpreter queue, it can be sent to a sub-interpreter.
+    Closing it sends the end of the messages"""
+
+    def __init__(self, queue: Queue, /):
+        """- queue: The queue to write into"""
+        self.__queue = queue
+
+    def send(self, data: Message, /) -> None:
+        self.__queue.put(data)
+
+    def __enter__(self) -> QueueWriter:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.__queue.put(None)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return QueueWriter, (self.__queue,)
+
+
+class QueueReader(ReadCommunication):
+    """Read part of a cross-interpreter queue"""
+
+    def __init__(self, queue: Queue, /):
+        """- queue: The queue to read from"""
+        self.__queue = queue
+        self.__message: Message | None = None
+
+    def poll(self, timeout: None, /) -> None:
+        self.__message = self.__queue.get()
+
+    def recv(self) -> Message:
+        if self.__message is None:
+            raise EOFError()
+        return self.__message
+
+    def __enter__(self) -> QueueReader:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        pass
+
+
+class InterpreterPool:
+    """Idle sub-interpreters ready to run a sploit, each one has already imported it"""
+
+    def __init__(self):
+        self.__idle: list[Interpreter] = []
+        self.__running: set[Thread] = set()
+        self.__closed = False
+        self.__lock = Lock()
+        register(self.close, EXIT_TIMEOUT)
+
+    def acquire(self, runner: Thread, /) -> Interpreter:
+        """Take an idle sub-interpreter, creating a new one if there are none
+
+        - runner: The thread that will run the sub-interpreter until it is released
+
+        - returns: The sub-interpreter"""
+        with self.__lock:
+            self.__running.add(runner)
+            if self.__idle:
+                return self.__idle.pop()
+        try:
+            return self.__create()
+        except:
+            with self.__lock:
+                self.__running.discard(runner)
+            raise
+
+    def __create(self) -> Interpreter:
+        interpreter = create_interpreter()
+        queue = create_queue()
+        preparation = get_preparation_data(PROCESS_NAME)
+        # The authentication key of multiprocessing can't be pickled
+        del preparation["authkey"]
+        queue.put(preparation)
+        try:
+            interpreter.exec(
+                PREPARE_CODE.format(path=path, module=__name__, queue=queue.id)
+            )
+        except:
+            interpreter.close()
+            raise
+        return interpreter
+
+    def release(self, runner: Thread, interpreter: Interpreter, /) -> None:
+        """Give back a sub-interpreter that is not running anymore,
+        it is destroyed if the pool is closed
+
+        - runner: The thread that has run the sub-interpreter
+        - interpreter: The sub-interpreter"""
+        with self.__lock:
+            self.__running.discard(runner)
+            if not self.__closed:
+                self.__idle.append(interpreter)
+                return
+        interpreter.close()
+
+    def close(self, timeout: float, /) -> None:
+        """Wait for the running sub-interpreters and destroy all of them,
+        the ones still running after the timeout are left to the exit of the process
+
+        - timeout: Seconds to wait for the running sub-interpreters"""
+        unregister(self.close)
+        with self.__lock:
+            self.__closed = True
+            idle, self.__idle = self.__idle, []
+            running = [*self.__running]
+        for interpreter in idle:
+            interpreter.close()
+        end = monotonic() + timeout
+        for runner in running:
+            runner.join(max(end - monotonic(), 0))
+        if any(runner.is_alive() for runner in running):
+            LOGGER.warning("Some sub-interpreters are still running after the close")
+
+
+class InterpreterProcess:
+    """A sploit run by a pooled sub-interpreter, with the interface of a Process"""
+
+    def __init__(
+        self,
+        pool: InterpreterPool,
+        function: Callable[..., None],
+        args: tuple[object, ...],
+        /,
+    ):
+        """- pool: The pool of sub-interpreters to use
+        - function: The function to run, it must be importable
+        - args: The arguments of the function, they must be picklable"""
+        self.exitcode: int | None = None
+        self.__pool = pool
+        self.__function = function
+        self.__args = args
+        self.__control = create_queue()
+        self.__ready = Event()
+        self.__thread = Thread(target=self.__run, daemon=True)
+
+    def start(self) -> None:
+        self.__control.put((self.__function, self.__args))
+        self.__thread.start()
+
+    def __run(self) -> None:
+        try:
+            interpreter = self.__pool.acquire(self.__thread)
+        except Exception:
+            LOGGER.error("Cannot import the sploit in a sub-interpreter", exc_info=True)
+            self.exitcode = 1
+            self.__ready.set()
+            return
+        try:
+            # Unpickling the function imports its module
+            interpreter.exec(LOAD_CODE.format(module=__name__, queue=self.__control.id))
+        except ExecutionFailed:
+            LOGGER.error("Cannot load the sploit in a sub-interpreter", exc_info=True)
+            self.exitcode = 1
+        finally:
+            self.__ready.set()
+        if self.exitcode is None:
+            try:
+                interpreter.exec(
+                    RUN_CODE.format(module=__name__, queue=self.__control.id)
+                )
+            except ExecutionFailed:
+                self.exitcode = 1
+            else:
+                self.exitcode = 0
+        self.__pool.release(self.__thread, interpreter)
+
+    def join(self, timeout: float, /) -> None:
+        # The timeout starts when the sploit is imported, like a process already started
+        self.__ready.wait(PREPARE_TIMEOUT)
+        self.__thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self.__thread.is_alive()
+
+    def terminate(self) -> None:
+        if self.is_alive():
+            self.__control.put(TERMINATE)
+
+    def kill(self) -> None:
+        if not self.is_alive():
+            return
+        self.__control.put(KILL)
+        # A sub-interpreter still running when the farmer exits hangs its shutdown,
+        # one still importing the sploit stops as soon as it starts
+        if self.__ready.is_set():
+            self.__thread.join(KILL_TIMEOUT)
+
+
+class SubinterpreterStrategy(SimpleFarmingStrategy):
+    """Strategy to use sub-interpreters, each one has its own GIL and its own copy
+    of the sploit module but they share the process.
+    The sploit must be a function defined at module level.
+    Before Python 3.13 it uses processes"""
+
+    def __init__(self):
+        self.__pool: InterpreterPool | None = None
+        self.__fallback: FarmingStrategy | None = None
+        if subinterpreters_available():
+            self.__pool = InterpreterPool()
+        else:
+            LOGGER.warning(
+                f"Sub-interpreters are not available on Python {version_info.major}.{version_info.minor}, using processes"
+            )
+            self.__fallback = ProcessStrategy()
+
+    def create_communication(
+        self,
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
+        if self.__fallback is not None:
+            return self.__fallback.create_communication()
+        return super().create_communication()
+
+    def create_process(
+        self, function: Callable[..., None], args: tuple[object, ...]
+    ) -> AbstractContextManager[Callable[[float, float], Awaitable[Status]]]:
+        if self.__fallback is not None:
+            return self.__fallback.create_process(function, args)
+        return super().create_process(function, args)
+
+    def _create_communication(
+        self,
+    ) -> tuple[
+        AbstractContextManager[ReadCommunication],
+        AbstractContextManager[WriteCommunication],
+    ]:
+        queue = create_queue()
+        return QueueReader(queue), QueueWriter(queue)
+
+    def _create_process(
+        self, function: Callable[..., None], args: tuple[object, ...]
+    ) -> InterpreterProcess:
+        assert self.__pool is not None
+        return InterpreterProcess(self.__pool, function, args)
+
+    def close(self) -> None:
+        """Wait for the running sub-interpreters, killed ones included,
+        and destroy all of them"""
+        if self.__pool is not None:
+            self.__pool.close(KILL_TIMEOUT)
+
+
+def prepare_interpreter(queue: int, /) -> None:
+    """Import the sploit inside a new sub-interpreter, like a spawned process
+
+    - queue: The id of the queue containing the preparation data"""
+    prepare(Queue(queue).get())
+
+
+def load_attack(queue: int, /) -> None:
+    """Load the function of an attack and its arguments inside a sub-interpreter,
+    before its timeout starts
+
+    - queue: The id of the queue containing the function and its arguments"""
+    global _attack
+    _attack = Queue(queue).get()
+
+
+def interpreter_main(queue: int, /) -> None:
+    """Run the loaded function inside a sub-interpreter, killing it when asked
+
+    - queue: The id of the queue containing the terminate and kill requests"""
+    global _attack
+    assert _attack is not None
+    (function, args), _attack = _attack, None
+    control = Queue(queue)
+    runner = InterruptibleThread(target=function, args=args)
+    runner.start()
+    while runner.is_alive():
+        try:
+            message = control.get_nowait()
+        except QueueEmpty:
+            runner.join(POLL_INTERVAL)
+            continue
+        if message == TERMINATE:
+            runner.terminate()
+            continue
+        assert message == KILL
+        for _ in range(KILL_ATTEMPTS):
+            if runner.ident is None or not runner.is_alive():
+                break
+            raise_in_thread(runner.ident, SystemExit)
+            runner.join(KILL_RETRY_INTERVAL)
+        if runner.is_alive():
+            LOGGER.warning(
+                "Cannot kill a running sub-interpreter, a new zombie is born"
+            )
+            runner.join()
+    if runner.exitcode:
+        raise SystemExit(runner.exitcode)
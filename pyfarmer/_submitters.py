@@ -0,0 +1,248 @@
+from __future__ import annotations
+from asyncio import (
+    Lock,
+    TimeoutError,
+    StreamReader,
+    StreamWriter,
+    open_connection,
+    wait_for,
+)
+from collections import Counter
+from json import dumps
+from re import compile, Pattern
+from time import time
+from typing import Protocol, TextIO
+from urllib.parse import urljoin
+from logging import getLogger
+
+from httpx import AsyncClient
+
+from pyfarmer._encoding import FlagEncoder
+from pyfarmer._endpoints import FarmEndpoints
+
+LOGGER = getLogger("pyfarmer.submitters")
+
+DEFAULT_SUBMIT_TIMEOUT = 10.0
+# Searched in the answer without the echoed flag, not after a negation
+# so that "Flag not accepted" is rejected while "<flag> OK" is accepted
+DEFAULT_ACCEPTED = r"(?i)(?<!not )(?<!no )\b(accepted\b|ok\b|congrat)"
+QUEUED = "queued"
+ACCEPTED = "accepted"
+REJECTED = "denied"
+WRITTEN = "written"
+
+
+class Submitter(Protocol):
+    """Where the flags found by the sploits are sent"""
+
+    concurrency: int
+    """Maximum number of submissions running at the same time"""
+
+    async def submit(
+        self, flags: list[tuple[str, str]], /, *, alias: str
+    ) -> Counter[str]:
+        """Submit a batch of flags, raise an OSError or an HTTPError
+        to submit them again later
+
+        - flags: The targets and their flags
+        - alias: The alias of the sploit that found them
+
+        - returns: The number of flags for every outcome, like accepted or rejected"""
+        ...
+
+    async def aclose(self) -> None:
+        """Release the resources of the submitter, called when the farmer stops"""
+        ...
+
+
+class FarmSubmitter(Submitter):
+    """Sends the flags to the Destructive Farm servers, that submit them later"""
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        farms: FarmEndpoints,
+        /,
+        *,
+        token: str | None,
+        encoder: FlagEncoder,
+    ):
+        """- client: The http client to use
+        - farms: The farm servers to balance the submissions across
+        - token: The api token of the farm, None to not use any token
+        - encoder: How to serialize the flags"""
+        self.concurrency = len(farms)
+        self.__client = client
+        self.__farms = farms
+        self.__token = token
+        self.__encoder = encoder
+
+    async def submit(
+        self, flags: list[tuple[str, str]], /, *, alias: str
+    ) -> Counter[str]:
+        async with self.__farms.request() as server_url:
+            await post_flags(
+                self.__client,
+                flags,
+                server_url=server_url,
+                alias=alias,
+                token=self.__token,
+                encoder=self.__encoder,
+            )
+        return Counter({QUEUED: len(flags)})
+
+    async def aclose(self) -> None:
+        pass
+
+
+async def post_flags(
+    client: AsyncClient,
+    flags: list[tuple[str, str]],
+    /,
+    *,
+    server_url: str,
+    alias: str,
+    token: str | None,
+    encoder: FlagEncoder,
+):
+    LOGGER.info(f"Submitting {len(flags)} flags")
+    body, headers = encoder.encode(flags, alias=alias)
+    if token is not None:
+        headers["X-Token"] = token
+    response = await client.post(
+        urljoin(server_url, "/api/post_flags"),
+        content=body,
+        headers=headers,
+    )
+    if response.status_code != 200:
+        LOGGER.error(
+            f"Farm post_flags responded with non 200 status code: {response.status_code} {response.text}"
+        )
+    response.raise_for_status()
+
+
+class TcpSubmitter(Submitter):
+    """Submits the flags directly to the checksystem of the game
+    with the usual line based protocol: a flag per line,
+    the checksystem answers with a line for every flag.
+    The connection is kept open between the submissions"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        /,
+        *,
+        token: str | None = None,
+        banner_lines: int = 0,
+        accepted: str | Pattern[str] = DEFAULT_ACCEPTED,
+        timeout: float = DEFAULT_SUBMIT_TIMEOUT,
+    ):
+        """- host: The host of the checksystem
+        - port: The port of the checksystem
+        - token: The team token sent as the first line, None to not send it
+        - banner_lines: Lines sent by the checksystem after connecting, and after the token
+        - accepted: Regex searched in the answers of the accepted flags without the flag,
+                    by default accepted, ok or congratulations not after a negation
+        - timeout: Seconds to wait for the connection and for the answers"""
+        self.concurrency = 1
+        self.__host = host
+        self.__port = port
+        self.__token = token
+        self.__banner_lines = banner_lines
+        self.__accepted = compile(accepted)
+        self.__timeout = timeout
+        self.__connection: tuple[StreamReader, StreamWriter] | None = None
+        self.__lock = Lock()
+
+    async def __connect(self) -> tuple[StreamReader, StreamWriter]:
+        if self.__connection is not None:
+            return self.__connection
+        reader, writer = await open_connection(self.__host, self.__port)
+        try:
+            if self.__token is not None:
+                writer.write(f"{self.__token}\n".encode())
+            for _ in range(self.__banner_lines):
+                await reader.readline()
+        except:
+            writer.close()
+            raise
+        self.__connection = reader, writer
+        return self.__connection
+
+    async def __exchange(self, flags: list[tuple[str, str]], /) -> list[str]:
+        reader, writer = await self.__connect()
+        writer.write("".join(f"{flag}\n" for _, flag in flags).encode())
+        await writer.drain()
+        answers: list[str] = []
+        for _ in flags:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError("The checksystem closed the connection")
+            answers.append(line.decode(errors="replace").strip())
+        return answers
+
+    async def submit(
+        self, flags: list[tuple[str, str]], /, *, alias: str
+    ) -> Counter[str]:
+        async with self.__lock:
+            try:
+                answers = await wait_for(self.__exchange(flags), self.__timeout)
+            except TimeoutError as e:
+                # The connection is left in the middle of an answer, and before 3.11
+                # asyncio.TimeoutError is not an OSError that the uploader retries
+                await self.aclose()
+                raise ConnectionError("The checksystem did not answer in time") from e
+            except OSError:
+                await self.aclose()
+                raise
+        results: Counter[str] = Counter()
+        for (_, flag), answer in zip(flags, answers):
+            if self.__accepted.search(answer.replace(flag, "")) is not None:
+                results[ACCEPTED] += 1
+            else:
+                LOGGER.info(f"Flag {flag} rejected: {answer}")
+                results[REJECTED] += 1
+        return results
+
+    async def aclose(self) -> None:
+        if self.__connection is None:
+            return
+        _, writer = self.__connection
+        self.__connection = None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+class FileSubmitter(Submitter):
+    """Appends the flags to a file, a JSON object per line
+    with the flag, the team, the sploit and the time"""
+
+    def __init__(self, path: str, /):
+        """- path: The path of the file"""
+        self.concurrency = 1
+        self.__path = path
+        self.__file: TextIO | None = None
+
+    async def submit(
+        self, flags: list[tuple[str, str]], /, *, alias: str
+    ) -> Counter[str]:
+        if self.__file is None:
+            self.__file = open(self.__path, "a")
+        now = time()
+        self.__file.write(
+            "".join(
+                dumps({"flag": flag, "team": team, "sploit": alias, "time": now}) + "\n"
+                for team, flag in flags
+            )
+        )
+        self.__file.flush()
+        return Counter({WRITTEN: len(flags)})
+
+    async def aclose(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from math import floor
+from typing import NamedTuple
+
+DEFAULT_TICK_OFFSET = 1.0
+
+
+class Tick(NamedTuple):
+    """The rounds of the game, at the start of every round the checksystem
+    places new flags in the services"""
+
+    length: float
+    """Seconds of a round"""
+    start: float
+    """The time.time() when a round started, any round is fine"""
+    offset: float = DEFAULT_TICK_OFFSET
+    """Seconds after the start of a round when the new flags are surely placed"""
+
+    def round_launch(self, now: float, /) -> float:
+        """Find when the attacks of the current round can start
+
+        - now: The current time
+
+        - returns: The start of the current round plus the offset, at most now"""
+        rounds = floor((now - self.start - self.offset) / self.length)
+        return self.start + self.offset + rounds * self.length
+
+    def next_launch(
+        self, now: float, timeout: float, /, *, previous: float | None = None
+    ) -> float:
+        """Find the round to attack next, the current one if its attacks
+        can still be launched, so that a cycle running a bit late
+        doesn't skip a whole round
+
+        - now: The current time
+        - timeout: The sploit timeout
+        - previous: The launch of the last round attacked, None if there is none
+
+        - returns: The start of the round plus the offset, before now if it is the current one
+        """
+        launch = self.round_launch(now)
+        if now > self.window(launch, timeout) or (
+            previous is not None and launch <= previous
+        ):
+            launch += self.length
+        return launch
+
+    def window(self, launch: float, timeout: float, /) -> float:
+        """Find until when the attacks of a round can be launched,
+        so that they end before the flags of the next round are placed
+
+        - launch: The start of the launches of the round
+        - timeout: The sploit timeout
+
+        - returns: The time of the last launch, at least the launch time"""
+        return max(launch + self.length - self.offset - timeout, launch)
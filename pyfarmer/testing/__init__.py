@@ -0,0 +1,66 @@
+"""
+Simulators to stress the farmer on a single machine
+
+> ```python
+> from pyfarmer import async_farm, ProcessStrategy
+> from pyfarmer.testing import MockFarm, MockTarget, Behaviour
+>
+>
+> async def stress(sploit):
+>     async with MockTarget(behaviour=Behaviour.SLOW, delay=2) as target, MockFarm(
+>         {"TEAMS": {"team": target.host}, "FLAG_LIFETIME": 60},
+>         latency=0.5,
+>         error_rate=0.1,
+>     ) as farm:
+>         await async_farm(
+>             sploit, ProcessStrategy(), server_url=farm.url, alias="test", cycles=1
+>         )
+>     print(farm.stats)
+> ```
+
+Or simulate the scheduler in virtual time, without running any sploit
+
+> ```python
+> from pyfarmer.testing import simulate, SimulatedAttack
+>
+> report = simulate(
+>     [f"10.60.{i}.1" for i in range(1000)],
+>     lambda target: SimulatedAttack(duration=5),
+>     attack_period=120,
+>     timeout=10,
+>     cycles=30,
+> )
+> print("\n".join(report.summary()))
+> ```
+
+Requires aiohttp, install it with `pip install pyfarmer[testing]`
+"""
+
+from pyfarmer.testing._farm import MockFarm, SubmittedFlag
+from pyfarmer.testing._targets import MockTarget, Behaviour, random_flag
+from pyfarmer.testing._simulator import (
+    simulate,
+    SimulatedAttack,
+    SimulatedStrategy,
+    SimulationReport,
+    Cycle,
+    Launch,
+    VirtualEventLoop,
+    VirtualClock,
+)
+
+__all__ = [
+    "MockFarm",
+    "SubmittedFlag",
+    "MockTarget",
+    "Behaviour",
+    "random_flag",
+    "simulate",
+    "SimulatedAttack",
+    "SimulatedStrategy",
+    "SimulationReport",
+    "Cycle",
+    "Launch",
+    "VirtualEventLoop",
+    "VirtualClock",
+]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from asyncio import sleep
+from collections import Counter, deque
+from random import Random
+from socket import socket, AF_INET, SOCK_STREAM
+from time import monotonic
+from typing import NamedTuple, Any
+from logging import getLogger
+
+try:
+    from aiohttp.web import (
+        AppRunner,
+        SockSite,
+        Application,
+        Response,
+        Request,
+        RouteTableDef,
+        json_response,
+    )
+except ImportError as e:
+    raise ImportError(
+        "pyfarmer.testing requires aiohttp, install it with pip install pyfarmer[testing]"
+    ) from e
+
+LOGGER = getLogger("pyfarmer.testing")
+
+
+class SubmittedFlag(NamedTuple):
+    """A flag received by the mock farm"""
+
+    sploit: str
+    """The alias of the sploit"""
+    team: str
+    """The attacked team"""
+    flag: str
+    """The submitted flag"""
+
+
+class MockFarm:
+    """Destructive Farm server with configurable faults, to use as an async context manager.
+    It also accepts the compact and gzip post_flags bodies"""
+
+    def __init__(
+        self,
+        config: dict[str, Any] | str,
+        /,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        rate_limit: float | None = None,
+        slow_consumer: float = 0,
+        token: str | None = None,
+        random: Random | None = None,
+    ):
+        """- config: The response of /api/get_config, a string is sent as it is
+        - host: The address to listen on
+        - port: The port to listen on, 0 to choose a free one
+        - latency: Seconds to wait before answering every request
+        - jitter: Maximum random seconds added to the latency
+        - error_rate: Probability of answering with a 500 status code
+        - rate_limit: Maximum number of requests per second,
+                      the others are answered with a 429 status code, None for no limit
+        - slow_consumer: Seconds spent processing every submitted flag
+        - token: The token required in the X-Token header, None to accept every request
+        - random: The random generator to use, None for a new one"""
+        self.config = config
+        """The response of /api/get_config, a string is sent as it is,
+        can be changed while running"""
+        self.latency = latency
+        """Seconds to wait before answering every request"""
+        self.jitter = jitter
+        """Maximum random seconds added to the latency"""
+        self.error_rate = error_rate
+        """Probability of answering with a 500 status code"""
+        self.rate_limit = rate_limit
+        """Maximum number of requests per second"""
+        self.slow_consumer = slow_consumer
+        """Seconds spent processing every submitted flag"""
+        self.flags: list[SubmittedFlag] = []
+        """The flags received so far"""
+        self.stats: Counter[str] = Counter()
+        """Number of requests by endpoint and outcome"""
+        self.__host = host
+        self.__port = port
+        self.__token = token
+        self.__random = random if random is not None else Random()
+        self.__requests: deque[float] = deque()
+        self.__runner: AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        """The url of the running server"""
+        return f"http://{self.__host}:{self.__port}"
+
+    async def __fault(self, request: Request, endpoint: str) -> Response | None:
+        self.stats[endpoint] += 1
+        delay = self.latency + self.__random.uniform(0, self.jitter)
+        if delay > 0:
+            await sleep(delay)
+        if self.__token is not None and request.headers.get("X-Token") != self.__token:
+            self.stats["unauthorized"] += 1
+            return Response(status=403, text="Invalid token")
+        if self.rate_limit is not None:
+            now = monotonic()
+            while self.__requests and self.__requests[0] <= now - 1:
+                self.__requests.popleft()
+            if len(self.__requests) >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return Response(status=429, text="Too many requests")
+            self.__requests.append(now)
+        if self.__random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return Response(status=500, text="Internal server error")
+        return None
+
+    def _create_app(self) -> Application:
+        routes = RouteTableDef()
+
+        @routes.get("/api/get_config")
+        async def _(request: Request) -> Response:
+            fault = await self.__fault(request, "get_config")
+            if fault is not None:
+                return fault
+            if isinstance(self.config, str):
+                return Response(text=self.config, content_type="application/json")
+            return json_response(self.config)
+
+        @routes.post("/api/post_flags")
+        async def _(request: Request) -> Response:
+            fault = await self.__fault(request, "post_flags")
+            if fault is not None:
+                return fault
+            data = await request.json()
+            if isinstance(data, dict):
+                data = [
+                    {"flag": flag, "sploit": data["sploit"], "team": team}
+                    for team, flag in data["flags"]
+                ]
+            if self.slow_consumer > 0:
+                await sleep(self.slow_consumer * len(data))
+            self.flags += [
+                SubmittedFlag(
+                    sploit=item["sploit"], team=item["team"], flag=item["flag"]
+                )
+                for item in data
+            ]
+            return Response()
+
+        app = Application()
+        app.add_routes(routes)
+        return app
+
+    async def __aenter__(self) -> MockFarm:
+        sock = socket(AF_INET, SOCK_STREAM)
+        sock.bind((self.__host, self.__port))
+        self.__port = sock.getsockname()[1]
+        self.__runner = AppRunner(self._create_app())
+        await self.__runner.setup()
+        await SockSite(self.__runner, sock).start()
+        LOGGER.info(f"Mock farm listening on {self.url}")
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        assert self.__runner is not None
+        await self.__runner.cleanup()
+        self.__runner = None
@@ -0,0 +1,395 @@
+from __future__ import annotations
+from asyncio import SelectorEventLoop, get_running_loop, sleep
+from collections import Counter
+from collections.abc import AsyncIterable, Awaitable, Callable, Sequence
+from contextlib import AbstractContextManager, contextmanager
+from io import StringIO
+from selectors import BaseSelector, DefaultSelector, SelectorKey
+from typing import Any, NamedTuple, TextIO
+
+from anyio import create_memory_object_stream
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from aiotools import TaskGroup
+
+from pyfarmer._bench import percentile
+from pyfarmer._clock import Clock
+from pyfarmer._pyfarmer import (
+    DEFAULT_POOL_SIZE,
+    FLAG_BUFFER_SIZE,
+    Mode,
+    WorkerSettings,
+    main_loop,
+)
+from pyfarmer._reporter import Reporter
+from pyfarmer._scheduling import SchedulingPolicy, RandomPolicy
+from pyfarmer._tick import Tick
+from pyfarmer._strategies import (
+    FarmingStrategy,
+    Message,
+    Status,
+    ThreadChannel,
+    WriteCommunication,
+)
+
+PERCENTILES = (50, 99)
+
+
+class VirtualSelector(BaseSelector):
+    """Selector that, instead of waiting for the next timer, moves the time forward"""
+
+    def __init__(self):
+        self.now = 0.0
+        """The virtual time in seconds"""
+        self.__selector = DefaultSelector()
+
+    def register(self, fileobj: Any, events: int, data: Any = None) -> SelectorKey:
+        return self.__selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj: Any) -> SelectorKey:
+        return self.__selector.unregister(fileobj)
+
+    def modify(self, fileobj: Any, events: int, data: Any = None) -> SelectorKey:
+        return self.__selector.modify(fileobj, events, data)
+
+    def select(self, timeout: float | None = None) -> list[tuple[SelectorKey, int]]:
+        events = self.__selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            raise RuntimeError("The simulation is blocked, nothing is scheduled")
+        self.now += timeout
+        return []
+
+    def get_map(self) -> Any:
+        return self.__selector.get_map()
+
+    def close(self) -> None:
+        self.__selector.close()
+
+
+class VirtualEventLoop(SelectorEventLoop):
+    """Event loop running in virtual time, the time jumps to the next timer
+    as soon as every task is waiting, so hours of sleeps take no time.
+    Threads and subprocesses keep running in real time, don't use them"""
+
+    def __init__(self):
+        self.__selector = VirtualSelector()
+        super().__init__(self.__selector)
+
+    def time(self) -> float:
+        return self.__selector.now
+
+
+class VirtualClock(Clock):
+    """Clock of the running VirtualEventLoop"""
+
+    def time(self) -> float:
+        return get_running_loop().time()
+
+    async def sleep(self, seconds: float, /) -> None:
+        await sleep(seconds)
+
+
+class SimulatedAttack(NamedTuple):
+    """Outcome of a simulated attack"""
+
+    duration: float
+    """Seconds the sploit would take to complete"""
+    flags: int = 1
+    """Flags sent when the sploit completes"""
+    error: bool = False
+    """If the sploit terminates with an error"""
+    kill_delay: float = 0
+    """Seconds the sploit takes to die after its timeout, like a busy machine"""
+
+
+class Launch(NamedTuple):
+    """A simulated attack launched by the scheduler"""
+
+    target: str
+    """The attacked target"""
+    start: float
+    """Virtual time of the launch"""
+    end: float | None
+    """Virtual time of the end, None if it is still running"""
+    status: Status | None
+    """The exit status, None if it is still running"""
+
+
+class SimulatedStrategy(FarmingStrategy):
+    """Strategy that doesn't run the sploit, every attack waits the duration
+    given by a model and sends its flags"""
+
+    def __init__(self, model: Callable[[str], SimulatedAttack], /):
+        """- model: Gives the outcome of an attack against a target"""
+        self.model = model
+        """Gives the outcome of an attack against a target"""
+        self.launches: list[Launch] = []
+        """The attacks in order of launch"""
+
+    def create_communication(
+        self,
+    ) -> tuple[AsyncIterable[Message], AbstractContextManager[WriteCommunication]]:
+        channel = ThreadChannel(get_running_loop())
+        return channel.receive(), channel
+
+    @contextmanager
+    def create_process(
+        self, function: Callable[..., None], args: tuple[Any, ...], /
+    ) -> Any:
+        # The arguments of process_main
+        _, connection, target, _ = args
+        attack = self.model(target)
+        loop = get_running_loop()
+        index = len(self.launches)
+        self.launches.append(Launch(target, loop.time(), None, None))
+
+        async def join(timeout: float, grace: float = 0) -> Status:
+            if attack.duration > timeout:
+                await sleep(timeout + grace + attack.kill_delay)
+                status = Status.TIMEOUT
+            else:
+                await sleep(attack.duration)
+                for i in range(attack.flags):
+                    connection.send(f"{target}-{i}")
+                status = Status.ERROR if attack.error else Status.OK
+            self.launches[index] = self.launches[index]._replace(
+                end=loop.time(), status=status
+            )
+            return status
+
+        yield join
+
+
+class Cycle(NamedTuple):
+    """A simulated cycle of slow mode"""
+
+    start: float
+    """Virtual time of the start"""
+    end: float
+    """Virtual time when every attack of the cycle has ended"""
+    deadline: float
+    """Virtual time when the cycle should have ended"""
+    jitter: list[float]
+    """Seconds between the planned and the actual launch of every attack"""
+
+    @property
+    def overrun(self) -> float:
+        """Seconds the cycle lasted past its deadline"""
+        return max(self.end - self.deadline, 0)
+
+
+class SimulationReport:
+    """Results of a simulation of the scheduler"""
+
+    def __init__(
+        self,
+        launches: list[Launch],
+        cycles: list[Cycle],
+        /,
+        *,
+        pool_size: int,
+        elapsed: float,
+        flags: int,
+    ):
+        self.launches = launches
+        """The attacks in order of launch"""
+        self.cycles = cycles
+        """The cycles of slow mode"""
+        self.pool_size = pool_size
+        """The number of slots of the pool"""
+        self.elapsed = elapsed
+        """Virtual seconds taken by the simulation"""
+        self.flags = flags
+        """Flags sent to the farm"""
+
+    @property
+    def jitter(self) -> list[float]:
+        """Seconds between the planned and the actual launch
+        of every attack in slow mode, positive when late"""
+        return [jitter for cycle in self.cycles for jitter in cycle.jitter]
+
+    @property
+    def utilization(self) -> float:
+        """Average fraction of the slots of the pool running an attack"""
+        if self.elapsed <= 0:
+            return 0
+        busy = sum(
+            launch.end - launch.start
+            for launch in self.launches
+            if launch.end is not None
+        )
+        return busy / (self.pool_size * self.elapsed)
+
+    @property
+    def peak_running(self) -> int:
+        """Maximum number of attacks running at the same time"""
+        events = sorted(
+            [(launch.start, 1) for launch in self.launches]
+            + [(launch.end, -1) for launch in self.launches if launch.end is not None]
+        )
+        running = peak = 0
+        for _, change in events:
+            running += change
+            peak = max(peak, running)
+        return peak
+
+    def summary(self) -> list[str]:
+        """Describe the results
+
+        - returns: The lines of the summary"""
+        stats = Counter(launch.status for launch in self.launches)
+        lines = [
+            f"attacks: {len(self.launches)} "
+            + " ".join(f"{status.name}: {stats[status]}" for status in Status)
+            + f" flags: {self.flags}",
+            f"slot utilization: {self.utilization:.1%} of {self.pool_size} slots, "
+            f"peak {self.peak_running} running",
+        ]
+        jitter = sorted(abs(value) for value in self.jitter)
+        if jitter:
+            lines.append(
+                "launch jitter: "
+                + " ".join(f"p{p} {percentile(jitter, p):.3f}s" for p in PERCENTILES)
+                + f" max {jitter[-1]:.3f}s"
+            )
+        if self.cycles:
+            overruns = [cycle.overrun for cycle in self.cycles]
+            late = sum(1 for overrun in overruns if overrun > 0)
+            lines.append(
+                f"cycle overrun: mean {sum(overruns) / len(overruns):.3f}s "
+                f"max {max(overruns):.3f}s, {late}/{len(overruns)} cycles late"
+            )
+        lines.append(f"simulated time: {self.elapsed:.1f}s")
+        return lines
+
+
+class RecordingPolicy(SchedulingPolicy):
+    """Remembers when every cycle is planned"""
+
+    def __init__(self, policy: SchedulingPolicy, /):
+        self.policy = policy
+        self.plans: list[tuple[float, int]] = []
+        """Virtual time and number of attacks of every planned cycle"""
+
+    def plan(self, targets: list[str], /) -> list[str]:
+        planned = self.policy.plan(targets)
+        self.plans.append((get_running_loop().time(), len(planned)))
+        return planned
+
+    def update(self, target: str, status: Status, flags: int, /) -> None:
+        self.policy.update(target, status, flags)
+
+
+def simulate(
+    targets: Sequence[str],
+    model: Callable[[str], SimulatedAttack],
+    /,
+    *,
+    attack_period: float,
+    timeout: float,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    mode: Mode = Mode.SLOW,
+    cycles: int = 1,
+    policy: SchedulingPolicy | None = None,
+    grace: float = 0,
+    tick: Tick | None = None,
+    stream: TextIO | None = None,
+) -> SimulationReport:
+    """Run the scheduler of the farmer in virtual time against simulated attacks,
+    thousands of targets and hours of cycles take seconds
+
+    - targets: The targets to attack
+    - model: Gives the outcome of an attack against a target
+    - attack_period: Seconds of a cycle of slow mode
+    - timeout: The sploit timeout
+    - pool_size: The maximum number of parallel attacks of the sprint
+    - mode: Which steps to perform
+    - cycles: Number of cycles of slow mode
+    - policy: How to choose the targets of each cycle, None to attack all of them in a random order
+    - grace: Seconds before the timeout when the sploit is asked to stop
+    - tick: The rounds of the game to align the cycles to, their start is in virtual time,
+            None to not align them
+    - stream: Where to write the output of the farmer, None to discard it
+
+    - returns: The report of the simulation"""
+    strategy = SimulatedStrategy(model)
+    recorder = RecordingPolicy(policy if policy is not None else RandomPolicy())
+    flags = 0
+
+    async def drain(stream: MemoryObjectReceiveStream[tuple[str, str]]):
+        nonlocal flags
+        with stream:
+            async for _ in stream:
+                flags += 1
+
+    async def run() -> float:
+        send_stream: MemoryObjectSendStream[tuple[str, str]]
+        receive_stream: MemoryObjectReceiveStream[tuple[str, str]]
+        send_stream, receive_stream = create_memory_object_stream(FLAG_BUFFER_SIZE)
+        async with Reporter(
+            stream=stream if stream is not None else StringIO(), live=False
+        ) as reporter, TaskGroup() as group:
+            group.create_task(drain(receive_stream))
+            group.create_task(
+                main_loop(
+                    lambda _: None,
+                    send_stream,
+                    [*targets],
+                    pool_size=pool_size,
+                    attack_period=attack_period,
+                    timeout=timeout,
+                    strategy=strategy,
+                    mode=mode,
+                    reporter=reporter,
+                    policy=recorder,
+                    settings=WorkerSettings(grace=grace),
+                    cycles=cycles,
+                    clock=VirtualClock(),
+                    tick=tick,
+                )
+            )
+        return get_running_loop().time()
+
+    loop = VirtualEventLoop()
+    try:
+        elapsed = loop.run_until_complete(run())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+    plans = recorder.plans if mode == Mode.SLOW else recorder.plans[1:]
+    launched = 0 if mode == Mode.SLOW else recorder.plans[0][1]
+    report_cycles: list[Cycle] = []
+    for k, (start, attacks) in enumerate(plans):
+        if tick is None:
+            first = plans[0][0] + k * attack_period
+            slot = attack_period / max(attacks, 1)
+            deadline = first + attack_period
+        else:
+            # The cycle is planned when the round is launched,
+            # or later when the previous cycle ran late
+            launch = tick.round_launch(start)
+            first = start
+            slot = (tick.window(launch, timeout) - start) / max(attacks, 1)
+            deadline = launch + tick.length
+        report_cycles.append(
+            Cycle(
+                start=start,
+                end=plans[k + 1][0] if k + 1 < len(plans) else elapsed,
+                deadline=deadline,
+                jitter=[
+                    launch.start - (first + i * slot)
+                    for i, launch in enumerate(
+                        strategy.launches[launched : launched + attacks]
+                    )
+                ],
+            )
+        )
+        launched += attacks
+    return SimulationReport(
+        strategy.launches,
+        report_cycles,
+        pool_size=pool_size,
+        elapsed=elapsed,
+        flags=flags,
+    )
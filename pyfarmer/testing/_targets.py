@@ -0,0 +1,128 @@
+from __future__ import annotations
+from asyncio import (
+    AbstractServer,
+    Event,
+    StreamReader,
+    StreamWriter,
+    sleep,
+    start_server,
+)
+from collections import Counter
+from collections.abc import Callable
+from enum import Enum
+from string import ascii_uppercase, digits
+from logging import getLogger
+
+from pyfarmer._utils import random_string
+
+LOGGER = getLogger("pyfarmer.testing")
+
+
+class Behaviour(Enum):
+    """How a simulated service answers to a connection"""
+
+    OK = "ok"
+    """Answer immediately with the flags"""
+    SLOW = "slow"
+    """Answer with the flags after a delay"""
+    HANG = "hang"
+    """Never answer and keep the connection open"""
+    DROP = "drop"
+    """Close the connection without answering"""
+
+
+def random_flag() -> str:
+    """Generate a flag in the default format of Destructive Farm
+
+    - returns: The flag"""
+    return random_string(31, charset=ascii_uppercase + digits) + "="
+
+
+class MockTarget:
+    """Vulnerable service of a simulated team, to use as an async context manager.
+    It reads a line, or a whole request if it is HTTP, and answers with its flags,
+    one per line"""
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        behaviour: Behaviour = Behaviour.OK,
+        delay: float = 1,
+        flags: int = 1,
+        flag_factory: Callable[[], str] = random_flag,
+    ):
+        """- host: The address to listen on
+        - port: The port to listen on, 0 to choose a free one
+        - behaviour: How to answer to the connections
+        - delay: Seconds to wait before answering when the behaviour is SLOW
+        - flags: Number of flags sent for every connection
+        - flag_factory: The function generating the flags"""
+        self.behaviour = behaviour
+        """How to answer to the connections, can be changed while running"""
+        self.delay = delay
+        """Seconds to wait before answering when the behaviour is SLOW"""
+        self.flags = flags
+        """Number of flags sent for every connection"""
+        self.issued: list[str] = []
+        """The flags sent so far"""
+        self.stats: Counter[Behaviour] = Counter()
+        """Number of connections handled with every behaviour"""
+        self.host = host
+        """The address of the service"""
+        self.port = port
+        """The port of the service"""
+        self.__flag_factory = flag_factory
+        self.__server: AbstractServer | None = None
+        self.__closed: Event | None = None
+
+    @property
+    def address(self) -> str:
+        """The address of the service in the host:port format"""
+        return f"{self.host}:{self.port}"
+
+    async def __handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        behaviour = self.behaviour
+        self.stats[behaviour] += 1
+        try:
+            line = await reader.readline()
+            http = line.rstrip().endswith((b"HTTP/1.0", b"HTTP/1.1"))
+            if http:
+                while (await reader.readline()).strip():
+                    pass
+            if behaviour == Behaviour.DROP:
+                return
+            if behaviour == Behaviour.HANG:
+                assert self.__closed is not None
+                await self.__closed.wait()
+                return
+            if behaviour == Behaviour.SLOW:
+                await sleep(self.delay)
+            flags = [self.__flag_factory() for _ in range(self.flags)]
+            self.issued += flags
+            body = "".join(f"{flag}\n" for flag in flags).encode()
+            if http:
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                )
+            writer.write(body)
+            await writer.drain()
+        except ConnectionError:
+            LOGGER.info("Connection closed by the client")
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> MockTarget:
+        self.__closed = Event()
+        self.__server = await start_server(self.__handle, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        assert self.__server is not None and self.__closed is not None
+        self.__closed.set()
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__server = None
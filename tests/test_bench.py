@@ -0,0 +1,50 @@
+from __future__ import annotations
+from pytest import mark, CaptureFixture
+from pyfarmer import ProcessStrategy, Status
+from pyfarmer._bench import BenchReport, parse_targets, percentile
+from pyfarmer._pyfarmer import main
+
+
+def test_parse_targets():
+    assert parse_targets("10.60.1-3.1") == ["10.60.1.1", "10.60.2.1", "10.60.3.1"]
+    assert parse_targets("127.0.0.1, vulnbox-1,") == ["127.0.0.1", "vulnbox-1"]
+    assert len(parse_targets("10.0-1.0.1-5")) == 10
+
+
+def test_bench_report():
+    report = BenchReport()
+    for i in range(100):
+        report.add(Status.OK if i < 90 else Status.TIMEOUT, i % 3, (i + 1) / 100)
+    assert percentile(sorted(report.latencies), 50) == 0.5
+    assert percentile(sorted(report.latencies), 99) == 0.99
+    summary = "\n".join(report.summary())
+    assert "p90 0.900s" in summary
+    assert "TIMEOUT: 10/100 (10.0%)" in summary
+    assert "max 2" in summary
+
+
+@mark.asyncio
+async def test_bench_mode(capsys: CaptureFixture[str]):
+    def sploit(ip: str):
+        yield ip
+        if ip.endswith("3"):
+            raise Exception()
+
+    await main(
+        sploit,
+        ProcessStrategy(),
+        ip=None,
+        server_url=None,
+        alias=None,
+        token=None,
+        pool_size=2,
+        attack_period=None,
+        timeout=None,
+        mode=None,  # type: ignore
+        bench="10.0.0.1-3",
+        runs=6,
+    )
+    output = capsys.readouterr().out
+    assert "OK: 4/6" in output
+    assert "ERROR: 2/6" in output
+    assert "flags per run: mean 1.00" in output
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from asyncio import get_running_loop, create_task, sleep
+from collections.abc import AsyncIterable
+from io import StringIO
+from time import time
+from anyio import create_memory_object_stream
+from pytest import mark, MonkeyPatch
+from pyfarmer import (
+    Prewarmer,
+    ProcessStrategy,
+    ThreadStrategy,
+    RandomPolicy,
+    Reporter,
+    Status,
+    connection,
+    http_client,
+)
+from pyfarmer._pyfarmer import WorkerSettings, process_main, slow_mode
+from pyfarmer._strategies import Message
+from pyfarmer.testing import MockTarget, Behaviour
+
+
+def read_flags(host: str, port: int) -> list[str]:
+    with connection(host, port) as sock:
+        sock.sendall(b"hello\n")
+        # Only one line, forked processes also inherit the server side of the connection
+        return sock.makefile().readline().split()
+
+
+@mark.asyncio
+async def test_prewarmed_connection():
+    async with MockTarget() as target:
+        prewarmer = Prewarmer([target.port])
+        await prewarmer.prewarm(target.host)
+        flags = await get_running_loop().run_in_executor(
+            None, read_flags, target.host, target.port
+        )
+        assert flags == target.issued
+        assert target.stats[Behaviour.OK] == 1
+        prewarmer.release(target.host)
+        assert await get_running_loop().run_in_executor(
+            None, read_flags, target.host, target.port
+        )
+        assert target.stats[Behaviour.OK] == 2
+
+
+@mark.asyncio
+async def test_prewarmed_http_client():
+    async with MockTarget() as target:
+        prewarmer = Prewarmer([target.port])
+        await prewarmer.prewarm(target.host)
+        client = http_client(target.host, target.port)
+        assert client is http_client(target.host, target.port)
+        response = await get_running_loop().run_in_executor(None, client.get, "/")
+        assert response.text.split() == target.issued
+        assert target.stats[Behaviour.OK] == 1
+        prewarmer.release(target.host)
+
+
+@mark.asyncio
+async def test_http_client_without_warm_backend(monkeypatch: MonkeyPatch):
+    # An httpcore without the private SyncStream
+    monkeypatch.setattr("pyfarmer._connections.SyncStream", None)
+    async with MockTarget() as target:
+        prewarmer = Prewarmer([target.port])
+        await prewarmer.prewarm(target.host)
+        client = http_client(target.host, target.port)
+        response = await get_running_loop().run_in_executor(None, client.get, "/")
+        assert response.text.split() == target.issued
+        prewarmer.release(target.host)
+
+
+@mark.asyncio
+async def test_prewarmed_process():
+    async with MockTarget() as target, MockTarget(host="127.0.0.2") as other:
+
+        def sploit(ip: str):
+            yield from read_flags(ip, target.port)
+
+        prewarmer = Prewarmer([target.port, other.port])
+        await prewarmer.prewarm(target.host)
+        await prewarmer.prewarm(other.host)
+        strategy = ProcessStrategy(start_method="fork")
+        read, write = strategy.create_communication()
+        messages = create_task(collect(read))
+        with write as w:
+            with strategy.create_process(
+                process_main, (sploit, w, target.host, WorkerSettings(None))
+            ) as process:
+                prewarmer.release(target.host)
+                assert await process(10) == Status.OK
+        prewarmer.release(other.host)
+        assert await messages == target.issued
+        assert target.stats[Behaviour.OK] == 1
+
+
+async def collect(read: AsyncIterable[Message]) -> list[Message]:
+    return [message async for message in read]
+
+
+class UnreachablePrewarmer(Prewarmer):
+    async def prewarm(self, target: str, /, *, delay: float = 0) -> None:
+        await sleep(delay + 2)
+
+
+@mark.asyncio
+async def test_unreachable_prewarm():
+    started: list[float] = []
+
+    def sploit(ip: str):
+        started.append(time())
+        yield ip
+
+    send, receive = create_memory_object_stream(10)
+    start = time()
+    with receive:
+        await slow_mode(
+            sploit,
+            send,
+            ["a", "b"],
+            timeout=1,
+            strategy=ThreadStrategy(),
+            target_time=start + 1,
+            reporter=Reporter(stream=StringIO(), live=False),
+            policy=RandomPolicy(),
+            settings=WorkerSettings(),
+            prewarmer=UnreachablePrewarmer([1], lead=0.1),
+        )
+    assert started[0] - start < 0.5
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from asyncio import CancelledError, create_task, sleep
+from io import StringIO
+from pathlib import Path
+from threading import Lock
+from time import sleep as blocking_sleep
+from pytest import mark, raises
+from pyfarmer import ConcurrencyBudget, Mode, Reporter, ThreadStrategy, async_daemon
+from pyfarmer._daemon import load_sploits
+from pyfarmer.testing import MockFarm, SubmittedFlag
+
+TARGETS = 10
+BUDGET = 4
+running = 0
+peak = 0
+lock = Lock()
+
+
+def track(ip: str, flag: str):
+    global running, peak
+    with lock:
+        running += 1
+        peak = max(peak, running)
+    blocking_sleep(0.02)
+    with lock:
+        running -= 1
+    yield flag
+
+
+def first_sploit(ip: str):
+    yield from track(ip, f"first-{ip}")
+
+
+def second_sploit(ip: str):
+    yield from track(ip, f"second-{ip}")
+
+
+@mark.asyncio
+async def test_budget():
+    budget = ConcurrencyBudget(2)
+    await budget.acquire("a")
+    await budget.acquire("a")
+    order: list[str] = []
+
+    async def wait(name: str):
+        async with budget.share(name):
+            order.append(name)
+            await sleep(0)
+
+    waiters = [create_task(wait(name)) for name in ("a", "a", "b")]
+    await sleep(0)
+    assert order == []
+    # The free slot goes to b, running no attacks
+    budget.release("a")
+    await sleep(0)
+    assert order == ["b"]
+    budget.release("a")
+    for waiter in waiters:
+        await waiter
+    assert order == ["b", "a", "a"]
+    assert not budget.running
+
+
+@mark.asyncio
+async def test_budget_cancel():
+    budget = ConcurrencyBudget(1)
+    await budget.acquire("a")
+    waiter = create_task(budget.acquire("b"))
+    await sleep(0)
+    waiter.cancel()
+    budget.release("a")
+    with raises(CancelledError):
+        await waiter
+    assert not budget.running
+    await budget.acquire("c")
+    assert budget.running == {"c": 1}
+
+
+@mark.asyncio
+async def test_daemon():
+    async with MockFarm(
+        {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 10}
+    ) as farm:
+        await async_daemon(
+            {"first": first_sploit, "second": second_sploit},
+            ThreadStrategy(),
+            server_url=farm.url,
+            budget=BUDGET,
+            mode=Mode.SPRINT,
+            reporter=Reporter(stream=StringIO(), live=False),
+        )
+    assert sorted(farm.flags) == sorted(
+        SubmittedFlag(sploit=alias, team=str(i), flag=f"{alias}-{i}")
+        for alias in ("first", "second")
+        for i in range(TARGETS)
+    )
+    assert 1 < peak <= BUDGET
+
+
+def test_load_sploits(tmp_path: Path):
+    path = tmp_path / "web.py"
+    path.write_text("def main(ip):\n    yield 1\n\ndef other(ip):\n    yield 2\n")
+    sploits = load_sploits([str(path), f"api={path}:other"])
+    assert [*sploits] == ["web", "api"]
+    assert [*sploits["web"]("ip")] == [1]
+    assert [*sploits["api"]("ip")] == [2]
+    with raises(ValueError):
+        load_sploits([str(path), str(path)])
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from asyncio import gather, open_connection, sleep
+from io import StringIO
+from anyio import WouldBlock, create_memory_object_stream
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pytest import mark, raises
+from pyfarmer import Coordinator, Mode, Reporter, ThreadStrategy, async_work
+from pyfarmer._distributed import (
+    HEARTBEAT_TIMEOUT,
+    MAX_CAPACITY,
+    receive_message,
+    send_message,
+    shard,
+)
+
+TARGETS = [str(i) for i in range(300)]
+# Not ascii, to compare the secrets as bytes
+SECRET = "clé-du-cluster"
+FLAG_FORMAT = r"flag-\d+"
+
+
+def create_coordinator(
+    targets: list[str], *, heartbeat_timeout: float = HEARTBEAT_TIMEOUT
+) -> tuple[Coordinator, MemoryObjectReceiveStream[tuple[str, str]]]:
+    send_stream: MemoryObjectSendStream[tuple[str, str]]
+    receive_stream: MemoryObjectReceiveStream[tuple[str, str]]
+    send_stream, receive_stream = create_memory_object_stream(len(targets) * 2)
+    coordinator = Coordinator(
+        targets,
+        send_stream,
+        secret=SECRET,
+        flag_lifetime=2,
+        flag_format=FLAG_FORMAT,
+        heartbeat_timeout=heartbeat_timeout,
+        reporter=Reporter(stream=StringIO(), live=False),
+    )
+    return coordinator, receive_stream
+
+
+def test_shard():
+    shards = shard(TARGETS, {"a": 1, "b": 1, "c": 2})
+    assert sorted(target for targets in shards.values() for target in targets) == (
+        sorted(TARGETS)
+    )
+    assert 50 <= len(shards["a"]) <= 100
+    assert 100 <= len(shards["c"]) <= 200
+    # Removing a node only moves its targets
+    without = shard(TARGETS, {"a": 1, "c": 2})
+    assert set(shards["a"]) <= set(without["a"])
+    assert set(shards["c"]) <= set(without["c"])
+    # Adding a node only takes targets from the others
+    more = shard(TARGETS, {"a": 1, "b": 1, "c": 2, "d": 1})
+    for name in shards:
+        assert set(more[name]) <= set(shards[name])
+    assert shard(TARGETS, {}) == {}
+
+
+@mark.asyncio
+async def test_rebalance():
+    coordinator, _ = create_coordinator(TARGETS)
+    server = await coordinator.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        first_reader, first_writer = await open_connection("127.0.0.1", port)
+        send_message(
+            first_writer,
+            {"type": "hello", "name": "a", "capacity": 4, "secret": SECRET},
+        )
+        assignment = await receive_message(first_reader)
+        assert assignment is not None and assignment["targets"] == TARGETS
+        assert assignment["timeout"] > 0
+        second_reader, second_writer = await open_connection("127.0.0.1", port)
+        send_message(
+            second_writer,
+            {"type": "hello", "name": "a", "capacity": 4, "secret": SECRET},
+        )
+        first = await receive_message(first_reader)
+        second = await receive_message(second_reader)
+        assert first is not None and second is not None
+        assert sorted(first["targets"] + second["targets"]) == sorted(TARGETS)
+        assert first["targets"] and second["targets"]
+        assert sorted(coordinator.nodes) == ["a", "a'"]
+        # The second node dies, the first one gets back all the targets
+        second_writer.close()
+        assignment = await receive_message(first_reader)
+        assert assignment is not None and assignment["targets"] == TARGETS
+        # A new config of the farm is sent to the workers
+        changes = coordinator.apply_config(
+            {"TEAMS": {target: target for target in TARGETS[:10]}, "FLAG_LIFETIME": 4}
+        )
+        assert len(changes) == 2
+        assignment = await receive_message(first_reader)
+        assert assignment is not None and assignment["targets"] == TARGETS[:10]
+        first_writer.close()
+
+
+@mark.asyncio
+async def test_distributed():
+    def sploit(ip: str):
+        yield f"flag-{ip}"
+
+    targets = TARGETS[:40]
+    coordinator, flags = create_coordinator(targets)
+    server = await coordinator.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        await gather(
+            *(
+                async_work(
+                    sploit,
+                    ThreadStrategy(),
+                    coordinator=f"127.0.0.1:{port}",
+                    secret=SECRET,
+                    name=name,
+                    pool_size=5,
+                    mode=Mode.SPRINT,
+                    reporter=Reporter(stream=StringIO(), live=False),
+                )
+                for name in ("a", "b")
+            )
+        )
+        while coordinator.nodes:
+            await sleep(0.01)
+    received: list[tuple[str, str]] = []
+    while True:
+        try:
+            received.append(flags.receive_nowait())
+        except WouldBlock:
+            break
+    assert sorted(received) == sorted((ip, f"flag-{ip}") for ip in targets)
+
+
+@mark.asyncio
+async def test_untrusted_worker():
+    coordinator, flags = create_coordinator(TARGETS)
+    server = await coordinator.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await open_connection("127.0.0.1", port)
+        send_message(writer, {"type": "hello", "name": "a", "capacity": 4})
+        assert await receive_message(reader) is None
+        reader, writer = await open_connection("127.0.0.1", port)
+        send_message(
+            writer,
+            {"type": "hello", "name": "a", "capacity": 4, "secret": "guessed"},
+        )
+        assert await receive_message(reader) is None
+        reader, writer = await open_connection("127.0.0.1", port)
+        send_message(
+            writer,
+            {"type": "hello", "name": "a", "capacity": 4, "secret": "sécret"},
+        )
+        assert await receive_message(reader) is None
+        assert not coordinator.nodes
+        reader, writer = await open_connection("127.0.0.1", port)
+        send_message(
+            writer,
+            {"type": "hello", "name": "a", "capacity": 10**6, "secret": SECRET},
+        )
+        assert await receive_message(reader) is not None
+        assert coordinator.nodes["a"].capacity == MAX_CAPACITY
+        send_message(
+            writer,
+            {
+                "type": "flags",
+                "flags": [["1", "flag-1"], ["1", "fake"], ["unknown", "flag-2"]],
+            },
+        )
+        await writer.drain()
+        assert await flags.receive() == ("1", "flag-1")
+        writer.close()
+        while coordinator.nodes:
+            await sleep(0.01)
+    with raises(WouldBlock):
+        flags.receive_nowait()
+
+
+@mark.asyncio
+async def test_silent_worker():
+    coordinator, _ = create_coordinator(TARGETS, heartbeat_timeout=0.3)
+    server = await coordinator.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        # Like a host that lost its network, the connection stays open
+        _, silent_writer = await open_connection("127.0.0.1", port)
+        send_message(
+            silent_writer,
+            {"type": "hello", "name": "a", "capacity": 4, "secret": SECRET},
+        )
+        while not coordinator.nodes:
+            await sleep(0.01)
+        reader, writer = await open_connection("127.0.0.1", port)
+        send_message(
+            writer,
+            {"type": "hello", "name": "b", "capacity": 4, "secret": SECRET},
+        )
+        assignment = await receive_message(reader)
+        assert assignment is not None and assignment["targets"] != TARGETS
+        for _ in range(10):
+            send_message(writer, {"type": "heartbeat"})
+            await sleep(0.1)
+        assert [*coordinator.nodes] == ["b"]
+        assignment = await receive_message(reader)
+        assert assignment is not None and assignment["targets"] == TARGETS
+        writer.close()
+        silent_writer.close()
@@ -1,9 +1,28 @@
 from __future__ import annotations
 from subprocess import PIPE, check_call, run, Popen
 from time import sleep
-from pytest import fixture
+from pytest import fixture, MonkeyPatch
 from collections.abc import Generator
-from pyfarmer import async_farm, SploitFunction, FarmingStrategy, ProcessStrategy, Mode
+from pyfarmer import (
+    async_farm,
+    SploitFunction,
+    FarmingStrategy,
+    ProcessStrategy,
+    ThreadStrategy,
+    SubinterpreterStrategy,
+    HybridStrategy,
+    Mode,
+    Extraction,
+    FlagFilter,
+    DeadlineExceeded,
+    RetryPolicy,
+    FileSubmitter,
+    Status,
+    random_string,
+    state,
+    remaining,
+)
+from pyfarmer.testing import MockFarm, MockTarget, Behaviour
 from aiohttp.web import (
     AppRunner,
     TCPSite,
@@ -13,14 +32,27 @@ from aiohttp.web import (
     RouteTableDef,
     json_response,
 )
-from pyfarmer._pyfarmer import Config
-from typing import TypedDict
+from pyfarmer._pyfarmer import (
+    Config,
+    Schedule,
+    WorkerSettings,
+    attack_process,
+    update_targets,
+)
+from typing import Any, TypedDict
 from collections.abc import Callable
 from contextlib import asynccontextmanager, contextmanager
 from pytest import mark
 from time import sleep, time
 from typing import NamedTuple
-
+from asyncio import create_task, sleep as asyncio_sleep
+from collections import Counter
+from json import loads
+from pathlib import Path
+import threading
+import httpx
+from pyfarmer._strategies import InterruptibleThread
+from pyfarmer._subinterpreters import subinterpreters_available
 
 TEST_SLEEP = 1
 TOLERANCE = 0.1
@@ -30,8 +62,7 @@ TARGETS = 20
 POOL_SIZE = 10
 
 TEST_SLOW_SLEEP = 0.01
-SLOW_TOLERANCE = 0.3
-TEST_SLOW_TOLERANCE = TEST_SLOW_SLEEP * SLOW_TOLERANCE
+TEST_SLOW_TIMEOUT = TEST_SLOW_SLEEP * 20
 PORT = 5005
 
 
@@ -119,6 +150,7 @@ async def run_sprint(
     n: int,
     pool_size: int = POOL_SIZE,
     sploit_timeout: float = TEST_SLEEP + TEST_TOLERANCE,
+    strategy: FarmingStrategy | None = None,
 ) -> list[Flag]:
     async with server(
         {
@@ -126,22 +158,34 @@ async def run_sprint(
             "FLAG_LIFETIME": int(sploit_timeout * n),
         },
     ) as actual:
-        await start_farm(sploit, ProcessStrategy(), pool_size, mode=Mode.SPRINT)
+        await start_farm(
+            sploit,
+            ProcessStrategy() if strategy is None else strategy,
+            pool_size,
+            mode=Mode.SPRINT,
+        )
     return actual
 
 
 async def run_slow(
     sploit: SploitFunction,
     n: int,
-    sploit_timeout: float = TEST_SLOW_SLEEP + TEST_SLOW_TOLERANCE,
+    timeout: float = TEST_SLOW_TIMEOUT,
 ) -> list[Flag]:
     async with server(
-        {
-            "TEAMS": {str(i): str(i) for i in range(n)},
-            "FLAG_LIFETIME": int(sploit_timeout * n),
-        },
+        {"TEAMS": {str(i): str(i) for i in range(n)}, "FLAG_LIFETIME": 60},
     ) as actual:
-        await start_farm(sploit, ProcessStrategy(), 1, mode=Mode.SLOW)
+        await async_farm(
+            sploit,
+            ThreadStrategy(),
+            server_url=f"127.0.0.1:{PORT}",
+            alias=ALIAS,
+            pool_size=POOL_SIZE,
+            attack_period=TEST_SLEEP,
+            timeout=timeout,
+            mode=Mode.SLOW,
+            cycles=1,
+        )
     return actual
 
 
@@ -213,46 +257,504 @@ async def test_sprint_stress():
         assert Flag(sploit="test", team=str(i), flag=str(i)) in actual
 
 
-# @mark.asyncio
-# async def test_slow_ok():
-#     def sploit(ip: str):
-#         yield ip
-
-#     with require_time(1 * TARGETS):
-#         actual = await run_slow(sploit, TARGETS, sploit_timeout=1)
-#         expected = [
-#             Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)
-#         ]
-#         assert sorted(actual) == sorted(expected)
-
-
-# @mark.asyncio
-# async def test_slow_error():
-#     def sploit(ip: str):
-#         sleep(TEST_SLOW_SLEEP)
-#         if int(ip) < TARGETS // 2:
-#             yield ip
-#             return
-#         raise Exception()
-
-#     with require_time((TEST_SLOW_SLEEP + TEST_SLOW_TOLERANCE) * TARGETS):
-#         actual = await run_slow(sploit, TARGETS)
-#         expected = [
-#             Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS // 2)
-#         ]
-#         assert sorted(actual) == sorted(expected)
-
-
-# @mark.asyncio
-# async def test_slow_timeout():
-#     def sploit(ip: str):
-#         if int(ip) == 0:
-#             yield ip
-#             return
-#         while True:
-#             sleep(TEST_SLOW_SLEEP)
-
-#     with require_time((TEST_SLOW_SLEEP + TEST_SLOW_TOLERANCE) * TARGETS):
-#         actual = await run_slow(sploit, TARGETS)
-#         expected = [Flag(sploit=ALIAS, team="0", flag="0")]
-#         assert actual == expected
+@mark.asyncio
+async def test_sprint_flag_format():
+    def sploit(ip: str):
+        yield f"FLAG{ip}"
+        yield "<html>Not found</html>"
+        yield ""
+        yield f"Your flags: FLAG{ip}A FLAG{ip}B"
+
+    async with server(
+        {
+            "TEAMS": {str(i): str(i) for i in range(TARGETS)},
+            "FLAG_LIFETIME": TARGETS,
+            "FLAG_FORMAT": r"FLAG\w+",
+        },
+    ) as actual:
+        await start_farm(sploit, ProcessStrategy(), POOL_SIZE, mode=Mode.SPRINT)
+    expected = [
+        Flag(sploit=ALIAS, team=str(i), flag=f"FLAG{i}") for i in range(TARGETS)
+    ]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_thread_timeout():
+    def sploit(ip: str):
+        yield ip
+        while True:
+            sleep(TEST_SLOW_SLEEP)
+
+    actual = await run_sprint(
+        sploit, TARGETS, sploit_timeout=TEST_TOLERANCE, strategy=ThreadStrategy()
+    )
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+    threads = [
+        thread
+        for thread in threading.enumerate()
+        if isinstance(thread, InterruptibleThread)
+    ]
+    for thread in threads:
+        thread.join(TOLERANCE)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def salvaging_sploit(ip: str):
+    found: list[str] = []
+    try:
+        left = remaining()
+        assert left is not None and left < TEST_SLEEP
+        found.append(ip)
+        while True:
+            sleep(TEST_SLOW_SLEEP)
+    except DeadlineExceeded:
+        yield from found
+
+
+@mark.asyncio
+async def test_deadline():
+    actual = await run_sprint(salvaging_sploit, TARGETS, sploit_timeout=TEST_TOLERANCE)
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_thread_deadline():
+    actual = await run_sprint(
+        salvaging_sploit,
+        TARGETS,
+        sploit_timeout=TEST_TOLERANCE,
+        strategy=ThreadStrategy(),
+    )
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_http_deadline():
+    async with MockTarget(behaviour=Behaviour.HANG) as target:
+
+        def sploit(ip: str):
+            try:
+                httpx.get(f"http://{ip}:{target.port}/", timeout=TEST_SLEEP * 10)
+            except DeadlineExceeded:
+                # Not turned into a ReadTimeout by httpx
+                yield "salvaged"
+
+        strategy = ProcessStrategy()
+        read, write = strategy.create_communication()
+
+        async def collect() -> list[object]:
+            return [message async for message in read]
+
+        messages = create_task(collect())
+        status = await attack_process(
+            sploit,
+            write,
+            target.host,
+            timeout=TEST_SLEEP,
+            strategy=strategy,
+            settings=WorkerSettings(grace=TEST_SLEEP / 2),
+        )
+    assert status == Status.TIMEOUT
+    assert await messages == ["salvaged"]
+
+
+@mark.asyncio
+async def test_thread_channel():
+    def sploit(ip: str):
+        for i in range(3):
+            yield f"{ip}-{i}"
+
+    actual = await run_sprint(
+        sploit, TARGETS, strategy=ThreadStrategy(native_channel=True)
+    )
+    expected = [
+        Flag(sploit=ALIAS, team=str(i), flag=f"{i}-{j}")
+        for i in range(TARGETS)
+        for j in range(3)
+    ]
+    assert sorted(actual) == sorted(expected)
+
+
+def importable_sploit(ip: str):
+    yield ip
+
+
+@mark.asyncio
+async def test_subinterpreters():
+    strategy = SubinterpreterStrategy()
+    try:
+        actual = await run_sprint(
+            importable_sploit, TARGETS, sploit_timeout=1, strategy=strategy
+        )
+    finally:
+        strategy.close()
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.skipif(subinterpreters_available(), reason="Sub-interpreters are available")
+def test_subinterpreters_fallback(monkeypatch: MonkeyPatch):
+    registered: list[Callable[..., Any]] = []
+    monkeypatch.setattr(
+        "pyfarmer._subinterpreters.register",
+        lambda function, *args: registered.append(function),
+    )
+    # The processes don't need the pool closing its interpreters at exit
+    SubinterpreterStrategy().close()
+    assert registered == []
+
+
+def looping_sploit(ip: str):
+    if ip == "0":
+        # Stopped only by the kill at the end of the cycle
+        while True:
+            sleep(TEST_SLEEP / 100)
+    yield ip
+
+
+@mark.asyncio
+@mark.skipif(
+    not subinterpreters_available(), reason="Sub-interpreters are not available"
+)
+async def test_subinterpreters_timeout():
+    strategy = SubinterpreterStrategy()
+    targets = 6
+    try:
+        async with server(
+            {"TEAMS": {str(i): str(i) for i in range(targets)}, "FLAG_LIFETIME": 60},
+        ) as actual:
+            with require_time(TEST_SLEEP * 10):
+                # The cold start of the sub-interpreters takes longer than the timeout
+                await async_farm(
+                    looping_sploit,
+                    strategy,
+                    server_url=f"127.0.0.1:{PORT}",
+                    alias=ALIAS,
+                    pool_size=targets,
+                    timeout=TEST_SLEEP / 2,
+                    mode=Mode.SPRINT,
+                    cycles=1,
+                )
+    finally:
+        with require_time(TEST_SLEEP * 5):
+            strategy.close()
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(1, targets)]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_hybrid():
+    strategy = HybridStrategy(processes=2, threads=POOL_SIZE // 2)
+    try:
+        actual = await run_sprint(importable_sploit, TARGETS, strategy=strategy)
+    finally:
+        strategy.close()
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+def blocking_sploit(ip: str):
+    if ip == "0":
+        # Blocked in C code, only killing the process can stop it
+        sleep(TEST_SLEEP * 10)
+    yield ip
+
+
+@mark.asyncio
+async def test_hybrid_timeout():
+    strategy = HybridStrategy(processes=2, threads=POOL_SIZE // 2, start_method="fork")
+    try:
+        actual = await run_sprint(
+            blocking_sploit, TARGETS, sploit_timeout=TEST_TOLERANCE, strategy=strategy
+        )
+    finally:
+        strategy.close()
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(1, TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+def test_update_targets():
+    targets = ["a", "b", "c"]
+    assert update_targets(targets, ["d", "c", "a"]) == (["d"], ["b"])
+    assert targets == ["a", "c", "d"]
+    assert update_targets(targets, ["a", "c", "d"]) == ([], [])
+
+
+def test_schedule_apply_config():
+    schedule = Schedule(["a"], attack_period=1, timeout=1)
+    changes = schedule.apply_config(
+        {"TEAMS": {"a": "a", "b": "b"}, "FLAG_LIFETIME": 10}, pool_size=1
+    )
+    assert len(changes) == 2
+    assert schedule.targets == ["a", "b"]
+    assert schedule.timeout == schedule.attack_period / 2
+    assert (
+        schedule.apply_config(
+            {"TEAMS": {"a": "a", "b": "b"}, "FLAG_LIFETIME": 10}, pool_size=1
+        )
+        == []
+    )
+
+
+@mark.asyncio
+async def test_refresh():
+    def sploit(ip: str):
+        yield random_string(8)
+
+    async with MockFarm(
+        {"TEAMS": {str(i): str(i) for i in range(4)}, "FLAG_LIFETIME": 2}
+    ) as farm:
+        task = create_task(
+            async_farm(
+                sploit,
+                ThreadStrategy(),
+                server_url=farm.url,
+                alias=ALIAS,
+                pool_size=POOL_SIZE,
+                attack_period=0.4,
+                timeout=0.2,
+                mode=Mode.SLOW,
+                cycles=4,
+                refresh=0.1,
+            )
+        )
+        await asyncio_sleep(0.5)
+        farm.config = {
+            "TEAMS": {str(i): str(i) for i in range(1, 5)},
+            "FLAG_LIFETIME": 2,
+        }
+        await task
+    attacks = Counter(flag.team for flag in farm.flags)
+    assert attacks["1"] == 4
+    assert 1 <= attacks["0"] <= 2
+    assert 2 <= attacks["4"] <= 3
+
+
+@mark.asyncio
+async def test_refresh_garbage():
+    def sploit(ip: str):
+        yield random_string(8)
+
+    teams = {str(i): str(i) for i in range(4)}
+    async with MockFarm({"TEAMS": teams, "FLAG_LIFETIME": 2}) as farm:
+        task = create_task(
+            async_farm(
+                sploit,
+                ThreadStrategy(),
+                server_url=farm.url,
+                alias=ALIAS,
+                pool_size=POOL_SIZE,
+                attack_period=0.4,
+                timeout=0.2,
+                mode=Mode.SLOW,
+                cycles=4,
+                refresh=0.1,
+            )
+        )
+        await asyncio_sleep(0.15)
+        farm.config = "<html>Bad gateway</html>"
+        await asyncio_sleep(0.4)
+        farm.config = {"TEAMS": {"4": "4"}}
+        await asyncio_sleep(0.4)
+        farm.config = {"TEAMS": ["4"], "FLAG_LIFETIME": 2}
+        await task
+    assert farm.stats["get_config"] > 4
+    assert Counter(flag.team for flag in farm.flags) == {team: 4 for team in teams}
+
+
+def test_flag_filter():
+    flag_filter = FlagFilter(r"[A-Z0-9]{31}=")
+    flag = "A" * 31 + "="
+    assert flag_filter(f" {flag}\n") == [flag]
+    assert flag_filter(f"flag: {flag}") == []
+    assert flag_filter("") == []
+    extractor = FlagFilter(r"[A-Z0-9]{31}=", extract=True)
+    assert extractor(f"<p>{flag}</p><p>{flag}</p>") == [flag, flag]
+    assert extractor("<html>Not found</html>") == []
+
+
+def test_flag_filter_batch():
+    extractor = FlagFilter(r"[A-Z0-9]{31}=", extract=True)
+    flag = "A" * 31 + "="
+    other = "B" * 31 + "="
+    batch = [("0", f"{flag} {flag}"), ("1", flag), ("0", f"{other}{flag}"), ("1", "")]
+    assert extractor.filter_batch(batch) == (
+        [("0", flag), ("1", flag), ("0", other)],
+        1,
+    )
+
+
+@mark.asyncio
+async def test_farmer_extraction():
+    def sploit(ip: str):
+        flag = ip.rjust(31, "A") + "="
+        yield f"<p>{flag}</p><p>{flag}</p>"
+        yield "<html>Not found</html>"
+
+    async with server(
+        {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 2},
+    ) as actual:
+        await async_farm(
+            sploit,
+            ProcessStrategy(),
+            server_url=f"127.0.0.1:{PORT}",
+            alias=ALIAS,
+            pool_size=POOL_SIZE,
+            mode=Mode.SPRINT,
+            cycles=1,
+            flag_format=r"[A-Z0-9]{31}=",
+            extract_flags=True,
+            extraction=Extraction.FARMER,
+        )
+    expected = [
+        Flag(sploit=ALIAS, team=str(i), flag=str(i).rjust(31, "A") + "=")
+        for i in range(TARGETS)
+    ]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_file_submitter(tmp_path: Path):
+    def sploit(ip: str):
+        yield ip
+
+    path = tmp_path / "flags.jsonl"
+    async with server(
+        {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 2},
+    ) as actual:
+        await async_farm(
+            sploit,
+            ProcessStrategy(),
+            server_url=f"127.0.0.1:{PORT}",
+            alias=ALIAS,
+            pool_size=POOL_SIZE,
+            mode=Mode.SPRINT,
+            cycles=1,
+            submitter=FileSubmitter(str(path)),
+        )
+    assert actual == []
+    written = [loads(line) for line in path.read_text().splitlines()]
+    assert sorted(line["flag"] for line in written) == sorted(
+        str(i) for i in range(TARGETS)
+    )
+
+
+@mark.asyncio
+async def test_state(tmp_path: Path):
+    def sploit(ip: str):
+        for flag_id in state().unseen(["a", "b", "c"]):
+            yield f"{ip}{flag_id}"
+            state().mark(flag_id)
+
+    path = tmp_path / "flags.jsonl"
+    # The second farmer finds the states of the first one
+    for _ in range(2):
+        async with server(
+            {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 2},
+        ):
+            await async_farm(
+                sploit,
+                ProcessStrategy(),
+                server_url=f"127.0.0.1:{PORT}",
+                alias=ALIAS,
+                pool_size=POOL_SIZE,
+                mode=Mode.SPRINT,
+                cycles=1,
+                submitter=FileSubmitter(str(path)),
+                state_dir=str(tmp_path / "state"),
+            )
+    written = [loads(line) for line in path.read_text().splitlines()]
+    assert sorted(line["flag"] for line in written) == sorted(
+        f"{i}{flag_id}" for i in range(TARGETS) for flag_id in "abc"
+    )
+
+
+attempts: dict[str, int] = {}
+
+
+def test_retry_policy():
+    policy = RetryPolicy(2, backoff=1, max_backoff=3)
+    assert policy.should_retry(ConnectionResetError(), 0)
+    assert policy.should_retry(EOFError(), 1)
+    assert not policy.should_retry(ConnectionResetError(), 2)
+    assert not policy.should_retry(ValueError(), 0)
+    assert not policy.should_retry(DeadlineExceeded(), 0)
+    assert 0.5 <= policy.delay(0) <= 1
+    assert 1 <= policy.delay(1) <= 2
+    assert 1.5 <= policy.delay(5) <= 3
+
+
+def flaky_sploit(ip: str):
+    attempts[ip] = attempts.get(ip, 0) + 1
+    if attempts[ip] == 1:
+        raise ConnectionResetError()
+    if int(ip) % 2 == 0:
+        raise ValueError()
+    yield ip
+
+
+@mark.asyncio
+async def test_retry():
+    async with server(
+        {"TEAMS": {str(i): str(i) for i in range(TARGETS)}, "FLAG_LIFETIME": 2},
+    ) as actual:
+        await async_farm(
+            flaky_sploit,
+            ProcessStrategy(),
+            server_url=f"127.0.0.1:{PORT}",
+            alias=ALIAS,
+            pool_size=POOL_SIZE,
+            mode=Mode.SPRINT,
+            cycles=1,
+            retry=RetryPolicy(2, backoff=0.01),
+        )
+    expected = [
+        Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(1, TARGETS, 2)
+    ]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_slow_ok():
+    def sploit(ip: str):
+        yield ip
+
+    with require_time(TEST_SLEEP + TEST_SLOW_TIMEOUT + TEST_TOLERANCE):
+        actual = await run_slow(sploit, TARGETS)
+    expected = [Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS)]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_slow_error():
+    def sploit(ip: str):
+        sleep(TEST_SLOW_SLEEP)
+        if int(ip) < TARGETS // 2:
+            yield ip
+            return
+        raise Exception()
+
+    with require_time(TEST_SLEEP + TEST_SLOW_TIMEOUT + TEST_TOLERANCE):
+        actual = await run_slow(sploit, TARGETS)
+    expected = [
+        Flag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(TARGETS // 2)
+    ]
+    assert sorted(actual) == sorted(expected)
+
+
+@mark.asyncio
+async def test_slow_timeout():
+    def sploit(ip: str):
+        if int(ip) == 0:
+            yield ip
+            return
+        while True:
+            sleep(TEST_SLOW_SLEEP)
+
+    with require_time(TEST_SLEEP + TEST_SLOW_TIMEOUT + TEST_TOLERANCE):
+        actual = await run_slow(sploit, TARGETS)
+    assert actual == [Flag(sploit=ALIAS, team="0", flag="0")]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+from asyncio import gather
+from threading import Thread
+from time import monotonic
+from pytest import mark
+from pyfarmer import TokenBucket, RateLimiter, rate_limit
+
+TOLERANCE = 0.05
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_reserve():
+    clock = FakeClock()
+    bucket = TokenBucket(2, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1]
+    clock.now = 10
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+
+
+@mark.asyncio
+async def test_rate_limiter():
+    limiter = RateLimiter(rate=20, target_rate=5)
+    start = monotonic()
+    await gather(*(limiter.acquire(str(i)) for i in range(5)))
+    assert monotonic() - start < 0.2 + TOLERANCE
+    start = monotonic()
+    await gather(*(limiter.acquire("0") for _ in range(3)))
+    assert monotonic() - start >= 0.4 - TOLERANCE
+
+
+def test_rate_limiter_subnet():
+    limiter = RateLimiter(subnet_rate=1, subnet_prefix=24)
+    assert limiter.subnet("10.60.1.2") == "10.60.1.0/24"
+    assert limiter.subnet("vulnbox") is None
+    assert limiter.buckets("10.60.1.2") == limiter.buckets("10.60.1.3")
+    assert limiter.buckets("10.60.1.2") != limiter.buckets("10.60.2.2")
+    assert limiter.buckets("vulnbox") == []
+
+
+def test_rate_limit_helper():
+    start = monotonic()
+    threads = [
+        Thread(target=rate_limit, args=(10,), kwargs={"key": "test"}) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert monotonic() - start >= 0.3 - TOLERANCE
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from asyncio import create_task, sleep
+from io import StringIO
+from os import stat, utime
+from pathlib import Path
+from pickle import dumps, loads
+from pytest import mark, raises
+from pyfarmer import ReloadableSploit, Reporter
+from pyfarmer._reload import load_sploit
+
+SPLOIT = """
+def sploit(ip):
+    yield f"{ip}-{VERSION}"
+
+VERSION = {version!r}
+
+if __name__ == "__main__":
+    raise RuntimeError("the main block must not run")
+"""
+INTERVAL = 0.01
+
+
+def write_sploit(path: Path, version: str) -> None:
+    mtime = stat(path).st_mtime_ns if path.exists() else 0
+    path.write_text(SPLOIT.replace("{version!r}", repr(version)))
+    # Make sure the change is seen with coarse filesystem timestamps
+    utime(path, ns=(mtime + 1_000_000_000, mtime + 1_000_000_000))
+
+
+def create_sploit(tmp_path: Path) -> ReloadableSploit:
+    path = tmp_path / "sploit.py"
+    write_sploit(path, "v1")
+    return ReloadableSploit(
+        load_sploit(str(path), "sploit", stat(path).st_mtime_ns)  # type: ignore
+    )
+
+
+def test_reload(tmp_path: Path):
+    sploit = create_sploit(tmp_path)
+    running = sploit("0")
+    assert not sploit.changed()
+    write_sploit(Path(sploit.path), "v2")
+    assert sploit.changed()
+    assert sploit.reload()
+    assert not sploit.changed()
+    assert [*sploit("1")] == ["1-v2"]
+    assert [*running] == ["0-v1"]  # type: ignore
+    assert [*loads(dumps(sploit))("2")] == ["2-v2"]
+
+
+def test_reload_missing(tmp_path: Path):
+    sploit = create_sploit(tmp_path)
+    path = Path(sploit.path)
+    write_sploit(path, "v2")
+    assert sploit.changed()
+    # Removed for a moment by an editor saving it with a rename
+    content = path.read_text()
+    path.unlink()
+    assert not sploit.reload()
+    path.write_text(content)
+    utime(path, ns=(0, 0))
+    assert sploit.changed()
+    assert sploit.reload()
+    assert [*sploit("0")] == ["0-v2"]
+
+
+def test_reload_error(tmp_path: Path):
+    sploit = create_sploit(tmp_path)
+    path = Path(sploit.path)
+    path.write_text("def sploit(ip):\n    yield (")
+    utime(path, ns=(0, 0))
+    assert sploit.changed()
+    assert not sploit.reload()
+    assert not sploit.changed()
+    assert [*sploit("0")] == ["0-v1"]
+    assert [*loads(dumps(sploit))("1")] == ["1-v1"]
+
+
+def test_not_reloadable():
+    def sploit(ip: str):
+        yield ip
+
+    with raises(ValueError):
+        ReloadableSploit(sploit)
+
+
+@mark.asyncio
+async def test_watch(tmp_path: Path):
+    sploit = create_sploit(tmp_path)
+    stream = StringIO()
+    async with Reporter(interval=60, stream=stream) as reporter:
+        watcher = create_task(sploit.watch(reporter, interval=INTERVAL))
+        write_sploit(Path(sploit.path), "v2")
+        await sleep(INTERVAL * 50)
+        watcher.cancel()
+    assert [*sploit("0")] == ["0-v2"]
+    assert "Reloaded the sploit" in stream.getvalue()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from io import StringIO
+from pytest import mark
+from pyfarmer import Reporter, Status
+
+
+@mark.asyncio
+async def test_reporter_summary():
+    stream = StringIO()
+    async with Reporter(interval=60, stream=stream) as reporter:
+        for i in range(100):
+            reporter.attack_started(str(i))
+            reporter.attack_completed(str(i), Status.OK if i % 2 else Status.ERROR, 1)
+    output = stream.getvalue().splitlines()
+    assert len(output) == 1
+    assert "OK: 50" in output[0]
+    assert "ERROR: 50" in output[0]
+    assert "flags: 100" in output[0]
+
+
+@mark.asyncio
+async def test_reporter_live():
+    stream = StringIO()
+    async with Reporter(interval=60, stream=stream, live=True) as reporter:
+        reporter.attack_started("0")
+        reporter.report()
+        reporter.print("message")
+        reporter.attack_completed("0", Status.TIMEOUT, 0)
+    output = stream.getvalue()
+    assert "\rrunning: 1" in output
+    assert "message\n" in output
+    assert output.endswith("\n")
+    assert "TIMEOUT: 1" in output.splitlines()[-1]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from collections import Counter
+from random import Random
+from pyfarmer import BanditPolicy, ExpiryPolicy, RandomPolicy, Status, Tick
+
+TARGETS = [str(i) for i in range(10)]
+CYCLES = 1000
+
+
+def test_random_policy():
+    policy = RandomPolicy(random=Random(0))
+    order = policy.plan(TARGETS)
+    assert sorted(order) == TARGETS
+    assert policy.plan(TARGETS) == order
+
+
+def test_bandit_policy():
+    policy = BanditPolicy(exploration=0.1, random=Random(0))
+    assert sorted(policy.plan(TARGETS)) == TARGETS
+    launches: Counter[str] = Counter()
+    for cycle in range(CYCLES):
+        plan = policy.plan(TARGETS)
+        if cycle > 0:
+            assert plan[0] in ("0", "1")
+        for target in plan:
+            launches[target] += 1
+            policy.update(target, Status.OK, 3 if int(target) < 2 else 0)
+    assert launches["0"] == launches["1"] == CYCLES
+    for target in TARGETS[2:]:
+        assert CYCLES * 0.05 < launches[target] < CYCLES * 0.5
+
+
+def test_expiry_policy():
+    policy = ExpiryPolicy(RandomPolicy(random=Random(0)))
+    order = policy.plan(TARGETS)
+    assert sorted(order) == TARGETS
+    for target in order[:5]:
+        policy.update(target, Status.OK, 1)
+    for target in order[5:]:
+        policy.update(target, Status.ERROR, 0)
+    # The targets that never gave flags come first
+    assert policy.plan(TARGETS) == order[5:] + order[:5]
+    policy.update(order[5], Status.OK, 1)
+    assert policy.plan(TARGETS)[-1] == order[5]
+
+
+def test_tick():
+    tick = Tick(10, 3, 1)
+    assert tick.round_launch(4) == 4
+    assert tick.round_launch(13.9) == 4
+    assert tick.round_launch(0) == -6
+    assert tick.next_launch(0, 2) == -6
+    assert tick.next_launch(1.5, 2) == 4
+    assert tick.next_launch(4, 2) == 4
+    # A round running late is still attacked while its window is open
+    assert tick.next_launch(4.5, 2) == 4
+    assert tick.next_launch(11.5, 2) == 14
+    assert tick.next_launch(4.5, 2, previous=4) == 14
+    assert tick.next_launch(4, 20) == 4
+    assert tick.next_launch(4.5, 20) == 14
+    assert tick.next_launch(-18, 2) == -16
+    assert tick.window(4, 2) == 11
+    assert tick.window(4, 20) == 4
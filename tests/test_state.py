@@ -0,0 +1,40 @@
+from __future__ import annotations
+from pathlib import Path
+from pytest import raises
+from pyfarmer import state, TargetState
+from pyfarmer._state import (
+    MAX_SEEN_ITEMS,
+    close_state,
+    set_state,
+    sploit_state_dir,
+    state_path,
+)
+
+
+def test_target_state(tmp_path: Path):
+    path = state_path(sploit_state_dir(str(tmp_path), "a/b"), "10.0.0.1")
+    saved = TargetState(path)
+    assert saved.unseen(["1", "2", "3"]) == ["1", "2", "3"]
+    saved.mark("1")
+    saved.mark("2")
+    saved["last"] = 2
+    saved.save()
+    loaded = TargetState(path)
+    assert loaded.unseen(["1", "2", "3"]) == ["3"]
+    assert loaded["last"] == 2
+    assert loaded.unseen(["1"], key="other") == ["1"]
+    for i in range(MAX_SEEN_ITEMS - 1):
+        loaded.mark(f"new{i}")
+    # The oldest is forgotten first
+    assert loaded.unseen(["1", "2", "new0"]) == ["1"]
+
+
+def test_state():
+    with raises(RuntimeError):
+        state()
+    set_state(None)
+    state()["cursor"] = 1
+    assert state()["cursor"] == 1
+    close_state()
+    with raises(RuntimeError):
+        state()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+from asyncio import Event, StreamReader, StreamWriter, start_server, wait_for
+from collections import Counter
+from json import loads
+from pathlib import Path
+from pytest import mark, raises
+from pyfarmer import TcpSubmitter, FileSubmitter
+
+TOKEN = "team-token"
+ALIAS = "test"
+FLAGS = [("1", "A" * 31 + "="), ("2", "B" * 31 + "="), ("3", "old")]
+
+
+class Checksystem:
+    """Line based checksystem accepting the flags ending with ="""
+
+    def __init__(self):
+        self.tokens: list[str] = []
+        self.connections = 0
+        self.drop = False
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"Welcome\n")
+        self.tokens.append((await reader.readline()).decode().strip())
+        writer.write(b"Send the flags\n")
+        while line := (await reader.readline()).decode().strip():
+            if self.drop:
+                self.drop = False
+                break
+            writer.write(
+                b"Accepted\n" if line.endswith("=") else b"Flag not accepted: old\n"
+            )
+            await writer.drain()
+        writer.close()
+
+
+@mark.asyncio
+async def test_tcp_submitter():
+    checksystem = Checksystem()
+    server = await start_server(checksystem.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    submitter = TcpSubmitter("127.0.0.1", port, token=TOKEN, banner_lines=2)
+    try:
+        assert await submitter.submit(FLAGS, alias=ALIAS) == Counter(
+            accepted=2, denied=1
+        )
+        assert await submitter.submit(FLAGS[:1], alias=ALIAS) == Counter(accepted=1)
+        assert checksystem.connections == 1
+        checksystem.drop = True
+        with raises(OSError):
+            await submitter.submit(FLAGS, alias=ALIAS)
+        assert await submitter.submit(FLAGS[2:], alias=ALIAS) == Counter(denied=1)
+        assert checksystem.connections == 2
+        assert checksystem.tokens == [TOKEN, TOKEN]
+    finally:
+        await submitter.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+@mark.asyncio
+async def test_tcp_submitter_unreachable():
+    server = await start_server(lambda _, __: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    submitter = TcpSubmitter("127.0.0.1", port)
+    with raises(OSError):
+        await submitter.submit(FLAGS, alias=ALIAS)
+
+
+@mark.asyncio
+async def test_file_submitter(tmp_path: Path):
+    path = tmp_path / "flags.jsonl"
+    submitter = FileSubmitter(str(path))
+    assert await submitter.submit(FLAGS[:2], alias=ALIAS) == Counter(written=2)
+    assert await submitter.submit(FLAGS[2:], alias=ALIAS) == Counter(written=1)
+    await submitter.aclose()
+    lines = [loads(line) for line in path.read_text().splitlines()]
+    assert [(line["team"], line["flag"]) for line in lines] == FLAGS
+    assert all(line["sploit"] == ALIAS for line in lines)
+
+
+@mark.asyncio
+async def test_tcp_submitter_timeout():
+    closed = Event()
+
+    async def hang(reader: StreamReader, writer: StreamWriter) -> None:
+        # Never answers, until the submitter closes the connection
+        while await reader.read(1024):
+            pass
+        closed.set()
+        writer.close()
+
+    server = await start_server(hang, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    submitter = TcpSubmitter("127.0.0.1", port, timeout=0.1)
+    try:
+        with raises(ConnectionError):
+            await submitter.submit(FLAGS, alias=ALIAS)
+        await wait_for(closed.wait(), 1)
+    finally:
+        await submitter.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+@mark.asyncio
+async def test_tcp_submitter_answers():
+    answers = [
+        b"Accepted\n",
+        b"Flag accepted! Earned 10 points\n",
+        b"[OK]\n",
+        b"Congratulations, you got it\n",
+        b"Flag not accepted: old\n",
+        b"Denied: no such flag\n",
+        b"Invalid flag\n",
+    ]
+
+    async def handle(reader: StreamReader, writer: StreamWriter) -> None:
+        for answer in answers:
+            flag = (await reader.readline()).strip()
+            # FAUST style, the flag echoed before its status
+            writer.write(flag + b" " + answer)
+        await writer.drain()
+        writer.close()
+
+    server = await start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    submitter = TcpSubmitter("127.0.0.1", port)
+    flags = [(str(i), f"okFLAG{i}=") for i in range(len(answers))]
+    try:
+        assert await submitter.submit(flags, alias=ALIAS) == Counter(
+            accepted=4, denied=3
+        )
+    finally:
+        await submitter.aclose()
+        server.close()
+        await server.wait_closed()
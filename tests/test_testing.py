@@ -0,0 +1,257 @@
+from __future__ import annotations
+from asyncio import open_connection, wait_for, TimeoutError
+from collections.abc import Callable
+from io import BytesIO
+from json import loads
+from typing import Any
+from httpx import AsyncClient
+from pytest import mark, raises
+from pyfarmer import (
+    async_farm,
+    ProcessStrategy,
+    Mode,
+    CompactEncoder,
+    JsonEncoder,
+    FarmShim,
+    Status,
+    Tick,
+)
+from pyfarmer.testing import (
+    MockFarm,
+    MockTarget,
+    Behaviour,
+    SubmittedFlag,
+    SimulatedAttack,
+    simulate,
+)
+
+ALIAS = "test"
+
+
+def http_sploit(address: str):
+    from httpx import get
+
+    yield from get(f"http://{address}/").text.split()
+
+
+@mark.asyncio
+async def test_mock_farm_faults():
+    async with MockFarm(
+        {"TEAMS": {}, "FLAG_LIFETIME": 1}, error_rate=1
+    ) as farm, AsyncClient() as client:
+        response = await client.get(f"{farm.url}/api/get_config")
+        assert response.status_code == 500
+        farm.error_rate = 0
+        farm.rate_limit = 1
+        response = await client.get(f"{farm.url}/api/get_config")
+        assert response.status_code == 200
+        response = await client.get(f"{farm.url}/api/get_config")
+        assert response.status_code == 429
+    assert farm.stats["errors"] == 1
+    assert farm.stats["rate_limited"] == 1
+    assert farm.stats["get_config"] == 3
+
+
+@mark.asyncio
+async def test_mock_target_behaviours():
+    async with MockTarget(flags=2) as target:
+        reader, writer = await open_connection(target.host, target.port)
+        writer.write(b"hello\n")
+        assert (await reader.read()).decode().split() == target.issued
+        writer.close()
+        target.behaviour = Behaviour.DROP
+        reader, writer = await open_connection(target.host, target.port)
+        writer.write(b"hello\n")
+        assert await reader.read() == b""
+        writer.close()
+        target.behaviour = Behaviour.HANG
+        reader, writer = await open_connection(target.host, target.port)
+        writer.write(b"hello\n")
+        with raises(TimeoutError):
+            await wait_for(reader.read(), 0.5)
+        writer.close()
+    assert len(target.issued) == 2
+
+
+@mark.asyncio
+async def test_mock_farm_sprint():
+    async with MockTarget() as ok, MockTarget(
+        behaviour=Behaviour.DROP
+    ) as drop, MockTarget(behaviour=Behaviour.HANG) as hang:
+        targets = {"ok": ok.address, "drop": drop.address, "hang": hang.address}
+        async with MockFarm(
+            {"TEAMS": targets, "FLAG_LIFETIME": 3}, latency=0.1, slow_consumer=0.01
+        ) as farm:
+            await async_farm(
+                http_sploit,
+                ProcessStrategy(),
+                server_url=farm.url,
+                alias=ALIAS,
+                pool_size=3,
+                timeout=1,
+                mode=Mode.SPRINT,
+            )
+    assert farm.flags == [
+        SubmittedFlag(sploit=ALIAS, team=ok.address, flag=ok.issued[0])
+    ]
+
+
+@mark.asyncio
+async def test_multiple_farms():
+    def sploit(ip: str):
+        yield ip
+
+    config = {"TEAMS": {str(i): str(i) for i in range(20)}, "FLAG_LIFETIME": 20}
+    async with MockFarm(config, error_rate=1) as broken, MockFarm(config) as healthy:
+        await async_farm(
+            sploit,
+            ProcessStrategy(),
+            server_url=[broken.url, healthy.url],
+            alias=ALIAS,
+            pool_size=10,
+            mode=Mode.SPRINT,
+        )
+    assert broken.flags == []
+    assert sorted(healthy.flags) == sorted(
+        SubmittedFlag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(20)
+    )
+
+
+@mark.asyncio
+async def test_compact_gzip_encoding():
+    def sploit(ip: str):
+        yield ip
+
+    config = {"TEAMS": {str(i): str(i) for i in range(20)}, "FLAG_LIFETIME": 20}
+    async with MockFarm(config) as farm:
+        await async_farm(
+            sploit,
+            ProcessStrategy(),
+            server_url=farm.url,
+            alias=ALIAS,
+            pool_size=10,
+            mode=Mode.SPRINT,
+            encoder=CompactEncoder(gzip=True),
+        )
+    assert sorted(farm.flags) == sorted(
+        SubmittedFlag(sploit=ALIAS, team=str(i), flag=str(i)) for i in range(20)
+    )
+
+
+def test_farm_shim():
+    flags = [("10.0.0.1", "A" * 31 + "="), ("10.0.0.2", "B" * 31 + "=")]
+    received: list[object] = []
+
+    def app(environ: dict[str, Any], start_response: Callable[..., Any]):
+        body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+        received.append(loads(body))
+        return [b""]
+
+    for encoder in [JsonEncoder(), CompactEncoder(), CompactEncoder(gzip=True)]:
+        body, headers = encoder.encode(flags, alias=ALIAS)
+        environ = {
+            "PATH_INFO": "/api/post_flags",
+            "REQUEST_METHOD": "POST",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": BytesIO(body),
+        }
+        if "Content-Encoding" in headers:
+            environ["HTTP_CONTENT_ENCODING"] = headers["Content-Encoding"]
+        FarmShim(app)(environ, lambda *_: None)
+    expected = [{"flag": flag, "sploit": ALIAS, "team": team} for team, flag in flags]
+    assert received == [expected] * 3
+
+
+def test_simulate_slow():
+    targets = [str(i) for i in range(1000)]
+    report = simulate(
+        targets,
+        lambda target: SimulatedAttack(duration=int(target) % 10 / 1000, flags=2),
+        attack_period=60,
+        timeout=1,
+        cycles=10,
+    )
+    assert len(report.launches) == len(targets) * 10
+    assert report.flags == len(targets) * 10 * 2
+    assert len(report.cycles) == 10
+    assert all(cycle.overrun == 0 for cycle in report.cycles)
+    assert max(abs(jitter) for jitter in report.jitter) < 1e-6
+    assert abs(report.elapsed - 600) < 1e-6
+
+
+def test_simulate_overrun():
+    report = simulate(
+        [str(i) for i in range(100)],
+        lambda target: SimulatedAttack(duration=5),
+        attack_period=10,
+        timeout=2,
+        cycles=3,
+    )
+    assert all(launch.status == Status.TIMEOUT for launch in report.launches)
+    assert report.flags == 0
+    # The last attack of every cycle runs past the end of the cycle
+    assert all(1.9 - 1e-6 < cycle.overrun <= 2 for cycle in report.cycles)
+    # The next cycles start late and run more attacks at once to catch up
+    assert report.peak_running > 20
+
+
+def test_simulate_tick():
+    tick = Tick(10, 3, 1)
+    report = simulate(
+        [str(i) for i in range(20)],
+        lambda target: SimulatedAttack(duration=1.5),
+        attack_period=60,
+        timeout=2,
+        cycles=3,
+        tick=tick,
+    )
+    assert len(report.launches) == 60
+    for launch in report.launches:
+        assert launch.end is not None
+        start = tick.round_launch(launch.start)
+        # Launched after the flags of the round are placed,
+        # completed before the ones of the next round
+        assert start <= launch.start and launch.end <= start + tick.length
+    # Started during the round before the first one, that is still attacked
+    assert [cycle.start for cycle in report.cycles] == [0, 4, 14]
+    assert all(cycle.overrun == 0 for cycle in report.cycles)
+
+
+def test_simulate_tick_overrun():
+    tick = Tick(10, 3, 1)
+    report = simulate(
+        [str(i) for i in range(20)],
+        lambda target: SimulatedAttack(duration=5, kill_delay=1.5),
+        attack_period=60,
+        timeout=2,
+        cycles=4,
+        tick=tick,
+    )
+    # The last attacks of every cycle end after the next round is launched,
+    # it is attacked late instead of being skipped
+    assert all(cycle.overrun > 0 for cycle in report.cycles)
+    assert [tick.round_launch(cycle.start) for cycle in report.cycles] == [
+        -6,
+        4,
+        14,
+        24,
+    ]
+    assert all(
+        cycle.start > tick.round_launch(cycle.start) for cycle in report.cycles[1:]
+    )
+
+
+def test_simulate_sprint():
+    report = simulate(
+        [str(i) for i in range(100)],
+        lambda target: SimulatedAttack(duration=1, error=target == "0"),
+        attack_period=60,
+        timeout=2,
+        pool_size=10,
+        mode=Mode.SPRINT,
+    )
+    assert abs(report.elapsed - 10) < 1e-6
+    assert report.peak_running == 10
+    assert abs(report.utilization - 1) < 1e-6
+    assert sum(launch.status == Status.ERROR for launch in report.launches) == 1
+    assert report.cycles == []